@@ -1,83 +1,405 @@
 # 04_qa_faiss.py
 """
 FAISS retrieval with SBERT embeddings + OpenRouter for generated answers.
+
+A sharded index (03_build_faiss_index.py --shards N) is searched with
+parallel scatter-gather; RAG_SHARD_MODE picks threads (default),
+processes, or a comma-separated list of app/04c_shard_worker.py
+addresses (see utils/shards.py).
+
+Queries that exactly name a drug or condition page ("ibuprofen",
+"What is Advil?") skip embedding and vector search and return that
+page's chunks (utils/entities.py); RAG_ENTITY_LOOKUP=0 turns this off.
+
+Indexes are versioned (utils/index_versions.py): a background watcher
+picks up a newly published version and swaps it in between requests,
+so rebuilding the index needs no restart.
+
+If the version has a precomputed kNN graph (embeddings/03c_build_knn_graph.py
+or 03 --knn), related_documents() suggests related articles for an
+answer's sources with array lookups only, no extra search.
+
+Admission control (utils/admission.py): embedding and LLM calls run
+under concurrency limits with bounded wait queues, and every
+answer_question() call has a deadline (RAG_DEADLINE_SECONDS) that all
+its stages and the LLM HTTP timeout share. A request that finds a full
+queue or runs out of time before retrieval fails fast with Overloaded /
+DeadlineExceeded. One that has its passages but cannot get an LLM slot
+or enough time for generation, or whose LLM call fails (429 / 5xx,
+connection error), gets the passages without a generated answer
+(context_stats["degraded"] says why).
+
+RAG_EMBED_MODEL picks the embedding model (utils/embedding_models.py) and
+with it the index namespace; an index built with another model is refused.
 """
 
 import os
+import sys
 import json
+import argparse
 from pathlib import Path
 
-import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
 import requests
 
 # ----- paths -----
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.context import assemble_context  # noqa: E402
+from utils.admission import (  # noqa: E402
+    DeadlineExceeded, Overloaded, Stage, check_deadline, deadline, remaining,
+)
+from utils.embedding_models import (  # noqa: E402
+    MULTI_MODEL, EmbeddingModel, ModelMismatchError, check_fingerprint, check_manifest, get_model,
+    index_root, read_manifest, selected_model,
+)
+from utils.entities import ENTITY_FILE, EntityIndex  # noqa: E402
+from utils.index_versions import (  # noqa: E402
+    CURRENT_NAME, LEGACY_VERSION, IndexWatcher, current_version, has_index, versions_dir,
+)
+from utils.knn_graph import GRAPH_NAME, KnnGraph  # noqa: E402
+from utils.metadata_store import MetadataStore  # noqa: E402
+from utils.metrics import count, format_trace, request_trace, span, start_metrics_server  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.projection import FILE_NAME as PROJECTION_NAME, Projection  # noqa: E402
+from utils.resources import LazyResource, load_sentence_transformer, warm  # noqa: E402
+from utils.shards import load_sharded  # noqa: E402
 
-INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
+# ----- SBERT for embedding queries (RAG_EMBED_MODEL, default minilm) -----
+EMBED_MODEL = selected_model()
+MODEL_NAME = EMBED_MODEL.model_id
+
+INDEX_DIR = index_root(os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss"), EMBED_MODEL)
 CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
 
-INDEX_PATH = os.path.join(INDEX_DIR, "index.faiss")
-META_PATH = os.path.join(INDEX_DIR, "metadata.jsonl")
+STORE_NAME = "metadata.store"   # written by 03 / 03b next to index.faiss
 
 # ----- OpenRouter -----
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise ValueError("Set OPENROUTER_API_KEY!")
+# Overridable for load tests against benchmarks/mock_servers.py
+OPENROUTER_URL = os.environ.get("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 
 ANSWER_MODEL = "openai/gpt-oss-20b:free"
 
-# ----- SBERT for embedding queries -----
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
+# Prompt context budget in (estimated) tokens; 0 = only merge overlapping chunks
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("RAG_CONTEXT_TOKENS", "1200"))
 
-# ----- load FAISS -----
-index = faiss.read_index(INDEX_PATH)
+# ----- non-English queries (indexes from embeddings/03b_build_multilingual_index.py) -----
+MULTI_EMBED_MODEL = get_model(MULTI_MODEL)
+MULTI_MODEL_NAME = MULTI_EMBED_MODEL.model_id
+SUPPORTED_LANGS = ["en", "hi", "ta", "te", "kn"]
+MULTI_INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss_multilingual")
+LANG_INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss_{lang}")
 
-# ----- load metadata -----
-metadata = []
-with open(META_PATH, "r", encoding="utf-8") as f:
-    for line in f:
-        metadata.append(json.loads(line))
+# Exact drug / condition name queries bypass dense search
+ENTITY_LOOKUP = os.environ.get("RAG_ENTITY_LOOKUP", "1") == "1"
 
-# ----- load chunk texts -----
-chunk_text_map = {}
-for root, _, files in os.walk(CHUNKS_DIR):
-    for fname in files:
-        if not fname.endswith(".jsonl"):
-            continue
-        with open(Path(root) / fname, "r", encoding="utf-8") as f:
-            for line in f:
-                rec = json.loads(line)
-                chunk_text_map[rec["id"]] = rec["text"]
+# Seconds between checks for a newly published index version (0 = never)
+WATCH_INTERVAL = float(os.environ.get("RAG_INDEX_WATCH_SECONDS", "10"))
+
+# ----- admission control (utils/admission.py) -----
+# Whole-request budget in seconds (0 = none)
+DEADLINE_SECONDS = float(os.environ.get("RAG_DEADLINE_SECONDS", "20"))
+# Skip generation (answer with passages only) with less than this left
+LLM_MIN_SECONDS = float(os.environ.get("RAG_LLM_MIN_SECONDS", "2"))
+# Upper bound on one LLM call, deadline or not: a stalled connection must
+# not hold an LLM slot forever
+LLM_TIMEOUT_SECONDS = float(os.environ.get("RAG_LLM_TIMEOUT_SECONDS", "60"))
+# SBERT encodes use all cores; a few at once keep the queue moving
+EMBED_STAGE = Stage("embed", int(os.environ.get("RAG_EMBED_CONCURRENCY", "2")),
+                    int(os.environ.get("RAG_EMBED_QUEUE", "32")))
+# Stay under the OpenRouter key's rate limit instead of collecting 429s
+LLM_STAGE = Stage("llm", int(os.environ.get("RAG_LLM_CONCURRENCY", "8")),
+                  int(os.environ.get("RAG_LLM_QUEUE", "16")))
+DEGRADED_NOTE = ("The answer service is busy, so no answer was generated. "
+                 "These are the most relevant passages found for your question:")
+
+
+# ----- loaders (run on first use, see utils/resources.py) -----
+def load_index(path: str):
+    sharded = load_sharded(os.path.dirname(path))
+    if sharded is not None:
+        return sharded
+    import faiss
+    return faiss.read_index(path)
+
+
+def load_chunk_texts(ids: list[str]) -> list[str]:
+    wanted = set(ids)
+    texts = {}
+    for root, _, files in os.walk(CHUNKS_DIR):
+        for fname in files:
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    if rec["id"] in wanted:
+                        texts[rec["id"]] = rec["text"]
+    return [texts[cid] for cid in ids]
+
+
+def load_metadata(index_dir: str = INDEX_DIR) -> MetadataStore:
+    """
+    Row metadata + chunk texts for an index. Memory-maps metadata.store if
+    the index was built with it; older indexes (metadata.jsonl only) are
+    converted in memory, joining the texts from data_chunks/.
+    """
+    store_path = os.path.join(index_dir, STORE_NAME)
+    if os.path.exists(store_path):
+        return MetadataStore.load(store_path)
+
+    records = []
+    with open(os.path.join(index_dir, "metadata.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            records.append(json.loads(line))
+    return MetadataStore.from_records(records, load_chunk_texts([r["id"] for r in records]))
+
+
+class IndexVersion:
+    """One published index version; index rows and metadata rows always match."""
+
+    def __init__(self, version: str, index, metadata: MetadataStore,
+                 projection: Projection | None = None, entities: EntityIndex | None = None,
+                 spec: EmbeddingModel = EMBED_MODEL, manifest: dict | None = None,
+                 graph: KnnGraph | None = None):
+        self.version = version
+        self.index = index
+        self.metadata = metadata
+        self.projection = projection    # reduced-dim index (03 --reduce)
+        self.entities = entities        # exact name -> rows (02 entities.json)
+        self.spec = spec                # embedding model the index was checked against
+        self.manifest = manifest        # model.json, None for pre-manifest indexes
+        self.graph = graph              # related documents (knn_graph.npz), optional
+        self._checked_encoder = None
+
+    def check_encoder(self, encoder):
+        """Refuse an encoder that does not reproduce the index fingerprint (once per encoder)."""
+        if self._checked_encoder is not encoder:
+            check_fingerprint(self.manifest, self.spec, encoder)
+            self._checked_encoder = encoder
+
+    def close(self):
+        if hasattr(self.index, "close"):    # ShardedIndex worker connections
+            self.index.close()
+
+
+def load_entities(version_dir: str, metadata: MetadataStore) -> EntityIndex | None:
+    path = os.path.join(version_dir, ENTITY_FILE)
+    if not os.path.exists(path):
+        return None
+    row_of = dict(metadata.positions())
+    aliases_path = os.path.join(version_dir, "aliases.json")
+    if os.path.exists(aliases_path):
+        with open(aliases_path, "r", encoding="utf-8") as f:
+            for dup, canonical in json.load(f).items():
+                if canonical in row_of:
+                    row_of[dup] = row_of[canonical]
+    return EntityIndex.load(path).bind(row_of)
+
+
+def load_graph(version_dir: str, metadata: MetadataStore) -> KnnGraph | None:
+    path = os.path.join(version_dir, GRAPH_NAME)
+    if not os.path.exists(path):
+        return None
+    graph = KnnGraph.load(path)
+    if len(graph) != len(metadata):
+        print(f"[WARN] {path} has {len(graph)} rows, index has {len(metadata)}; ignoring it")
+        return None
+    return graph
+
+
+def load_version(root: str = INDEX_DIR, spec: EmbeddingModel = EMBED_MODEL) -> IndexVersion:
+    """
+    Index + metadata of the version CURRENT points at (read once).
+    Raises ModelMismatchError if it was built for another model than `spec`.
+    """
+    version = current_version(root)
+    version_dir = os.path.join(versions_dir(root), version) if version else root
+    manifest = read_manifest(version_dir)
+    projection_path = os.path.join(version_dir, PROJECTION_NAME)
+    projection = Projection.load(projection_path) if os.path.exists(projection_path) else None
+    index = load_index(os.path.join(version_dir, "index.faiss"))
+    try:
+        check_manifest(manifest, spec, index.d, version_dir,
+                       projection.dim_in if projection is not None else None)
+    except ModelMismatchError:
+        if hasattr(index, "close"):     # ShardedIndex worker connections
+            index.close()
+        raise
+    metadata = load_metadata(version_dir)
+    return IndexVersion(version or LEGACY_VERSION,
+                        index,
+                        metadata,
+                        projection,
+                        load_entities(version_dir, metadata),
+                        spec,
+                        manifest,
+                        load_graph(version_dir, metadata))
+
+
+_stores = {}    # index root -> (LazyResource[IndexVersion], EmbeddingModel)
+
+
+def store_for(root: str, spec: EmbeddingModel = EMBED_MODEL) -> LazyResource:
+    if root not in _stores:
+        _stores[root] = (LazyResource(f"faiss index [{os.path.basename(root)}]",
+                                      lambda: load_version(root, spec)), spec)
+    return _stores[root][0]
+
+
+model = LazyResource(f"sbert [{EMBED_MODEL.key}]", lambda: load_sentence_transformer(MODEL_NAME))
+store = store_for(INDEX_DIR)
+
+multi_model = LazyResource("multilingual sbert", lambda: load_sentence_transformer(MULTI_MODEL_NAME))
+
+
+def lang_store(lang: str) -> LazyResource:
+    """
+    Index for a non-English query language: the pre-translated
+    per-language index if it was built, else the shared multilingual index.
+    """
+    index_dir = LANG_INDEX_DIR.format(lang=lang)
+    if not has_index(index_dir):
+        index_dir = MULTI_INDEX_DIR
+    return store_for(index_dir, MULTI_EMBED_MODEL)
+
+
+def watch_indexes(interval: float = WATCH_INTERVAL) -> list[IndexWatcher]:
+    """Hot-swap every versioned index this process has loaded."""
+    if interval <= 0:
+        return []
+    watchers = [IndexWatcher(root, resource, lambda r, spec=spec: load_version(r, spec),
+                             interval).start()
+                for root, (resource, spec) in _stores.items()]
+    print(f"[WATCH] Checking {', '.join(os.path.join(r, CURRENT_NAME) for r in _stores)} "
+          f"every {interval:g}s")
+    return watchers
 
 
 # ----- helpers -----
-def embed_query(text: str):
-    emb = model.encode([text], convert_to_numpy=True, normalize_embeddings=True)
+def embed_query(text: str, encoder: LazyResource = model,
+                projection: Projection | None = None, spec: EmbeddingModel = EMBED_MODEL):
+    with EMBED_STAGE.slot(), span("embed_query"):
+        emb = encoder.get().encode([spec.query_prefix + text], convert_to_numpy=True,
+                                   normalize_embeddings=spec.normalize)
+        if projection is not None:
+            return projection.apply(emb)
     return emb.astype("float32")
 
 
-def search_faiss(query: str, k: int = 5):
-    qvec = embed_query(query)
-    scores, indices = index.search(qvec, k)
-
+def _lookup(scores, indices, store: MetadataStore):
     results = []
-    for score, idx in zip(scores[0], indices[0]):
-        meta = metadata[idx]
-        cid = meta["id"]
+    for score, idx in zip(scores, indices):
+        if idx < 0:
+            continue
         results.append({
             "score": float(score),
-            "id": cid,
-            "source": meta["source"],
-            "chunk_index": meta["chunk_index"],
-            "text": chunk_text_map[cid]
+            "id": store.id(idx),
+            "source": store.source(idx),
+            "chunk_index": store.chunk_index(idx),
+            "text": store.text(idx)
         })
     return results
 
 
-def call_openrouter(prompt: str):
+def entity_rows(query: str, current: IndexVersion) -> list[int] | None:
+    """Rows of the page the query names exactly, or None (use dense search)."""
+    if not ENTITY_LOOKUP or current.entities is None:
+        return None
+    with span("entity_lookup"):
+        rows = current.entities.lookup(query)
+    if rows:
+        count("entity_hits")
+    return rows
+
+
+def search_faiss(query: str, k: int = 5, lang: str = "en"):
+    """
+    Top-k chunks for a query. Non-English queries are embedded with the
+    multilingual model and searched without translating them first; the
+    returned text is always the English chunk (what the LLM prompt uses).
+    """
+    if lang == "en":
+        encoder, resource = model, store
+    else:
+        encoder, resource = multi_model, lang_store(lang)
+
+    current = resource.get()    # one version for the whole request
+    rows = entity_rows(query, current) if lang == "en" else None
+    if rows:
+        with span("chunk_lookup"):
+            return _lookup([1.0] * min(k, len(rows)), rows[:k], current.metadata)
+
+    current.check_encoder(encoder.get())
+    qvec = embed_query(query, encoder, current.projection, current.spec)
+    check_deadline("index_search")
+    with span("index_search"):
+        scores, indices = current.index.search(qvec, k)
+
+    with span("chunk_lookup"):
+        results = _lookup(scores[0], indices[0], current.metadata)
+    return results
+
+
+def search_faiss_batch(queries: list[str], k: int = 5, lang: str = "en",
+                       batch_size: int = 128):
+    """search_faiss for many queries: one batched encode + one index.search."""
+    if lang == "en":
+        encoder, resource = model, store
+    else:
+        encoder, resource = multi_model, lang_store(lang)
+
+    current = resource.get()
+    results = [None] * len(queries)
+    if lang == "en":
+        for i, query in enumerate(queries):
+            rows = entity_rows(query, current)
+            if rows:
+                results[i] = _lookup([1.0] * min(k, len(rows)), rows[:k], current.metadata)
+    dense = [i for i, r in enumerate(results) if r is None]
+    if not dense:
+        return results
+
+    current.check_encoder(encoder.get())
+    prefix = current.spec.query_prefix
+    with EMBED_STAGE.slot(), span("embed_batch"):
+        qvecs = encoder.get().encode([prefix + queries[i] for i in dense], batch_size=batch_size,
+                                     convert_to_numpy=True,
+                                     normalize_embeddings=current.spec.normalize).astype("float32")
+        if current.projection is not None:
+            qvecs = current.projection.apply(qvecs)
+    with span("index_search_batch"):
+        scores, indices = current.index.search(qvecs, k)
+
+    for i, s, idx in zip(dense, scores, indices):
+        results[i] = _lookup(s, idx, current.metadata)
+    return results
+
+
+def related_documents(results, n: int = 5, lang: str = "en") -> list[tuple[str, float]]:
+    """
+    [(source, score)] of documents related to the sources of `results`
+    (search_faiss results or assembled passages), best first, leaving out
+    those sources themselves. Empty if the index has no kNN graph.
+    """
+    current = (store if lang == "en" else lang_store(lang)).get()
+    if current.graph is None:
+        return []
+    with span("related_lookup"):
+        own = {r["source"] for r in results}
+        best = {}
+        for source in own:
+            for doc, score in current.graph.related(source, n + len(own)):
+                if doc not in own and score > best.get(doc, float("-inf")):
+                    best[doc] = score
+    return sorted(best.items(), key=lambda kv: -kv[1])[:n]
+
+
+def call_openrouter(prompt: str, timeout: float | None = None):
+    if not OPENROUTER_API_KEY:
+        raise ValueError("Set OPENROUTER_API_KEY!")
+
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
@@ -87,10 +409,12 @@ def call_openrouter(prompt: str):
         "messages": [{"role": "user", "content": prompt}]
     }
     resp = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
+        OPENROUTER_URL,
         json=payload,
-        headers=headers
+        headers=headers,
+        timeout=timeout
     )
+    resp.raise_for_status()     # 429 rate limit / 5xx: HTTPError, not KeyError('choices')
     return resp.json()["choices"][0]["message"]["content"]
 
 
@@ -112,8 +436,91 @@ If the answer is not in the context, say:
 """
 
 
+def generate_answer(prompt: str) -> tuple[str | None, str | None]:
+    """
+    (answer, None), or (None, reason) when generation is skipped or fails:
+    the LLM queue is full ("llm_overloaded"), the request deadline leaves
+    too little time ("deadline"), or OpenRouter answers 429 / 5xx or is
+    unreachable ("llm_error").
+    """
+    left = remaining()
+    if left is not None and left < LLM_MIN_SECONDS:
+        return None, "deadline"
+    try:
+        with LLM_STAGE.slot():
+            left = remaining()
+            if left is not None and left < LLM_MIN_SECONDS:     # waited too long for a slot
+                return None, "deadline"
+            with span("llm"):
+                timeout = LLM_TIMEOUT_SECONDS if left is None else min(left, LLM_TIMEOUT_SECONDS)
+                return call_openrouter(prompt, timeout=timeout), None
+    except Overloaded:
+        return None, "llm_overloaded"
+    except (DeadlineExceeded, requests.Timeout):
+        return None, "deadline"
+    except (requests.HTTPError, requests.ConnectionError):
+        return None, "llm_error"
+
+
+def passages_answer(passages) -> str:
+    """Degraded answer: the retrieved passages, without generation."""
+    return DEGRADED_NOTE + "\n\n" + "\n\n".join(f"[{p['source']}]\n{p['text']}" for p in passages)
+
+
+def answer_question(question: str, k: int = 5, lang: str = "en",
+                    context_tokens: int = CONTEXT_TOKEN_BUDGET,
+                    deadline_seconds: float = DEADLINE_SECONDS):
+    """
+    Full QA path: retrieve, assemble a budgeted context, call the LLM.
+    Returns (answer, passages, context_stats); context_stats["degraded"]
+    is None, or why the answer is passages only (see generate_answer).
+    Raises Overloaded / DeadlineExceeded if the passages cannot be
+    retrieved in time.
+    """
+    with deadline(deadline_seconds):
+        results = search_faiss(question, k=k, lang=lang)
+        with span("build_prompt"):
+            passages, stats = assemble_context(question, results, context_tokens)
+            prompt = build_prompt(question, passages)
+        count("context_tokens_saved", stats["tokens_saved"])
+        answer, stats["degraded"] = generate_answer(prompt)
+    if answer is None:
+        count(f"degraded_{stats['degraded']}")
+        answer = passages_answer(passages)
+    return answer, passages, stats
+
+
 # ----- CLI -----
 def main():
+    parser = argparse.ArgumentParser(description="Ask medical questions over the FAISS index")
+    parser.add_argument("--lang", choices=SUPPORTED_LANGS, default="en",
+                        help="language the questions are asked in")
+    parser.add_argument("--debug-timing", action="store_true",
+                        help="print a per-stage timing breakdown after each answer")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="expose Prometheus metrics on this port")
+    parser.add_argument("--context-tokens", type=int, default=CONTEXT_TOKEN_BUDGET,
+                        help="prompt context budget in tokens (0 = no budget)")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL,
+                        help="seconds between checks for a rebuilt index (0 = off)")
+    parser.add_argument("--deadline", type=float, default=DEADLINE_SECONDS,
+                        help="seconds per question before it is answered with passages "
+                             "only or dropped (0 = no limit)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_metrics_server(args.metrics_port)
+
+    if not OPENROUTER_API_KEY:
+        raise ValueError("Set OPENROUTER_API_KEY!")
+
+    # Load model + index in the background while the user types
+    if args.lang == "en":
+        warm(model, store)
+    else:
+        warm(multi_model, lang_store(args.lang))
+    watch_indexes(args.watch_interval)
+
     print("[ READY ] Ask medical questions. Type 'exit' to quit.\n")
 
     while True:
@@ -121,14 +528,28 @@ def main():
         if q in ("exit", "quit"):
             break
 
-        results = search_faiss(q, k=5)
-        prompt = build_prompt(q, results)
-        answer = call_openrouter(prompt)
+        with request_trace() as spans:
+            try:
+                answer, passages, ctx_stats = answer_question(q, k=5, lang=args.lang,
+                                                              context_tokens=args.context_tokens,
+                                                              deadline_seconds=args.deadline)
+            except (Overloaded, DeadlineExceeded) as e:
+                print(f"\n[BUSY] {e}, please ask again.\n")
+                continue
+            related = related_documents(passages, lang=args.lang)
 
         print("\nANSWER:\n")
         print(answer)
+        if related:
+            print("\nRELATED:\n" + "\n".join(f"  {source}  ({score:.2f})"
+                                              for source, score in related))
+        if args.debug_timing:
+            print("\nTIMING:\n" + format_trace(spans))
+            print(f"\nCONTEXT: {ctx_stats['tokens_after']} tokens "
+                  f"({ctx_stats['tokens_saved']} saved, "
+                  f"{ctx_stats['passages_before']} chunks → {ctx_stats['passages_after']} passages)")
         print("\n" + "="*60 + "\n")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
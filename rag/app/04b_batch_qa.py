@@ -0,0 +1,210 @@
+# 04b_batch_qa.py
+"""
+Batch QA for offline workloads (FAQ generation, regression checks).
+
+Input: JSONL ({"id": ..., "question": ...}) or CSV with id,question columns.
+If no id is given, the 0-based line number is used.
+
+Output: JSONL, one line per question, written as soon as it completes:
+    {"id", "question", "answer" | "error", "sources": [chunk ids],
+     "context_tokens", "tokens_saved", "seconds"}
+
+Pipeline:
+  - questions are embedded and searched in large vectorized windows
+    (one encode + one index.search per window)
+  - LLM calls run in a thread pool with --concurrency workers, an
+    optional --rps rate limit and a per-call --timeout; retrieval of the next window overlaps with
+    the LLM calls of the previous one
+  - results stream to --out in completion order
+
+Resume: ids that already have an answer in --out are skipped, so a
+crashed run continues where it stopped (failed ids are retried). With
+--no-llm, ids that already have passages are skipped; retrieval-only
+records ("answer": null) never count as answered for an LLM run.
+
+Run from project root (rag/):
+    (venv) python app/04b_batch_qa.py questions.jsonl --out answers.jsonl --concurrency 8
+    (venv) python app/04b_batch_qa.py questions.csv --out retrieved.jsonl --no-llm
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.context import assemble_context  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.scripts import load_script  # noqa: E402
+
+qa = load_script("app/04_qa_faiss.py")
+
+
+def read_questions(path: str) -> list[dict]:
+    rows = []
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                rows.append({"id": str(row.get("id") or i), "question": row["question"]})
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                rows.append({"id": str(rec.get("id", i)), "question": rec["question"]})
+    return rows
+
+
+def completed_ids(out_path: str, no_llm: bool = False) -> set:
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue    # torn last line from a crash
+            if rec.get("answer") is not None or (no_llm and "passages" in rec):
+                done.add(rec["id"])
+    return done
+
+
+class RateLimiter:
+    """Allow at most `rps` calls per second across threads (0 = unlimited)."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResultWriter:
+    """Thread-safe, line-flushed JSONL appender."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, rec: dict):
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def answer_one(item: dict, contexts: list[dict], args, limiter: RateLimiter) -> dict:
+    """Always returns a record; failures are recorded in its "error" field."""
+    t0 = time.perf_counter()
+    rec = {
+        "id": item["id"],
+        "question": item["question"],
+        "sources": [c["id"] for c in contexts],
+    }
+    try:
+        passages, stats = assemble_context(item["question"], contexts, args.context_tokens)
+        rec["context_tokens"] = stats["tokens_after"]
+        rec["tokens_saved"] = stats["tokens_saved"]
+        if args.no_llm:
+            rec["answer"] = None
+            rec["passages"] = passages
+        else:
+            limiter.wait()
+            rec["answer"] = qa.call_openrouter(qa.build_prompt(item["question"], passages),
+                                               timeout=args.timeout)
+    except Exception as e:
+        rec.pop("answer", None)
+        rec["error"] = f"{type(e).__name__}: {e}"
+    rec["seconds"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch QA over a JSONL/CSV file of questions")
+    parser.add_argument("input")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lang", choices=qa.SUPPORTED_LANGS, default="en")
+    parser.add_argument("--window", type=int, default=512,
+                        help="questions embedded + searched per vectorized batch")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel LLM calls")
+    parser.add_argument("--rps", type=float, default=0, help="LLM requests/sec limit (0 = none)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds per LLM call; a timed-out question is retried on resume")
+    parser.add_argument("--context-tokens", type=int, default=qa.CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--no-llm", action="store_true",
+                        help="only retrieve; write passages instead of answers")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if not args.no_llm and not qa.OPENROUTER_API_KEY:
+        raise ValueError("Set OPENROUTER_API_KEY!")
+
+    items = read_questions(args.input)
+    done = completed_ids(args.out, args.no_llm)
+    todo = [it for it in items if it["id"] not in done]
+    print(f"[BATCH] {len(items)} questions, {len(done)} already answered, {len(todo)} to go")
+    if not todo:
+        return
+
+    writer = ResultWriter(args.out)
+    limiter = RateLimiter(args.rps)
+    # Bounded in-flight work: retrieval never runs far ahead of the LLM
+    in_flight = threading.BoundedSemaphore(max(args.concurrency * 4, args.window))
+    progress = tqdm(total=len(todo), desc="[BATCH] Answered")
+    failures = 0
+    failures_lock = threading.Lock()
+
+    def on_done(fut):
+        # Runs on pool threads; the slot must come back even if writing fails
+        nonlocal failures
+        try:
+            rec = fut.result()
+            writer.write(rec)
+            with failures_lock:
+                failures += "error" in rec
+            progress.update(1)
+        finally:
+            in_flight.release()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="llm") as pool:
+        for start in range(0, len(todo), args.window):
+            window = todo[start:start + args.window]
+            contexts = qa.search_faiss_batch([it["question"] for it in window],
+                                             k=args.k, lang=args.lang)
+            for item, ctx in zip(window, contexts):
+                in_flight.acquire()
+                pool.submit(answer_one, item, ctx, args, limiter).add_done_callback(on_done)
+
+    progress.close()
+    writer.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[BATCH] {len(todo)} questions in {elapsed:.1f}s "
+          f"({len(todo) / elapsed:.2f}/s), {failures} failed → {args.out}")
+
+
+if __name__ == "__main__":
+    run_main(main)
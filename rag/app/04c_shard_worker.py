@@ -0,0 +1,61 @@
+# 04c_shard_worker.py
+"""
+Serve one shard of a sharded FAISS index (03_build_faiss_index.py --shards N)
+so QA can search shards on other cores or machines.
+
+Start one worker per shard, then point QA at them in manifest order:
+    (venv) python app/04c_shard_worker.py --shard 0 --port 7100
+    (venv) python app/04c_shard_worker.py --shard 1 --port 7101
+    (venv) RAG_SHARD_MODE=hostA:7100,hostB:7101 python app/04_qa_faiss.py
+
+A worker serves the index version that was current when it started;
+restart workers after publishing a new version.
+--host other than a loopback address requires RAG_SHARD_AUTHKEY, a
+secret set to the same value on the workers and QA: workers unpickle
+requests, so the key is what stands between the network and running
+code on the worker (see utils/shards.py). Without it workers only bind
+127.0.0.1 / localhost.
+For a single-machine test, RAG_SHARD_MODE=processes starts the workers
+itself.
+"""
+
+import os
+import sys
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.embedding_models import index_root, selected_model  # noqa: E402
+from utils.index_versions import current_dir  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.shards import check_bind_address, read_manifest, serve_shard  # noqa: E402
+
+# Namespace of the RAG_EMBED_MODEL index, as in 04_qa_faiss.py
+INDEX_DIR = index_root(os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss"), selected_model())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one FAISS shard over a socket")
+    parser.add_argument("--shard", type=int, required=True, help="shard number in shards.json")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="bind address; non-loopback requires RAG_SHARD_AUTHKEY")
+    parser.add_argument("--port", type=int, default=7100)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    try:
+        check_bind_address(args.host)
+    except ValueError as e:
+        raise SystemExit(f"[ERROR] {e}")
+
+    version_dir = current_dir(args.index_dir)
+    manifest = read_manifest(version_dir)
+    if manifest is None:
+        raise SystemExit(f"[ERROR] {version_dir} is not a sharded index (no shards.json)")
+    shard = manifest["shards"][args.shard]
+    serve_shard(os.path.join(version_dir, shard["path"]), (args.host, args.port))
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,186 @@
+# context.py
+"""
+Context assembly for the QA prompt: fewer input tokens, same answers.
+
+1. Merge chunks of the same `source` whose chunk_index values are adjacent,
+   removing the text they share (the chunker overlaps neighbours by up to
+   OVERLAP_CHARS characters).
+2. If the merged context is still over the token budget, keep the
+   sentences that share terms with the question (best first, with a bonus
+   for higher-ranked chunks), then the lines that follow them, until the
+   budget is used; emit them in their original order. Answer-bearing text
+   is picked before any filler, and unrelated boilerplate is dropped.
+   Budget left over (all of it when the question shares no terms with
+   the passages, e.g. a non-English or vague question) goes to the
+   leading sentences of the best-ranked passages, so the context is
+   never empty.
+
+Token counts are estimated as chars / 4, which is close enough for
+budgeting an English prompt without loading the LLM tokenizer.
+"""
+
+import re
+
+CHARS_PER_TOKEN = 4
+MAX_OVERLAP_CHARS = 400     # > chunker overlap (200) to allow for stripping
+OVERLAP_PROBE_CHARS = 40
+FOLLOW_SENTENCES = 8        # lines kept after a matching sentence
+
+SENTENCE_RE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my "
+    "of on or should that the this to was what when where which who why "
+    "will with you your".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def join_overlapping(a: str, b: str) -> str:
+    """a + b without the text that b repeats from the end of a."""
+    probe = b[:OVERLAP_PROBE_CHARS]
+    if probe:
+        pos = a.find(probe, max(0, len(a) - MAX_OVERLAP_CHARS))
+        while pos != -1:
+            tail = a[pos:]
+            if b.startswith(tail):
+                return a + b[len(tail):]
+            pos = a.find(probe, pos + 1)
+    return a + "\n" + b
+
+
+def merge_adjacent(contexts: list[dict]) -> list[dict]:
+    """
+    Group contexts by source, merge runs of consecutive chunk_index values.
+    Merged passages keep the best score and are ordered by it.
+    """
+    by_source: dict[str, list[dict]] = {}
+    for c in contexts:
+        by_source.setdefault(c["source"], []).append(c)
+
+    merged = []
+    for source, chunks in by_source.items():
+        chunks = sorted(chunks, key=lambda c: c["chunk_index"])
+        current = dict(chunks[0])
+        for c in chunks[1:]:
+            if c["chunk_index"] == current["chunk_index"] + 1:
+                current["text"] = join_overlapping(current["text"], c["text"])
+                current["chunk_index"] = c["chunk_index"]
+                current["score"] = max(current["score"], c["score"])
+            else:
+                merged.append(current)
+                current = dict(c)
+        merged.append(current)
+
+    merged.sort(key=lambda c: c["score"], reverse=True)
+    return merged
+
+
+def _terms(text: str) -> set:
+    return {w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS}
+
+
+def select_sentences(question: str, passages: list[dict], budget_tokens: int) -> list[dict]:
+    """Keep the most query-relevant sentences of all passages within the budget."""
+    query_terms = _terms(question)
+
+    candidates = []     # (score, overlap, passage_no, sentence_no, text)
+    sentences_per_passage = []
+    for p_no, passage in enumerate(passages):
+        sentences = [m.group(0).strip() for m in SENTENCE_RE.finditer(passage["text"])]
+        sentences = [s for s in sentences if s]
+        sentences_per_passage.append(sentences)
+        rank_bonus = 1.0 / (p_no + 1)
+        for s_no, sent in enumerate(sentences):
+            overlap = len(query_terms & _terms(sent))
+            candidates.append((overlap + rank_bonus, overlap, p_no, s_no, sent))
+
+    candidates.sort(key=lambda c: (-c[0], c[2], c[3]))
+
+    chosen = set()
+    used = 0
+
+    # Pass 1: sentences sharing terms with the question, best first
+    picked = []
+    for _, overlap, p_no, s_no, sent in candidates:
+        if not overlap:
+            break   # sorted: everything after shares no query terms
+        cost = estimate_tokens(sent) + 1
+        if used + cost > budget_tokens:
+            continue
+        chosen.add((p_no, s_no))
+        picked.append((p_no, s_no))
+        used += cost
+
+    # Pass 2: the lines right after each pick (answers often follow a
+    # matching heading or "... include:" line), in pick order
+    for p_no, s_no in picked:
+        sentences = sentences_per_passage[p_no]
+        for nxt in range(s_no + 1, min(s_no + 1 + FOLLOW_SENTENCES, len(sentences))):
+            if (p_no, nxt) in chosen:
+                break
+            cost = estimate_tokens(sentences[nxt]) + 1
+            if used + cost > budget_tokens:
+                break
+            chosen.add((p_no, nxt))
+            used += cost
+
+    # Pass 3: fill what is left with the leading sentences of the passages,
+    # best-ranked first (retrieval rank is all we have without overlap)
+    for p_no, sentences in enumerate(sentences_per_passage):
+        for s_no, sent in enumerate(sentences):
+            if (p_no, s_no) in chosen:
+                continue
+            cost = estimate_tokens(sent) + 1
+            if used + cost > budget_tokens:
+                break
+            chosen.add((p_no, s_no))
+            used += cost
+
+    if not chosen:
+        # Not even one sentence fits: cut the top passage's first one
+        for p_no, sentences in enumerate(sentences_per_passage):
+            if sentences:
+                text = sentences[0][:max(budget_tokens, 1) * CHARS_PER_TOKEN]
+                return [dict(passages[p_no], text=text)]
+        return []
+
+    out = []
+    for p_no, passage in enumerate(passages):
+        parts = []
+        last = None
+        for s_no, sent in enumerate(sentences_per_passage[p_no]):
+            if (p_no, s_no) not in chosen:
+                continue
+            if last is not None and s_no != last + 1:
+                parts.append("...")
+            parts.append(sent)
+            last = s_no
+        if parts:
+            out.append(dict(passage, text="\n".join(parts)))
+    return out
+
+
+def assemble_context(question: str, contexts: list[dict], budget_tokens: int = 0):
+    """
+    Returns (passages, stats). budget_tokens <= 0 only merges overlaps.
+    stats: tokens_before, tokens_after, tokens_saved, passages_before/after.
+    """
+    before = sum(estimate_tokens(c["text"]) for c in contexts)
+
+    passages = merge_adjacent(contexts) if contexts else []
+    merged_tokens = sum(estimate_tokens(p["text"]) for p in passages)
+    if budget_tokens > 0 and merged_tokens > budget_tokens:
+        passages = select_sentences(question, passages, budget_tokens)
+
+    after = sum(estimate_tokens(p["text"]) for p in passages)
+    return passages, {
+        "tokens_before": before,
+        "tokens_after": after,
+        "tokens_saved": before - after,
+        "passages_before": len(contexts),
+        "passages_after": len(passages),
+    }
@@ -0,0 +1,2 @@
+# Reproducible performance benchmarks for the RAG pipeline.
+# Entry point: python benchmarks/run.py --help (from rag/)
@@ -0,0 +1,118 @@
+# bench_cleaning.py
+"""
+Throughput benchmark for the cleaning engine over the real corpus.
+
+Loads every rag/data_text/**/*.txt into memory first (so disk I/O is not
+measured), then cleans each document with its per-source rule set and
+reports docs/s and MB/s per source and overall.
+
+With --check, the output is also compared against rag/data_text_clean/
+and mismatching files are counted.
+
+Run from project root (rag/):
+    (venv) python benchmarks/bench_cleaning.py
+    (venv) python benchmarks/bench_cleaning.py --repeat 5 --check
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from cleaning.engine import get_engine, rules_for_path  # noqa: E402
+
+INPUT_TEXT_DIR = os.path.join(BASE_DIR, "data_text")
+CLEAN_TEXT_DIR = os.path.join(BASE_DIR, "data_text_clean")
+
+
+def load_corpus(input_dir: str) -> list[tuple[Path, str]]:
+    docs = []
+    for root, _, files in os.walk(input_dir):
+        for fname in files:
+            if not fname.lower().endswith(".txt"):
+                continue
+            path = Path(root) / fname
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                docs.append((path.relative_to(input_dir), f.read()))
+    return docs
+
+
+def run(docs, repeat: int):
+    per_source = defaultdict(lambda: {"docs": 0, "chars": 0, "seconds": 0.0})
+    outputs = {}
+
+    for rel, text in docs:
+        rules = rules_for_path(rel)
+        engine = get_engine(rules)
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            cleaned = engine.clean(text)
+        elapsed = (time.perf_counter() - t0) / repeat
+
+        stats = per_source[rules]
+        stats["docs"] += 1
+        stats["chars"] += len(text)
+        stats["seconds"] += elapsed
+        outputs[rel] = cleaned
+
+    return per_source, outputs
+
+
+def print_report(per_source):
+    print(f"{'rules':<14}{'docs':>8}{'MB':>10}{'sec':>10}{'docs/s':>12}{'MB/s':>10}")
+    total = {"docs": 0, "chars": 0, "seconds": 0.0}
+    for name, stats in sorted(per_source.items()):
+        for key in total:
+            total[key] += stats[key]
+        _print_row(name, stats)
+    _print_row("TOTAL", total)
+
+
+def _print_row(name, stats):
+    mb = stats["chars"] / 1e6
+    sec = stats["seconds"] or 1e-9
+    print(
+        f"{name:<14}{stats['docs']:>8}{mb:>10.2f}{sec:>10.3f}"
+        f"{stats['docs'] / sec:>12.0f}{mb / sec:>10.2f}"
+    )
+
+
+def check_outputs(outputs) -> int:
+    mismatches = 0
+    for rel, cleaned in outputs.items():
+        ref_path = Path(CLEAN_TEXT_DIR) / rel
+        if not ref_path.exists():
+            continue
+        with open(ref_path, "r", encoding="utf-8", errors="ignore") as f:
+            if f.read() != cleaned:
+                mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text throughput")
+    parser.add_argument("--input", default=INPUT_TEXT_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true",
+                        help="compare output against data_text_clean/")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.input)
+    print(f"[BENCH] Loaded {len(docs)} documents from {args.input}")
+
+    per_source, outputs = run(docs, args.repeat)
+    print_report(per_source)
+
+    if args.check:
+        mismatches = check_outputs(outputs)
+        print(f"[BENCH] Mismatches vs {CLEAN_TEXT_DIR}: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# common.py
+"""
+Shared helpers for the benchmark scenarios: corpus loading, timing,
+percentiles, and the JSON result format used by run.py --compare.
+
+Result file layout:
+    {
+        "meta": {"timestamp": ..., "python": ..., "platform": ..., "scale": ...},
+        "results": [
+            {"scenario": "clean_text", "params": {...},
+             "metric": "mb_per_s", "higher_is_better": true,
+             "value": 61.2, "extra": {...}},
+            ...
+        ]
+    }
+"""
+
+import json
+import math
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAG_DIR not in sys.path:
+    sys.path.insert(0, RAG_DIR)
+
+TEXT_DIR = os.path.join(RAG_DIR, "data_text")
+CLEAN_TEXT_DIR = os.path.join(RAG_DIR, "data_text_clean")
+CHUNKS_DIR = os.path.join(RAG_DIR, "data_chunks")
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.txt")
+
+
+def load_texts(input_dir: str) -> list[tuple[Path, str]]:
+    """[(relative path, text)] for every .txt under input_dir, sorted."""
+    docs = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if not fname.lower().endswith(".txt"):
+                continue
+            path = Path(root) / fname
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                docs.append((path.relative_to(input_dir), f.read()))
+    return docs
+
+
+def load_chunk_texts(chunks_dir: str = CHUNKS_DIR) -> list[str]:
+    texts = []
+    for root, dirs, files in os.walk(chunks_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        texts.append(json.loads(line)["text"])
+    return texts
+
+
+def load_questions(path: str = QUESTIONS_PATH) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def scale_up(items: list, scale: int) -> list:
+    """Synthetic scale-up: the corpus repeated `scale` times (references, not copies)."""
+    return items * scale
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[k]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def result(scenario: str, params: dict, metric: str, value: float,
+           higher_is_better: bool = True, **extra) -> dict:
+    return {
+        "scenario": scenario,
+        "params": params,
+        "metric": metric,
+        "higher_is_better": higher_is_better,
+        "value": value,
+        "extra": extra,
+    }
+
+
+def skipped(scenario: str, params: dict, reason: str) -> dict:
+    return {"scenario": scenario, "params": params, "skipped": reason}
+
+
+def result_key(res: dict) -> str:
+    return res["scenario"] + json.dumps(res["params"], sort_keys=True)
+
+
+def write_results(path: str, results: list[dict], **meta):
+    out = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **meta,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+
+
+def compare_results(baseline_path: str, current_path: str, tolerance: float) -> list[str]:
+    """
+    Lines describing every metric that got worse by more than `tolerance`
+    (a fraction, e.g. 0.10 = 10%) between two result files.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"] if "value" in r}
+    with open(current_path, "r", encoding="utf-8") as f:
+        current = [r for r in json.load(f)["results"] if "value" in r]
+
+    lines = []
+    for cur in current:
+        base = baseline.get(result_key(cur))
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = -change if cur["higher_is_better"] else change
+        status = "REGRESSION" if worse > tolerance else "ok"
+        lines.append(
+            f"{status:<11}{cur['scenario']:<20}{json.dumps(cur['params'], sort_keys=True):<40}"
+            f"{cur['metric']:<12}{base['value']:>12.3f} → {cur['value']:>12.3f} ({change:+.1%})"
+        )
+    return lines
@@ -0,0 +1,351 @@
+# loadtest.py
+"""
+Open-loop load test of the QA path against mock LLM / translation servers.
+
+One request does what the Node backend does for a chat message
+(backend/src/routes/chat.ts) plus the RAG answer path of app/04_qa_faiss.py:
+
+    translate_in      query → English, non-English requests only (HTTP)
+    retrieval         search_faiss: entity_lookup / embed_query /
+                      index_search / chunk_lookup (in process, real index)
+    build_prompt      assemble_context + build_prompt
+    llm               generate_answer / call_openrouter (HTTP)
+    translate_out     answer → query language (HTTP)
+
+Admission control is the QA module's (utils/admission.py): each request
+runs under a --deadline, embedding and LLM calls wait in bounded queues
+(embed_queue / llm_queue stages) under --embed-concurrency /
+--llm-concurrency. Requests refused by a full queue or out of time count
+as errors (Overloaded / DeadlineExceeded); requests answered with
+passages only, or left untranslated, count as degraded. --deadline 0
+and --llm-concurrency 0 turn admission control off for a comparison run.
+
+Requests arrive on a schedule (Poisson by default) at each --rates step,
+whether or not earlier ones finished, and are served by --workers threads
+like a server's worker pool. Latency is measured from the scheduled
+arrival, so time spent waiting for a worker ("queue") counts; slow
+responses cannot hide load the way a closed loop does.
+
+The LLM and translation calls go to benchmarks/mock_servers.py stand-ins
+started in this process (--llm-latency, --translate-capacity, ...), or to
+real services with --llm-url / --translate-url. Retrieval uses the built
+index and SBERT model.
+
+For every rate: throughput, error rate, p50 / p95 / p99 of the request
+and of every stage. The run saturates at the first rate where throughput
+falls below 95% of the arrival rate, p99 exceeds --slo or errors exceed
+1%; a stage saturates where its p95 reaches 2x its p95 at the lowest rate.
+Results are written in the benchmarks/run.py format, so two runs can be
+compared with run.py --compare.
+
+Run from project root (rag/):
+    (venv) python benchmarks/loadtest.py
+    (venv) python benchmarks/loadtest.py --rates 2 5 10 20 40 --duration 30 --workers 32
+    (venv) python benchmarks/loadtest.py --langs en hi --translate-capacity 1 \\
+        --translate-latency lognormal:0.2,0.4 --llm-latency lognormal:1.5,0.6
+    (venv) python benchmarks/loadtest.py --llm-capacity 4 --llm-concurrency 4 --llm-queue 8 \\
+        --deadline 8 --rates 2 4 8 16
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAG_DIR)
+
+from app.context import assemble_context  # noqa: E402
+from benchmarks.common import load_questions, percentile, result, write_results  # noqa: E402
+from benchmarks.mock_servers import LLM_PATH, LatencyModel, MockService, start_mock  # noqa: E402
+from utils.admission import DeadlineExceeded, Stage, check_deadline, deadline, remaining  # noqa: E402
+from utils.metrics import request_trace, span  # noqa: E402
+from utils.scripts import load_script  # noqa: E402
+
+DEFAULT_OUT = os.path.join(RAG_DIR, "benchmarks", "results", "loadtest.json")
+STAGES = ("queue", "translate_in", "entity_lookup", "embed_queue", "embed_query", "index_search",
+          "chunk_lookup", "build_prompt", "llm_queue", "llm", "translate_out")
+THROUGHPUT_FLOOR = 0.95     # achieved / offered below this = saturated
+ERROR_CEILING = 0.01
+STAGE_KNEE = 2.0            # stage p95 / its p95 at the lowest rate
+
+
+class Target:
+    """The QA path under test, wired to the LLM and translation endpoints."""
+
+    def __init__(self, qa, translate_url: str, k: int, context_tokens: int,
+                 deadline_seconds: float = 0.0):
+        self.qa = qa
+        self.translate_url = translate_url
+        self.k = k
+        self.context_tokens = context_tokens
+        self.deadline_seconds = deadline_seconds
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def translate(self, text: str, src: str, tgt: str, stage: str) -> str:
+        check_deadline(stage)
+        left = remaining()
+        resp = self._session().post(self.translate_url, timeout=60 if left is None else left,
+                                    json={"text": text, "source_lang": src, "target_lang": tgt})
+        resp.raise_for_status()
+        return resp.json()["translation"]
+
+    def ask(self, question: str, lang: str) -> tuple[str, str | None]:
+        """(answer, None), or (answer, why it was degraded)."""
+        with deadline(self.deadline_seconds):
+            if lang != "en":
+                with span("translate_in"):
+                    question = self.translate(question, lang, "en", "translate_in")
+            results = self.qa.search_faiss(question, k=self.k)
+            with span("build_prompt"):
+                passages, _ = assemble_context(question, results, self.context_tokens)
+                prompt = self.qa.build_prompt(question, passages)
+            answer, degraded = self.qa.generate_answer(prompt)
+            if answer is None:
+                answer = self.qa.passages_answer(passages)
+            if lang != "en":
+                try:
+                    with span("translate_out"):
+                        answer = self.translate(answer, "en", lang, "translate_out")
+                except (DeadlineExceeded, requests.Timeout):
+                    degraded = degraded or "untranslated"     # English beats nothing
+        return answer, degraded
+
+
+def arrival_times(rate: float, duration: float, process: str, rng: random.Random) -> list[float]:
+    """Offsets (s) of the requests arriving in [0, duration)."""
+    if process == "uniform":
+        return [i / rate for i in range(int(duration * rate))]
+    times, t = [], rng.expovariate(rate)
+    while t < duration:
+        times.append(t)
+        t += rng.expovariate(rate)
+    return times
+
+
+def run_step(target: Target, rate: float, duration: float, workers: int, questions: list[str],
+             langs: list[str], process: str, rng: random.Random) -> dict:
+    samples = []                # (latency, {stage: seconds}, error or None, done at, degraded)
+    lock = threading.Lock()
+
+    def one(scheduled: float, question: str, lang: str):
+        started = time.perf_counter()
+        error = degraded = None
+        with request_trace() as spans:
+            try:
+                _, degraded = target.ask(question, lang)
+            except Exception as e:
+                error = type(e).__name__
+        stages = {"queue": started - scheduled}
+        for stage, sec in spans:
+            stages[stage] = stages.get(stage, 0.0) + sec
+        done = time.perf_counter()
+        with lock:
+            samples.append((done - scheduled, stages, error, done, degraded))
+
+    offsets = arrival_times(rate, duration, process, rng)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qa") as pool:
+        for offset in offsets:
+            delay = t0 + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, t0 + offset, rng.choice(questions), rng.choice(langs))
+    elapsed = time.perf_counter() - t0
+
+    ok = [s for s in samples if s[2] is None]
+    errors: dict[str, int] = {}
+    degraded: dict[str, int] = {}
+    for _, _, err, _, why in samples:
+        if err:
+            errors[err] = errors.get(err, 0) + 1
+        if why:
+            degraded[why] = degraded.get(why, 0) + 1
+    # Completion rate between the first and last success: the steady-state
+    # rate when keeping up, the service capacity when a backlog drains
+    done = sorted(s[3] for s in ok)
+    throughput = (len(done) - 1) / (done[-1] - done[0]) if len(done) > 1 else len(done) / elapsed
+    latencies = [s[0] for s in ok]
+    stages = {}
+    for stage in STAGES:
+        values = [st[stage] for _, st, _, _, _ in ok if stage in st]
+        if values:
+            stages[stage] = {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+    return {
+        "rate": rate,
+        "offered": len(offsets) / duration,
+        "requests": len(samples),
+        "throughput": throughput,
+        "error_rate": (len(samples) - len(ok)) / max(len(samples), 1),
+        "errors": errors,
+        "degraded_rate": sum(degraded.values()) / max(len(samples), 1),
+        "degraded": degraded,
+        "elapsed": elapsed,
+        **{f"p{p}": percentile(latencies, p) for p in (50, 95, 99)},
+        "stages": stages,
+    }
+
+
+def saturation(steps: list[dict], slo: float) -> tuple[float | None, dict[str, float]]:
+    """(first saturated rate or None, {stage: first rate where its p95 doubled})."""
+    run_at = None
+    for step in steps:
+        if (step["throughput"] < THROUGHPUT_FLOOR * step["offered"] or step["p99"] > slo
+                or step["error_rate"] > ERROR_CEILING):
+            run_at = step["rate"]
+            break
+    knees = {}
+    base = steps[0]["stages"] if steps else {}
+    for stage, first in base.items():
+        floor = max(first["p95"], 1e-3)     # a 0.1 ms queue doubling is noise
+        for step in steps[1:]:
+            cur = step["stages"].get(stage)
+            if cur and cur["p95"] >= STAGE_KNEE * floor:
+                knees[stage] = step["rate"]
+                break
+    return run_at, knees
+
+
+def format_step(step: dict) -> str:
+    lines = [f"[LOAD] {step['rate']:g} req/s ({step['offered']:.2f} arrived): "
+             f"{step['throughput']:.2f} req/s done, "
+             f"{step['requests']} requests, errors {step['error_rate']:.1%} "
+             f"{json.dumps(step['errors']) if step['errors'] else ''}".rstrip()
+             + f", degraded {step['degraded_rate']:.1%} "
+               f"{json.dumps(step['degraded']) if step['degraded'] else ''}".rstrip(),
+             f"    {'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for stage, pct in step["stages"].items():
+        lines.append(f"    {stage:<16}{pct['p50'] * 1000:>10.1f}{pct['p95'] * 1000:>10.1f}"
+                     f"{pct['p99'] * 1000:>10.1f}")
+    lines.append(f"    {'request':<16}{step['p50'] * 1000:>10.1f}{step['p95'] * 1000:>10.1f}"
+                 f"{step['p99'] * 1000:>10.1f}")
+    return "\n".join(lines)
+
+
+def to_results(steps: list[dict], params: dict) -> list[dict]:
+    out = []
+    for step in steps:
+        p = {**params, "rate": step["rate"]}
+        extra = {"offered": step["offered"], "requests": step["requests"],
+                 "errors": step["errors"], "degraded": step["degraded"], "stages": step["stages"]}
+        out.append(result("loadtest", p, "throughput", step["throughput"], **extra))
+        for metric in ("p50", "p95", "p99", "error_rate", "degraded_rate"):
+            out.append(result("loadtest", p, metric, step[metric], higher_is_better=False))
+    return out
+
+
+def _pick(value: int | None, default: int) -> int:
+    return default if value is None else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the QA path")
+    parser.add_argument("--rates", nargs="+", type=float, default=[1, 2, 4, 8, 16],
+                        help="offered requests/sec, one step each")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per step")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--workers", type=int, default=32, help="QA worker threads")
+    parser.add_argument("--langs", nargs="+", default=["en"],
+                        help="query languages, picked uniformly per request")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--slo", type=float, default=5.0, help="p99 seconds")
+    parser.add_argument("--llm-url", help="real chat completions URL instead of the mock")
+    parser.add_argument("--llm-latency", default="lognormal:1.0,0.5")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-capacity", type=int, default=0, help="0 = unlimited")
+    parser.add_argument("--translate-url", help="real /translate URL instead of the mock")
+    parser.add_argument("--translate-latency", default="lognormal:0.15,0.3")
+    parser.add_argument("--translate-error-rate", type=float, default=0.0)
+    parser.add_argument("--translate-capacity", type=int, default=0, help="0 = unlimited")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="per-request deadline in seconds (default: RAG_DEADLINE_SECONDS, 0 = none)")
+    parser.add_argument("--embed-concurrency", type=int, default=None,
+                        help="concurrent query embeddings (default: RAG_EMBED_CONCURRENCY, 0 = unlimited)")
+    parser.add_argument("--embed-queue", type=int, default=None,
+                        help="embeddings waiting for a slot before shedding (default: RAG_EMBED_QUEUE)")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="concurrent LLM calls (default: RAG_LLM_CONCURRENCY, 0 = unlimited)")
+    parser.add_argument("--llm-queue", type=int, default=None,
+                        help="LLM calls waiting for a slot before degrading (default: RAG_LLM_QUEUE)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    args = parser.parse_args()
+
+    qa = load_script("app/04_qa_faiss.py")
+    if not set(args.langs) <= set(qa.SUPPORTED_LANGS):
+        parser.error(f"--langs must be among {qa.SUPPORTED_LANGS}")
+    deadline_seconds = qa.DEADLINE_SECONDS if args.deadline is None else args.deadline
+    qa.EMBED_STAGE = Stage("embed", _pick(args.embed_concurrency, qa.EMBED_STAGE.concurrency),
+                           _pick(args.embed_queue, qa.EMBED_STAGE.queue))
+    qa.LLM_STAGE = Stage("llm", _pick(args.llm_concurrency, qa.LLM_STAGE.concurrency),
+                         _pick(args.llm_queue, qa.LLM_STAGE.queue))
+    print(f"[LOAD] admission: deadline {deadline_seconds:g}s, {qa.EMBED_STAGE}, {qa.LLM_STAGE}")
+
+    services = []
+    if args.llm_url:
+        qa.OPENROUTER_URL = args.llm_url
+    else:
+        llm = MockService("llm", LatencyModel.parse(args.llm_latency, args.seed),
+                          args.llm_error_rate, args.llm_capacity, args.seed)
+        _, url = start_mock("llm", llm)
+        qa.OPENROUTER_URL = url + LLM_PATH
+        qa.OPENROUTER_API_KEY = qa.OPENROUTER_API_KEY or "mock"
+        services.append(llm)
+    translate_url = args.translate_url
+    if not translate_url:
+        translator = MockService("translate", LatencyModel.parse(args.translate_latency, args.seed),
+                                 args.translate_error_rate, args.translate_capacity, args.seed)
+        _, url = start_mock("translate", translator)
+        translate_url = url + "/translate"
+        services.append(translator)
+    for svc in services:
+        print(f"[LOAD] mock {svc.name}: {svc.latency}, errors {svc.error_rate:.1%}, "
+              f"capacity {svc.capacity or 'unlimited'}")
+
+    target = Target(qa, translate_url, args.k, qa.CONTEXT_TOKEN_BUDGET, deadline_seconds)
+    questions = load_questions()
+    print("[LOAD] Warming up model and index")
+    qa.search_faiss(questions[0], k=args.k)
+
+    rng = random.Random(args.seed)
+    steps = []
+    for rate in sorted(args.rates):
+        step = run_step(target, rate, args.duration, args.workers, questions,
+                        args.langs, args.arrivals, rng)
+        print(format_step(step))
+        steps.append(step)
+
+    run_at, knees = saturation(steps, args.slo)
+    if run_at is None:
+        print(f"[LOAD] Not saturated up to {steps[-1]['rate']:g} req/s (p99 SLO {args.slo:g}s)")
+    else:
+        print(f"[LOAD] Saturated at {run_at:g} req/s (p99 SLO {args.slo:g}s)")
+    for stage, rate in sorted(knees.items(), key=lambda kv: kv[1]):
+        print(f"[LOAD]   {stage}: p95 doubled at {rate:g} req/s")
+    for svc in services:
+        print(f"[LOAD] mock {svc.name}: {svc.stats()}")
+    admission = {stage.name: stage.stats() for stage in (qa.EMBED_STAGE, qa.LLM_STAGE)}
+    for name, stats in admission.items():
+        print(f"[LOAD] admission {name}: {stats}")
+
+    params = {"workers": args.workers, "langs": ",".join(args.langs), "arrivals": args.arrivals,
+              "deadline": deadline_seconds, "llm_concurrency": qa.LLM_STAGE.concurrency}
+    write_results(args.out, to_results(steps, params), duration=args.duration,
+                  saturated_at=run_at, stage_knees=knees,
+                  mocks={svc.name: svc.stats() for svc in services}, admission=admission)
+    print(f"[LOAD] Wrote {len(steps)} steps → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
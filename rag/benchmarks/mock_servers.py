@@ -0,0 +1,223 @@
+# mock_servers.py
+"""
+Local stand-ins for OpenRouter and the M2M100 translation API, for load
+tests (benchmarks/loadtest.py) and for pointing a dev deployment at
+something that costs nothing and answers with a known latency.
+
+    mock OpenRouter     POST /api/v1/chat/completions   (OpenAI chat format)
+    mock translation    POST /translate, /translate_batch, GET /health
+                        (same JSON as translation-api/main.py)
+
+Each server has
+    latency     distribution of the service time, see LatencyModel.parse:
+                    const:0.8             always 0.8 s
+                    uniform:0.2,1.5       between 0.2 and 1.5 s
+                    normal:0.8,0.2        mean, sd (clipped at 0)
+                    lognormal:0.8,0.5     median, sigma (long right tail)
+                    exp:0.8               exponential with mean 0.8 s
+    error rate  fraction of requests answered with HTTP 500 (LLM: 429)
+    capacity    requests served at once (0 = unlimited); excess requests
+                wait for a slot, like a rate-limited provider or a
+                single-GPU model server, so the stage saturates
+
+Run from project root (rag/), e.g. for the Node backend:
+    (venv) python benchmarks/mock_servers.py --llm-port 8901 --translate-port 8902 \\
+        --llm-latency lognormal:1.0,0.5 --translate-latency const:0.15 --translate-capacity 1
+    OPENROUTER_URL=http://127.0.0.1:8901/api/v1/chat/completions python app/04_qa_faiss.py
+    M2M_SERVER=http://127.0.0.1:8902/translate pnpm dev      # backend/
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LLM_PATH = "/api/v1/chat/completions"
+LATENCY_KINDS = ("const", "uniform", "normal", "lognormal", "exp")
+MOCK_ANSWER = ("Based on the provided context, this is a placeholder answer from the "
+               "mock LLM server. It has roughly the length of a short real answer so "
+               "that response parsing and translation see realistic payloads.")
+
+
+class LatencyModel:
+    def __init__(self, kind: str, params: tuple[float, ...], seed: int = 0):
+        if kind not in LATENCY_KINDS:
+            raise ValueError(f"unknown latency distribution {kind!r}, expected one of {LATENCY_KINDS}")
+        self.kind = kind
+        self.params = params
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "LatencyModel":
+        """"lognormal:0.8,0.5" -> LatencyModel; a bare number means const."""
+        kind, _, args = spec.partition(":")
+        if not args:
+            kind, args = "const", kind
+        return cls(kind, tuple(float(a) for a in args.split(",")), seed)
+
+    def sample(self) -> float:
+        p = self.params
+        with self._lock:
+            if self.kind == "const":
+                return p[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(p[0], p[1])
+            if self.kind == "normal":
+                return max(0.0, self._rng.gauss(p[0], p[1]))
+            if self.kind == "lognormal":
+                return self._rng.lognormvariate(math.log(p[0]), p[1])
+            return self._rng.expovariate(1.0 / p[0])
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(f'{x:g}' for x in self.params)}"
+
+
+class MockService:
+    """Latency, errors and capacity shared by all handler threads of one server."""
+
+    def __init__(self, name: str, latency: LatencyModel, error_rate: float = 0.0,
+                 capacity: int = 0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self._slots = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+        self._rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self.requests = self.errors = self.in_flight = self.peak_in_flight = 0
+
+    def serve(self) -> bool:
+        """Hold the caller for one service time. Returns False for an injected error."""
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+            self.errors += failed
+        if self._slots:
+            self._slots.acquire()
+        try:
+            with self._lock:
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            time.sleep(self.latency.sample())
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots:
+                self._slots.release()
+        return not failed
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "capacity": self.capacity,
+                "peak_in_flight": self.peak_in_flight, "latency": repr(self.latency)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: MockService = None     # set per server class in start_mock()
+    routes: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"backend": f"mock-{self.service.name}", "loaded": True,
+                              **self.service.stats()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        route = self.routes.get(self.path)
+        if route is None:
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.service.serve():
+            status = 429 if self.service.name == "llm" else 500
+            self._reply(status, {"error": {"message": f"mock {self.service.name} error"}})
+            return
+        self._reply(200, route(payload))
+
+
+def _chat_completion(payload: dict) -> dict:
+    return {
+        "id": "mock-completion",
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": MOCK_ANSWER}}],
+    }
+
+
+def _translate(payload: dict) -> dict:
+    return {"translation": f"[{payload['target_lang']}] {payload['text']}"}
+
+
+def _translate_batch(payload: dict) -> dict:
+    return {"translations": [f"[{payload['target_lang']}] {t}" for t in payload["texts"]]}
+
+
+ROUTES = {
+    "llm": {LLM_PATH: _chat_completion},
+    "translate": {"/translate": _translate, "/translate_batch": _translate_batch},
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024       # open-loop bursts must not be refused by listen()
+
+
+def start_mock(kind: str, service: MockService, host: str = "127.0.0.1",
+               port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Serve `kind` ("llm" or "translate") in a daemon thread. Returns (server, base url)."""
+    handler = type(f"{kind.title()}Handler", (_Handler,),
+                   {"service": service, "routes": ROUTES[kind]})
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name=f"mock-{kind}", daemon=True).start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter and translation servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--llm-port", type=int, default=8901)
+    parser.add_argument("--llm-latency", default="lognormal:1.0,0.5")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-capacity", type=int, default=0)
+    parser.add_argument("--translate-port", type=int, default=8902)
+    parser.add_argument("--translate-latency", default="lognormal:0.15,0.3")
+    parser.add_argument("--translate-error-rate", type=float, default=0.0)
+    parser.add_argument("--translate-capacity", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    llm = MockService("llm", LatencyModel.parse(args.llm_latency, args.seed),
+                      args.llm_error_rate, args.llm_capacity, args.seed)
+    translator = MockService("translate", LatencyModel.parse(args.translate_latency, args.seed),
+                             args.translate_error_rate, args.translate_capacity, args.seed)
+    _, llm_url = start_mock("llm", llm, args.host, args.llm_port)
+    _, tr_url = start_mock("translate", translator, args.host, args.translate_port)
+    print(f"[MOCK] LLM        {llm_url}{LLM_PATH}  ({llm.latency}, errors {args.llm_error_rate:.1%})")
+    print(f"[MOCK] Translate  {tr_url}/translate  ({translator.latency}, "
+          f"errors {args.translate_error_rate:.1%})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"[MOCK] llm {llm.stats()}  translate {translator.stats()}")
+
+
+if __name__ == "__main__":
+    main()
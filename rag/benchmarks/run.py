@@ -0,0 +1,68 @@
+# run.py
+"""
+Run the RAG benchmark suite and write results as JSON.
+
+Run from project root (rag/):
+    (venv) python benchmarks/run.py                          # all scenarios, 1x
+    (venv) python benchmarks/run.py --only clean chunk --scales 1 10 100
+    (venv) python benchmarks/run.py --out bench/after.json
+    (venv) python benchmarks/run.py --compare bench/before.json bench/after.json
+
+--compare exits with status 1 if any metric regressed by more than
+--tolerance (default 10%).
+"""
+
+import argparse
+import os
+import sys
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAG_DIR)
+
+from benchmarks.common import compare_results, write_results  # noqa: E402
+from benchmarks.scenarios import SCALABLE, SCENARIOS  # noqa: E402
+
+DEFAULT_OUT = os.path.join(RAG_DIR, "benchmarks", "results", "latest.json")
+
+
+def run(only: list[str], scales: list[int]) -> list[dict]:
+    results = []
+    for name in only:
+        fn = SCENARIOS[name]
+        runs = [{"scale": s} for s in scales] if name in SCALABLE else [{}]
+        for kwargs in runs:
+            print(f"[BENCH] {name} {kwargs or ''}")
+            for res in fn(**kwargs):
+                results.append(res)
+                if "skipped" in res:
+                    print(f"    skipped: {res['skipped']}")
+                else:
+                    print(f"    {res['params']} {res['metric']} = {res['value']:.3f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG pipeline benchmarks")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1],
+                        help="synthetic corpus scale-ups, e.g. 1 10 100")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.compare:
+        lines = compare_results(*args.compare, tolerance=args.tolerance)
+        for line in lines:
+            print(line)
+        regressions = sum(line.startswith("REGRESSION") for line in lines)
+        print(f"[BENCH] {regressions} regression(s) over {args.tolerance:.0%} tolerance")
+        sys.exit(1 if regressions else 0)
+
+    results = run(args.only, args.scales)
+    write_results(args.out, results, scales=args.scales)
+    print(f"[BENCH] Wrote {len(results)} results → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
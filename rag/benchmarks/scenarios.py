@@ -0,0 +1,160 @@
+# scenarios.py
+"""
+Benchmark scenarios. Each one returns a list of result dicts (see common.py).
+
+Scenarios needing optional heavy dependencies (sentence-transformers,
+faiss) or a built index report themselves as skipped instead of failing,
+so the text-processing numbers can always be collected.
+"""
+
+import numpy as np
+
+from benchmarks.common import (
+    CLEAN_TEXT_DIR, TEXT_DIR, Timer, load_chunk_texts, load_questions,
+    load_texts, percentile, result, scale_up, skipped,
+)
+from utils.index_versions import has_index
+from utils.scripts import load_script
+
+EMBED_DIM = 384     # all-MiniLM-L6-v2
+ADD_BLOCK = 100_000  # vectors generated and added per step in bench_index_search
+
+
+def bench_clean_text(scale: int = 1) -> list[dict]:
+    from cleaning.engine import get_engine, rules_for_path
+
+    docs = scale_up(load_texts(TEXT_DIR), scale)
+    engines = [get_engine(rules_for_path(rel)) for rel, _ in docs]
+    chars = sum(len(text) for _, text in docs)
+
+    with Timer() as t:
+        for engine, (_, text) in zip(engines, docs):
+            engine.clean(text)
+
+    params = {"scale": scale}
+    return [result("clean_text", params, "mb_per_s", chars / 1e6 / t.seconds,
+                   docs=len(docs), seconds=t.seconds)]
+
+
+def bench_chunking(scale: int = 1) -> list[dict]:
+    chunker = load_script("chunking/02_chunk_texts.py")
+
+    docs = scale_up(load_texts(CLEAN_TEXT_DIR), scale)
+    chars = sum(len(text) for _, text in docs)
+    n_chunks = 0
+
+    with Timer() as t:
+        for _, text in docs:
+            n_chunks += len(chunker.smart_char_chunks(text))
+
+    params = {"scale": scale}
+    return [result("smart_char_chunks", params, "mb_per_s", chars / 1e6 / t.seconds,
+                   docs=len(docs), chunks=n_chunks, seconds=t.seconds)]
+
+
+def bench_embed(samples: int = 512, batch_sizes=(16, 32, 64)) -> list[dict]:
+    params = {"samples": samples}
+    try:
+        from utils.resources import load_sentence_transformer
+        qa = load_script("app/04_qa_faiss.py")
+        model = load_sentence_transformer(qa.MODEL_NAME)
+    except ImportError as e:
+        return [skipped("embed", params, f"sentence-transformers unavailable: {e}")]
+
+    texts = load_chunk_texts()[:samples]
+    model.encode(texts[:8])     # warm-up
+
+    results = []
+    for batch_size in batch_sizes:
+        with Timer() as t:
+            model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                         normalize_embeddings=True)
+        results.append(result("embed", {"samples": len(texts), "batch_size": batch_size},
+                              "texts_per_s", len(texts) / t.seconds, seconds=t.seconds))
+    return results
+
+
+def bench_index_search(scale: int = 1, ks=(1, 5, 10, 50), queries: int = 200,
+                       seed: int = 0) -> list[dict]:
+    """
+    IndexFlatIP over corpus-sized random unit vectors (x scale): search
+    cost depends on N and dim, not on the vector contents.
+    """
+    params = {"scale": scale}
+    try:
+        import faiss
+    except ImportError as e:
+        return [skipped("index_search", params, f"faiss unavailable: {e}")]
+
+    n_vectors = len(load_chunk_texts()) * scale
+    rng = np.random.default_rng(seed)
+    qvecs = rng.standard_normal((queries, EMBED_DIM), dtype=np.float32)
+    faiss.normalize_L2(qvecs)
+
+    # Generated in float32 blocks: at scale 100 the vectors alone are ~7 GB,
+    # a float64 draw of all of them would need twice that again
+    index = faiss.IndexFlatIP(EMBED_DIM)
+    for start in range(0, n_vectors, ADD_BLOCK):
+        block = rng.standard_normal((min(ADD_BLOCK, n_vectors - start), EMBED_DIM),
+                                    dtype=np.float32)
+        faiss.normalize_L2(block)
+        index.add(block)
+
+    results = []
+    for k in ks:
+        latencies = []
+        for i in range(queries):
+            with Timer() as t:
+                index.search(qvecs[i:i + 1], k)
+            latencies.append(t.seconds * 1000)
+        results.append(result(
+            "index_search", {"scale": scale, "k": k, "n": n_vectors},
+            "p95_ms", percentile(latencies, 95), higher_is_better=False,
+            p50_ms=percentile(latencies, 50), p99_ms=percentile(latencies, 99),
+        ))
+    return results
+
+
+def bench_qa_path(k: int = 5) -> list[dict]:
+    """
+    search_faiss + build_prompt on the real index, with the LLM stubbed out
+    (the OpenRouter call is not part of what we can optimize locally).
+    """
+    params = {"k": k}
+    qa = load_script("app/04_qa_faiss.py")
+    if not has_index(qa.INDEX_DIR):
+        return [skipped("qa_path", params, f"no index at {qa.INDEX_DIR}")]
+    try:
+        qa.model.get()
+    except ImportError as e:
+        return [skipped("qa_path", params, f"sentence-transformers unavailable: {e}")]
+
+    def stub_llm(prompt: str) -> str:
+        return "stubbed answer"
+
+    questions = load_questions()
+    qa.search_faiss(questions[0], k=k)     # warm-up: loads index, metadata, texts
+
+    latencies = []
+    prompt_chars = 0
+    for q in questions:
+        with Timer() as t:
+            prompt = qa.build_prompt(q, qa.search_faiss(q, k=k))
+            stub_llm(prompt)
+        latencies.append(t.seconds * 1000)
+        prompt_chars += len(prompt)
+
+    return [result("qa_path", params, "p95_ms", percentile(latencies, 95),
+                   higher_is_better=False, p50_ms=percentile(latencies, 50),
+                   questions=len(questions), avg_prompt_chars=prompt_chars / len(questions))]
+
+
+SCENARIOS = {
+    "clean": bench_clean_text,
+    "chunk": bench_chunking,
+    "embed": bench_embed,
+    "search": bench_index_search,
+    "qa": bench_qa_path,
+}
+# Scenarios that take a synthetic corpus scale factor
+SCALABLE = {"clean", "chunk", "search"}
@@ -9,6 +9,10 @@ Input:
 Output:
     rag/data_chunks/**/*.jsonl
     (one .jsonl file per .txt, same relative path)
+    rag/data_chunks/entities.json
+    (page title / brand / alternative name -> chunks of MedlinePlus
+    drug and encyclopedia pages, for exact-name lookups in QA;
+    see utils/entities.py)
 
 Each JSONL line has:
     {
@@ -20,16 +24,31 @@ Each JSONL line has:
 
 Run from project root (rag/):
     (venv) python chunking/02_chunk_texts.py
+    (venv) python chunking/02_chunk_texts.py --mode tokens
+    (venv) python chunking/02_chunk_texts.py --report-truncation
+
+--mode chars   (default) 1200-char sliding window, see smart_char_chunks
+--mode tokens  pack whole sentences up to the embedding model's real token
+               budget using tokenizer offsets, see token_chunks
 """
 
 import os
+import re
 import json
+import sys
+import argparse
+from functools import lru_cache
 from pathlib import Path
 
 from tqdm import tqdm
 
 # This file is in rag/chunking/, so go up one level to rag/
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.entities import ENTITY_FILE, EntityIndex, extract_entity  # noqa: E402
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
 
 INPUT_TEXT_DIR = os.path.join(BASE_DIR, "data_text_clean")
 OUTPUT_CHUNK_DIR = os.path.join(BASE_DIR, "data_chunks")
@@ -38,6 +57,17 @@ OUTPUT_CHUNK_DIR = os.path.join(BASE_DIR, "data_chunks")
 CHUNK_SIZE_CHARS = 1200   # target size of each chunk
 OVERLAP_CHARS = 200       # how much overlap between consecutive chunks
 
+# Token chunking config: must match the model used in 03_build_faiss_index.py.
+# all-MiniLM-L6-v2 truncates at 256 word-pieces including [CLS] and [SEP].
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_TOKENS = 256
+SPECIAL_TOKENS = 2
+CHUNK_SIZE_TOKENS = MAX_SEQ_TOKENS - SPECIAL_TOKENS
+OVERLAP_TOKENS = 32
+
+# Sentence / paragraph boundaries (the whitespace after them is the gap)
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.?!])\s+|\n{2,}")
+
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -64,26 +94,25 @@ def smart_char_chunks(
     start = 0
 
     while start < n:
-        # Basic window
+        # Basic window (searched in place, no slice copies)
         window_end = min(start + chunk_size, n)
-        window = text[start:window_end]
 
         # Try to find a nice split point inside the window
         split_pos = None
-        min_reasonable = int(chunk_size * 0.5)  # don't cut too early
+        min_start = start + int(chunk_size * 0.5)  # don't cut too early
 
         # Look for paragraph break first
         candidates = []
 
-        para_idx = window.rfind("\n\n")
-        if para_idx != -1 and para_idx >= min_reasonable:
-            candidates.append(start + para_idx + 2)  # include the \n\n
+        para_idx = text.rfind("\n\n", min_start, window_end)
+        if para_idx != -1:
+            candidates.append(para_idx + 2)  # include the \n\n
 
         # Then look for sentence boundaries
         for sep in [". ", "? ", "! "]:
-            idx = window.rfind(sep)
-            if idx != -1 and idx >= min_reasonable:
-                candidates.append(start + idx + len(sep))
+            idx = text.rfind(sep, min_start, window_end)
+            if idx != -1:
+                candidates.append(idx + len(sep))
 
         if candidates:
             split_pos = max(candidates)  # choose the farthest good split
@@ -105,10 +134,151 @@ def smart_char_chunks(
     return chunks
 
 
-def process_file(in_path: Path, rel: Path):
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    # Imported lazily so the default char mode does not need transformers
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    """
+    (start, end) character spans of sentences / paragraphs, in one regex pass.
+    """
+    spans = []
+    start = 0
+    for m in SENTENCE_BREAK_RE.finditer(text):
+        if m.start() > start:
+            spans.append((start, m.start()))
+        start = m.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def token_chunks(
+    text: str,
+    tokenizer=None,
+    max_tokens: int = CHUNK_SIZE_TOKENS,
+    overlap_tokens: int = OVERLAP_TOKENS,
+) -> list[str]:
+    """
+    Token-budget chunking:
+      - Tokenize the whole document ONCE and keep the character offsets.
+      - Map every sentence to its token range by walking both lists together.
+      - Greedily pack whole sentences while the chunk fits in max_tokens;
+        a single sentence longer than the budget is cut at token boundaries.
+      - Start the next chunk with the trailing sentences of the previous one
+        that fit in overlap_tokens.
+
+    Every chunk fits the model window, so nothing is silently truncated.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    tokenizer = tokenizer or get_tokenizer()
+    enc = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    )
+    offsets = enc["offset_mapping"]
+    if not offsets:
+        return [text]
+    tok_starts = [s for s, _ in offsets]
+    n_tok = len(offsets)
+
+    # units: (char_start, char_end, tok_start, tok_end), tok_end exclusive
+    units = []
+    t = 0
+    for c_start, c_end in sentence_spans(text):
+        t0 = t
+        while t < n_tok and tok_starts[t] < c_end:
+            t += 1
+        if t == t0:
+            continue
+
+        # Oversized sentence: cut into max_tokens pieces
+        while t - t0 > max_tokens:
+            cut = t0 + max_tokens
+            units.append((max(c_start, tok_starts[t0]), tok_starts[cut], t0, cut))
+            t0 = cut
+        units.append((max(c_start, tok_starts[t0]), c_end, t0, t))
+
+    chunks: list[str] = []
+    i = 0
+    n = len(units)
+    while i < n:
+        j = i
+        while j + 1 < n and units[j + 1][3] - units[i][2] <= max_tokens:
+            j += 1
+
+        chunk = text[units[i][0]:units[j][1]].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        if j == n - 1:
+            break
+
+        # Overlap: back up over trailing sentences that fit the overlap budget
+        k = j + 1
+        while k - 1 > i and units[j][3] - units[k - 1][2] <= overlap_tokens:
+            k -= 1
+        i = k
+
+    return chunks
+
+
+def count_truncated(texts: list[str], tokenizer=None, batch_size: int = 256):
+    """
+    How many texts exceed the model window (tokens + [CLS]/[SEP]).
+    Returns (truncated, total, wasted_tokens).
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    truncated = 0
+    wasted = 0
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        ids = tokenizer(batch, add_special_tokens=True, verbose=False)["input_ids"]
+        for seq in ids:
+            if len(seq) > MAX_SEQ_TOKENS:
+                truncated += 1
+                wasted += len(seq) - MAX_SEQ_TOKENS
+    return truncated, len(texts), wasted
+
+
+def report_truncation(input_dir: str = INPUT_TEXT_DIR):
+    """
+    Re-chunk the corpus with the char chunker and report how many chunks
+    the embedding model truncates, next to the token chunker's numbers.
+    """
+    char_chunks: list[str] = []
+    n_token_chunks = 0
+    for root, _, files in os.walk(input_dir):
+        for fname in tqdm(files, desc=f"Scanning {root}"):
+            if not fname.lower().endswith(".txt"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read().strip()
+            char_chunks.extend(smart_char_chunks(text))
+            n_token_chunks += len(token_chunks(text))
+
+    truncated, total, wasted = count_truncated(char_chunks)
+    pct = 100.0 * truncated / max(total, 1)
+    print(f"[REPORT] char chunker:  {total} chunks, {truncated} truncated "
+          f"({pct:.1f}%), {wasted} tokens never embedded")
+    print(f"[REPORT] token chunker: {n_token_chunks} chunks, 0 truncated")
+
+
+def process_file(in_path: Path, rel: Path, mode: str = "chars",
+                 entities: list | None = None) -> int:
     """
     Read one cleaned .txt file, chunk it, and write JSONL file
     into data_chunks/ with same relative path (but .jsonl extension).
+    Returns the number of chunks written. If the page names an entity,
+    its names and chunk ids are appended to `entities`.
     """
     out_rel = rel.with_suffix(".jsonl")
     out_path = Path(OUTPUT_CHUNK_DIR) / out_rel
@@ -117,7 +287,10 @@ def process_file(in_path: Path, rel: Path):
     with open(in_path, "r", encoding="utf-8", errors="ignore") as f:
         text = f.read().strip()
 
-    chunks = smart_char_chunks(text)
+    if mode == "tokens":
+        chunks = token_chunks(text)
+    else:
+        chunks = smart_char_chunks(text)
 
     with open(out_path, "w", encoding="utf-8") as f:
         for idx, chunk in enumerate(chunks):
@@ -129,9 +302,34 @@ def process_file(in_path: Path, rel: Path):
             }
             f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
+    entity = extract_entity(text) if entities is not None and chunks else None
+    if entity:
+        entities.append({
+            "source": str(rel).replace(os.sep, "/"),
+            "title": entity[0],
+            "aliases": entity[1],
+            "id_prefix": str(out_rel.with_suffix("")).replace(os.sep, "/"),
+            "n_chunks": len(chunks),
+        })
+
+    return len(chunks)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Chunk cleaned texts for RAG")
+    parser.add_argument("--mode", choices=["chars", "tokens"], default="chars")
+    parser.add_argument("--report-truncation", action="store_true",
+                        help="only report how many char chunks the model truncates")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.report_truncation:
+        report_truncation()
+        return
+
     ensure_dir(OUTPUT_CHUNK_DIR)
+    total = 0
+    entities = []
 
     for root, _, files in os.walk(INPUT_TEXT_DIR):
         for fname in tqdm(files, desc=f"Chunking in {root}"):
@@ -141,8 +339,20 @@ def main():
             in_path = Path(root) / fname
             rel = in_path.relative_to(INPUT_TEXT_DIR)
 
-            process_file(in_path, rel)
+            with span("chunk_file"):
+                n = process_file(in_path, rel, mode=args.mode, entities=entities)
+            count("chunk_files")
+            count("chunks", n)
+            total += n
+
+    print(f"[INFO] Wrote {total} chunks ({args.mode} mode) → {OUTPUT_CHUNK_DIR}")
+
+    entity_index = EntityIndex.build(sorted(entities, key=lambda e: e["source"]))
+    entity_path = os.path.join(OUTPUT_CHUNK_DIR, ENTITY_FILE)
+    entity_index.save(entity_path)
+    print(f"[INFO] Wrote {len(entity_index.docs)} entities, "
+          f"{len(entity_index.names)} names → {entity_path}")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
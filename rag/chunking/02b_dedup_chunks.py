@@ -0,0 +1,214 @@
+# 02b_dedup_chunks.py
+"""
+Find near-duplicate chunks in data_chunks/ with MinHash + LSH banding,
+so each boilerplate-heavy chunk is embedded and indexed only once.
+
+Runs between chunking and 03_build_faiss_index.py:
+
+Input:
+    rag/data_chunks/**/*.jsonl
+
+Output:
+    rag/data_chunks/dedup_aliases.json
+    {
+        "threshold": 0.85,
+        "num_perm": 128,
+        "bands": 16,
+        "total_chunks": <int>,
+        "removed": <int>,
+        "aliases": {"<duplicate id>": "<canonical id>", ...}
+    }
+
+The chunk files themselves are left untouched; 03_build_faiss_index.py
+skips every id listed in "aliases" and copies the map next to the index.
+
+How it works (roughly linear in corpus size):
+  - each chunk -> set of word 3-gram shingles -> 32-bit hashes
+  - 128 universal hash functions, signature = min over shingles (NumPy)
+  - signature split into 16 bands x 8 rows; chunks sharing any band bucket
+    are candidates (P(candidate) ~ 50% at Jaccard 0.7, ~99% at 0.85)
+  - candidates are verified by signature agreement >= threshold
+  - the first chunk seen (sorted file order) stays canonical
+
+Run from project root (rag/):
+    (venv) python chunking/02b_dedup_chunks.py
+    (venv) python chunking/02b_dedup_chunks.py --threshold 0.9
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+# This file is in rag/chunking/, so go up one level to rag/
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+
+CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
+ALIASES_PATH = os.path.join(CHUNKS_DIR, "dedup_aliases.json")
+
+# MinHash / LSH config
+NUM_PERM = 128
+BANDS = 16                  # rows per band = NUM_PERM // BANDS = 8
+SHINGLE_WORDS = 3
+THRESHOLD = 0.85            # estimated Jaccard to call two chunks duplicates
+MAX_BUCKET_PROBES = 8       # compare a new chunk with at most N bucket members
+SEED = 1
+
+_PRIME = (1 << 32) - 5      # largest 32-bit prime, keeps a*x+b inside uint64
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD_RE = re.compile(r"\w+")
+
+
+def iter_chunk_records(chunks_dir: str):
+    # Sorted so the canonical copy is stable between runs
+    for root, dirs, files in os.walk(chunks_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def shingle_hashes(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    words = WORD_RE.findall(text.lower())
+    if len(words) < k:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (num_perm, n_shingles) -> min per permutation
+        phv = (np.outer(self.a, hashes) + self.b[:, None]) % np.uint64(_PRIME)
+        return (phv & _MAX_HASH).min(axis=1)
+
+
+def find_duplicates(
+    ids: list[str],
+    signatures: np.ndarray,
+    bands: int = BANDS,
+    threshold: float = THRESHOLD,
+    max_probes: int = MAX_BUCKET_PROBES,
+) -> dict[str, str]:
+    """
+    LSH banding over precomputed signatures.
+    Returns {duplicate_id: canonical_id}.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+
+    canonical = list(range(n))          # index -> canonical index
+    buckets = [defaultdict(list) for _ in range(bands)]
+
+    for i in tqdm(range(n), desc="[DEDUP] LSH"):
+        sig = signatures[i]
+        match = -1
+        keys = []
+        for band in range(bands):
+            key = sig[band * rows:(band + 1) * rows].tobytes()
+            keys.append(key)
+            if match != -1:
+                continue
+            for j in buckets[band].get(key, ())[:max_probes]:
+                agree = np.count_nonzero(signatures[j] == sig) / num_perm
+                if agree >= threshold:
+                    match = j
+                    break
+
+        if match != -1:
+            canonical[i] = canonical[match]
+            continue
+
+        # Only canonical chunks are registered, which keeps buckets small
+        for band, key in enumerate(keys):
+            buckets[band][key].append(i)
+
+    return {
+        ids[i]: ids[c]
+        for i, c in enumerate(canonical)
+        if c != i
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate chunk detection")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM)
+    parser.add_argument("--bands", type=int, default=BANDS)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        parser.error("--num-perm must be divisible by --bands")
+
+    hasher = MinHasher(num_perm=args.num_perm)
+
+    ids = []
+    signatures = []
+    for rec in tqdm(iter_chunk_records(CHUNKS_DIR), desc="[DEDUP] MinHash"):
+        ids.append(rec["id"])
+        with span("minhash"):
+            signatures.append(hasher.signature(shingle_hashes(rec["text"])))
+        count("minhash")
+
+    total = len(ids)
+    print(f"[DEDUP] Total chunks: {total}")
+    if not total:
+        return
+
+    with span("lsh"):
+        aliases = find_duplicates(
+            ids,
+            np.vstack(signatures),
+            bands=args.bands,
+            threshold=args.threshold,
+        )
+
+    out = {
+        "threshold": args.threshold,
+        "num_perm": args.num_perm,
+        "bands": args.bands,
+        "total_chunks": total,
+        "removed": len(aliases),
+        "aliases": aliases,
+    }
+    with open(ALIASES_PATH, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=1)
+
+    pct = 100.0 * len(aliases) / total
+    print(f"[DEDUP] Near-duplicates: {len(aliases)} ({pct:.1f}%) "
+          f"→ {total - len(aliases)} vectors to embed")
+    print(f"[DEDUP] Saved alias map → {ALIASES_PATH}")
+
+
+if __name__ == "__main__":
+    run_main(main)
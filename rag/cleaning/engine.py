@@ -0,0 +1,129 @@
+# engine.py
+"""
+Compiled, single-pass cleaning engine.
+
+Rules live in cleaning/rules/<name>.json and look like:
+
+    {
+        "extends": "default",          # optional, parent rule set
+        "replace": {"bad": "good"},    # literal substring replacements
+        "drop_exact": ["..."],         # drop lines equal to one of these
+        "drop_prefixes": ["..."]       # drop lines starting with one of these
+    }
+
+All replacements are folded into ONE alternation regex (applied with a single
+re.sub), the exact-drop lines into a frozenset, and the prefixes into ONE
+anchored regex. Line filtering and blank-line collapsing happen in the same
+loop, so every document is scanned a fixed number of times no matter how many
+rules a source has.
+
+Replacement semantics: at each position the first listed rule that matches
+wins, and replaced text is never re-scanned. This matches the old chain of
+str.replace calls for our rule sets (none of the outputs create new matches).
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+RULES_DIR = Path(__file__).resolve().parent / "rules"
+
+# Top-level folder under data_text/ -> rule set name
+SOURCE_RULES = {
+    "who": "who",
+    "cdc": "cdc",
+    "medlineplus": "medlineplus",
+    "medlineplus_drugs": "medlineplus",
+    "medlineplus_encyclopedia": "medlineplus",
+}
+DEFAULT_RULES = "default"
+
+
+def load_rules(name: str) -> dict:
+    """
+    Load a rule set by name, resolving "extends" chains.
+    Parent rules come first, so a child can only add rules.
+    """
+    path = RULES_DIR / f"{name}.json"
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    rules = {"replace": {}, "drop_exact": [], "drop_prefixes": []}
+    parent = raw.get("extends")
+    if parent:
+        rules = load_rules(parent)
+
+    rules["replace"].update(raw.get("replace", {}))
+    rules["drop_exact"].extend(raw.get("drop_exact", []))
+    rules["drop_prefixes"].extend(raw.get("drop_prefixes", []))
+    return rules
+
+
+class CleaningEngine:
+    def __init__(self, rules: dict):
+        replace = rules.get("replace", {})
+        self.replacements = dict(replace)
+        self.replace_re = (
+            re.compile("|".join(re.escape(k) for k in replace))
+            if replace else None
+        )
+
+        self.drop_exact = frozenset(rules.get("drop_exact", []))
+
+        prefixes = rules.get("drop_prefixes", [])
+        self.prefix_re = (
+            re.compile("|".join(re.escape(p) for p in prefixes))
+            if prefixes else None
+        )
+
+    @classmethod
+    def from_name(cls, name: str) -> "CleaningEngine":
+        return cls(load_rules(name))
+
+    def clean(self, text: str) -> str:
+        # --- replacements: one regex pass ---
+        if self.replace_re is not None:
+            lookup = self.replacements
+            text = self.replace_re.sub(lambda m: lookup[m.group(0)], text)
+
+        # --- line filtering + blank-line collapsing: one loop ---
+        drop_exact = self.drop_exact
+        prefix_match = self.prefix_re.match if self.prefix_re else None
+
+        out: list[str] = []
+        blank_run = 0
+
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                # Keep at most one blank line between paragraphs
+                blank_run += 1
+                if blank_run == 1:
+                    out.append("")
+                continue
+
+            if line in drop_exact:
+                continue
+            if prefix_match is not None and prefix_match(line):
+                continue
+
+            blank_run = 0
+            out.append(line)
+
+        return "\n".join(out).strip()
+
+
+@lru_cache(maxsize=None)
+def get_engine(name: str = DEFAULT_RULES) -> CleaningEngine:
+    return CleaningEngine.from_name(name)
+
+
+def rules_for_path(rel_path) -> str:
+    """
+    Pick the rule set for a file from its first path component,
+    e.g. "medlineplus_drugs/foo.txt" -> "medlineplus".
+    """
+    parts = Path(rel_path).parts
+    top = parts[0] if len(parts) > 1 else ""
+    return SOURCE_RULES.get(top, DEFAULT_RULES)
@@ -5,33 +5,80 @@ No API calls required.
 
 Input:
     rag/data_chunks/**/*.jsonl
+    rag/data_chunks/dedup_aliases.json  (optional, from chunking/02b_dedup_chunks.py)
 Output:
-    rag/vectorstore/medlineplus_faiss/
+    rag/vectorstore/medlineplus_faiss/versions/<version>/
+        index.faiss, metadata.jsonl, aliases.json, entities.json
+        metadata.store  (row metadata + chunk texts, memory-mapped by QA;
+                         see utils/metadata_store.py)
+    rag/vectorstore/medlineplus_faiss/CURRENT  → <version>
+
+Every build writes a new version dir and only then atomically moves
+CURRENT to it; running QA processes swap to it without a restart. All
+but the newest --keep versions are deleted afterwards
+(see utils/index_versions.py).
+
+Chunks listed as near-duplicates in dedup_aliases.json are not embedded;
+the alias map is copied next to the index as aliases.json.
+
+--shards N splits the vectors into N shards by hash of the chunk id
+(--shard-by collection: one shard per top-level source folder) and
+writes shards/<nn>-<name>/index.faiss + shards.json instead of a single
+index.faiss; QA searches the shards in parallel (see utils/shards.py).
+
+--reduce pca|opq|truncate --dim D stores D-dim vectors instead of the
+full model output (search cost and memory scale with D). The projection
+is saved as projection.npz in the version dir and QA applies it to every
+query (see utils/projection.py).
+
+--knn K also precomputes every chunk's K nearest chunks and the related
+documents of every source (knn_graph.npz, see utils/knn_graph.py),
+reusing the previous version's graph for unchanged chunks.
+
+Run from project root (rag/):
+    (venv) python embeddings/03_build_faiss_index.py
+    (venv) python embeddings/03_build_faiss_index.py --shards 4
+    (venv) python embeddings/03_build_faiss_index.py --shard-by collection
+    (venv) python embeddings/03_build_faiss_index.py --reduce pca --dim 128
+    (venv) python embeddings/03_build_faiss_index.py --knn 10
+    (venv) python embeddings/03_build_faiss_index.py --profile     # see utils/profiling.py
+    (venv) python embeddings/03_build_faiss_index.py --model minilm-l3   # → medlineplus_faiss@minilm-l3/
 """
 
 import os
+import sys
 import json
+import shutil
+import argparse
 from pathlib import Path
 from typing import List, Dict
 
 import numpy as np
-import faiss
-from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 
 # ----- paths -----
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
-INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.embedding_models import (  # noqa: E402
+    MODELS, encode, index_root, selected_model, write_manifest as write_model_manifest,
+)
+from utils.index_versions import gc_versions, new_version, publish  # noqa: E402
+from utils.knn_graph import DEFAULT_RELATED, build_for_version as build_knn_graph  # noqa: E402
+from utils.metadata_store import MetadataStore  # noqa: E402
+from utils.metrics import count, request_trace, span, start_metrics_server  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.projection import FILE_NAME as PROJECTION_NAME, KINDS as PROJECTION_KINDS, Projection  # noqa: E402
+from utils.resources import load_sentence_transformer  # noqa: E402
+from utils.shards import MANIFEST_NAME, assign_shards, write_manifest  # noqa: E402
 
-INDEX_PATH = os.path.join(INDEX_DIR, "index.faiss")
-META_PATH = os.path.join(INDEX_DIR, "metadata.jsonl")
+CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
+INDEX_BASE_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
 
-os.makedirs(INDEX_DIR, exist_ok=True)
+ALIASES_IN_PATH = os.path.join(CHUNKS_DIR, "dedup_aliases.json")
+ENTITIES_IN_PATH = os.path.join(CHUNKS_DIR, "entities.json")     # from 02_chunk_texts.py
 
-# ----- SBERT model -----
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
+# ----- SBERT model: registry key, RAG_EMBED_MODEL or --model (loaded in build_faiss_index) -----
+EMBED_MODEL = selected_model()
 
 
 # ----- helpers -----
@@ -45,12 +92,93 @@ def iter_chunk_records(chunks_dir: Path):
                     yield json.loads(line)
 
 
-def build_faiss_index():
+def load_aliases() -> Dict[str, str]:
+    """duplicate id -> canonical id, empty if dedup was not run"""
+    if not os.path.exists(ALIASES_IN_PATH):
+        return {}
+    with open(ALIASES_IN_PATH, "r", encoding="utf-8") as f:
+        return json.load(f).get("aliases", {})
+
+
+def write_shards(faiss, embeddings, records: List[Dict], n_shards: int, by: str,
+                 out_dir: str):
+    """
+    Write one IndexFlatIP per shard. Returns records in shard order (the
+    global row order of metadata.jsonl / metadata.store).
+    """
+    ordered = []
+    manifest = []
+    for s, (name, rows) in enumerate(assign_shards(records, n_shards, by)):
+        rel = os.path.join("shards", f"{s:02d}-{name}", "index.faiss")
+        os.makedirs(os.path.dirname(os.path.join(out_dir, rel)), exist_ok=True)
+        index = faiss.IndexFlatIP(embeddings.shape[1])
+        index.add(embeddings[rows])
+        faiss.write_index(index, os.path.join(out_dir, rel))
+        manifest.append({"name": name, "path": rel, "offset": len(ordered),
+                         "ntotal": index.ntotal})
+        ordered.extend(records[i] for i in rows)
+        print(f"[INFO] Shard {s:02d} {name}: {index.ntotal} vectors")
+
+    write_manifest(out_dir, embeddings.shape[1], by, manifest)
+    print(f"[INFO] Saved {len(manifest)} shards → {os.path.join(out_dir, MANIFEST_NAME)}")
+    return ordered
+
+
+def build_faiss_index(n_shards: int = 1, shard_by: str = "hash", keep: int = 2,
+                      reduce: str = "none", reduce_dim: int = 128, spec=EMBED_MODEL,
+                      knn: int = 0, related: int = DEFAULT_RELATED):
+    index_dir = index_root(INDEX_BASE_DIR, spec)
     records = list(iter_chunk_records(Path(CHUNKS_DIR)))
-    total = len(records)
-    print(f"[INFO] Total chunks: {total}")
+    print(f"[INFO] Total chunks: {len(records)}")
+
+    aliases = load_aliases()
+    if aliases:
+        records = [rec for rec in records if rec["id"] not in aliases]
+        print(f"[INFO] Skipping {len(aliases)} near-duplicate chunks "
+              f"→ {len(records)} vectors")
 
     texts = [rec["text"] for rec in records]
+    embed_row = {rec["id"]: i for i, rec in enumerate(records)}
+
+    # ---- embed with SBERT ----
+    import faiss
+
+    print(f"[INFO] Computing SBERT embeddings with {spec.model_id}...")
+    model = load_sentence_transformer(spec.model_id)
+    with request_trace() as spans, span("build_embed"):
+        embeddings = encode(model, spec, texts, batch_size=32, show_progress_bar=True)
+    count("build_embed", len(texts))
+    embed_sec = spans[0][1]
+    print(f"[INFO] Embedded {len(texts)} chunks in {embed_sec:.1f}s "
+          f"({len(texts) / max(embed_sec, 1e-9):.0f} chunks/s)")
+
+    projection = None
+    if reduce != "none":
+        projection = Projection.fit(reduce, embeddings, reduce_dim)
+        embeddings = projection.apply(embeddings)
+        print(f"[INFO] Reduced embeddings with {projection}")
+
+    dim = embeddings.shape[1]
+    print(f"[INFO] Embedding dim = {dim}")
+
+    # ---- FAISS index (new version dir, published when complete) ----
+    version, out_dir = new_version(index_dir)
+    print(f"[INFO] Building version {version} → {out_dir}")
+    write_model_manifest(out_dir, spec, model, dim)
+    if projection is not None:
+        projection.save(os.path.join(out_dir, PROJECTION_NAME))
+    with span("build_index"):
+        if n_shards > 1 or shard_by == "collection":
+            records = write_shards(faiss, embeddings, records, n_shards, shard_by, out_dir)
+            texts = [rec["text"] for rec in records]
+        else:
+            index_path = os.path.join(out_dir, "index.faiss")
+            index = faiss.IndexFlatIP(dim)
+            index.add(embeddings)
+            faiss.write_index(index, index_path)
+            print(f"[INFO] Saved FAISS index → {index_path}")
+    count("build_index", len(records))
+
     metadata = [
         {
             "id": rec["id"],
@@ -60,36 +188,67 @@ def build_faiss_index():
         for rec in records
     ]
 
-    # ---- embed with SBERT ----
-    print("[INFO] Computing SBERT embeddings...")
-    embeddings = model.encode(
-        texts,
-        convert_to_numpy=True,
-        batch_size=32,
-        show_progress_bar=True,
-        normalize_embeddings=True
-    )
+    meta_path = os.path.join(out_dir, "metadata.jsonl")
+    with open(meta_path, "w", encoding="utf-8") as f:
+        for m in metadata:
+            f.write(json.dumps(m, ensure_ascii=False) + "\n")
 
-    dim = embeddings.shape[1]
-    print(f"[INFO] Embedding dim = {dim}")
+    print(f"[INFO] Saved metadata → {meta_path}")
 
-    # ---- FAISS index ----
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings)
+    store_path = os.path.join(out_dir, "metadata.store")
+    store = MetadataStore.from_records(metadata, texts)
+    store.save(store_path)
+    print(f"[INFO] Saved metadata store ({store.nbytes / 1e6:.1f} MB) → {store_path}")
 
-    faiss.write_index(index, INDEX_PATH)
-    print(f"[INFO] Saved FAISS index → {INDEX_PATH}")
+    aliases_path = os.path.join(out_dir, "aliases.json")
+    with open(aliases_path, "w", encoding="utf-8") as f:
+        json.dump(aliases, f, ensure_ascii=False)
+    print(f"[INFO] Saved {len(aliases)} aliases → {aliases_path}")
 
-    with open(META_PATH, "w", encoding="utf-8") as f:
-        for m in metadata:
-            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+    # Exact-name lookups must point into this version's chunks
+    if os.path.exists(ENTITIES_IN_PATH):
+        shutil.copy(ENTITIES_IN_PATH, os.path.join(out_dir, "entities.json"))
+        print(f"[INFO] Copied entity names → {out_dir}")
+
+    if knn > 0:
+        # rows of the graph follow metadata order (shard order with --shards)
+        order = np.array([embed_row[rec["id"]] for rec in records], dtype=np.int64)
+        with span("build_knn"):
+            build_knn_graph(index_dir, version, out_dir, embeddings[order],
+                            [m["id"] for m in metadata], texts,
+                            [m["source"] for m in metadata], knn, related)
+        count("build_knn", len(records))
 
-    print(f"[INFO] Saved metadata → {META_PATH}")
+    publish(index_dir, version)
+    gc_versions(index_dir, keep)
 
 
 def main():
-    build_faiss_index()
+    parser = argparse.ArgumentParser(description="Build the FAISS index from data_chunks/")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="expose Prometheus metrics on this port while building")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="split the index into N shards by hash of the chunk id")
+    parser.add_argument("--shard-by", choices=["hash", "collection"], default="hash",
+                        help="collection = one shard per top-level source folder")
+    parser.add_argument("--keep", type=int, default=2,
+                        help="index versions to keep, including the new one")
+    parser.add_argument("--reduce", choices=("none",) + PROJECTION_KINDS, default="none",
+                        help="store reduced-dimension vectors (truncate: Matryoshka models only)")
+    parser.add_argument("--dim", type=int, default=128, help="target dim for --reduce")
+    parser.add_argument("--knn", type=int, default=0,
+                        help="also build the chunk kNN graph with K neighbours per chunk")
+    parser.add_argument("--related", type=int, default=DEFAULT_RELATED,
+                        help="related documents kept per document in the kNN graph")
+    parser.add_argument("--model", choices=sorted(MODELS), default=EMBED_MODEL.key,
+                        help="embedding model (default: RAG_EMBED_MODEL or minilm); "
+                             "non-default models get their own index dir")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
+    build_faiss_index(args.shards, args.shard_by, args.keep, args.reduce, args.dim,
+                      MODELS[args.model], args.knn, args.related)
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -0,0 +1,190 @@
+# 03b_build_multilingual_index.py
+"""
+Build indexes that serve non-English queries without an online
+translation round-trip.
+
+Two modes (run after 03_build_faiss_index.py):
+
+  --mode multilingual  (default)
+      Embed the English chunks with a multilingual SBERT model. Hindi,
+      Tamil, Telugu or Kannada queries embed into the same space, so they
+      search English chunks directly.
+      Output: rag/vectorstore/medlineplus_faiss_multilingual/
+
+  --mode translate --langs hi ta
+      Translate the chunk corpus offline with M2M100 (batched, sorted by
+      length to keep padding low), embed the translations with the
+      multilingual model and write one index per language.
+      Output: rag/vectorstore/medlineplus_faiss_<lang>/
+              (+ translations.jsonl with the translated chunk texts)
+
+Every index dir is versioned like the English index (versions/<version>/
++ CURRENT, see utils/index_versions.py) and holds index.faiss +
+metadata.jsonl + metadata.store (with the English chunk texts), so app/04_qa_faiss.py can load any of them.
+
+Run from project root (rag/):
+    (venv) python embeddings/03b_build_multilingual_index.py
+    (venv) python embeddings/03b_build_multilingual_index.py --mode translate --langs hi --max-chars 400
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+from tqdm import tqdm
+
+# ----- paths -----
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.embedding_models import MULTI_MODEL, encode, get_model, write_manifest  # noqa: E402
+from utils.index_versions import gc_versions, new_version, publish  # noqa: E402
+from utils.metadata_store import MetadataStore  # noqa: E402
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.resources import load_sentence_transformer  # noqa: E402
+
+CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
+VECTORSTORE_DIR = os.path.join(BASE_DIR, "vectorstore")
+ALIASES_IN_PATH = os.path.join(CHUNKS_DIR, "dedup_aliases.json")
+
+MULTI_INDEX_NAME = "medlineplus_faiss_multilingual"
+LANG_INDEX_NAME = "medlineplus_faiss_{lang}"
+
+# ----- models -----
+MULTI_EMBED_MODEL = get_model(MULTI_MODEL)
+MULTI_MODEL_NAME = MULTI_EMBED_MODEL.model_id
+TRANSLATION_MODEL_NAME = "facebook/m2m100_418M"
+
+# Same languages as backend/src/locales (minus English)
+SUPPORTED_LANGS = ["hi", "ta", "te", "kn"]
+
+
+# ----- helpers -----
+def iter_chunk_records(chunks_dir: Path):
+    for root, _, files in os.walk(chunks_dir):
+        for fname in files:
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+
+def load_records() -> List[Dict]:
+    records = list(iter_chunk_records(Path(CHUNKS_DIR)))
+    if os.path.exists(ALIASES_IN_PATH):
+        with open(ALIASES_IN_PATH, "r", encoding="utf-8") as f:
+            aliases = json.load(f).get("aliases", {})
+        records = [rec for rec in records if rec["id"] not in aliases]
+    print(f"[INFO] Chunks to index: {len(records)}")
+    return records
+
+
+def write_index(root: str, embeddings, records: List[Dict],
+                translations: List[str] | None = None) -> str:
+    """Write a new version of the index under root and publish it."""
+    import faiss
+
+    version, out_dir = new_version(root)
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(embeddings)
+    faiss.write_index(index, os.path.join(out_dir, "index.faiss"))
+    write_manifest(out_dir, MULTI_EMBED_MODEL, load_sentence_transformer(MULTI_MODEL_NAME), index.d)
+
+    with open(os.path.join(out_dir, "metadata.jsonl"), "w", encoding="utf-8") as f:
+        for rec in records:
+            m = {"id": rec["id"], "source": rec["source"], "chunk_index": rec["chunk_index"]}
+            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+    MetadataStore.from_records(records, [rec["text"] for rec in records]).save(
+        os.path.join(out_dir, "metadata.store"))
+    if translations is not None:
+        with open(os.path.join(out_dir, "translations.jsonl"), "w", encoding="utf-8") as f:
+            for rec, text in zip(records, translations):
+                f.write(json.dumps({"id": rec["id"], "text": text}, ensure_ascii=False) + "\n")
+    print(f"[INFO] Saved index ({index.ntotal} vectors) → {out_dir}")
+
+    publish(root, version)
+    gc_versions(root)
+    return out_dir
+
+
+def embed(texts: List[str]):
+    model = load_sentence_transformer(MULTI_MODEL_NAME)
+    with span("build_embed"):
+        embeddings = encode(model, MULTI_EMBED_MODEL, texts, batch_size=32, show_progress_bar=True)
+    count("build_embed", len(texts))
+    return embeddings
+
+
+def translate_texts(texts: List[str], tgt: str, batch_size: int = 16,
+                    src: str = "en") -> List[str]:
+    """
+    Batched M2M100 translation. Texts are processed longest-first so each
+    batch holds similar lengths (little padding); output keeps input order.
+    """
+    import torch
+    from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+
+    tokenizer = M2M100Tokenizer.from_pretrained(TRANSLATION_MODEL_NAME)
+    model = M2M100ForConditionalGeneration.from_pretrained(TRANSLATION_MODEL_NAME)
+    model.eval()
+    tokenizer.src_lang = src
+    forced_bos = tokenizer.get_lang_id(tgt)
+
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    out: List[str] = [""] * len(texts)
+
+    for i in tqdm(range(0, len(order), batch_size), desc=f"[INFO] Translating → {tgt}"):
+        batch_ids = order[i:i + batch_size]
+        batch = [texts[j] for j in batch_ids]
+        encoded = tokenizer(batch, return_tensors="pt", padding=True,
+                            truncation=True, max_length=512)
+        with torch.inference_mode(), span("translate"):
+            generated = model.generate(**encoded, forced_bos_token_id=forced_bos)
+        count("translate", len(batch))
+        for j, text in zip(batch_ids, tokenizer.batch_decode(generated, skip_special_tokens=True)):
+            out[j] = text
+    return out
+
+
+def build_multilingual(records: List[Dict]):
+    print(f"[INFO] Embedding English chunks with {MULTI_MODEL_NAME}")
+    embeddings = embed([rec["text"] for rec in records])
+    write_index(os.path.join(VECTORSTORE_DIR, MULTI_INDEX_NAME), embeddings, records)
+
+
+def build_translated(records: List[Dict], langs: List[str], max_chars: int, batch_size: int):
+    # Optionally translate only the head of each chunk (title + summary)
+    texts = [rec["text"][:max_chars] if max_chars else rec["text"] for rec in records]
+
+    for lang in langs:
+        translated = translate_texts(texts, lang, batch_size=batch_size)
+        root = os.path.join(VECTORSTORE_DIR, LANG_INDEX_NAME.format(lang=lang))
+
+        embeddings = embed(translated)
+        write_index(root, embeddings, records, translated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build multilingual / pre-translated FAISS indexes")
+    parser.add_argument("--mode", choices=["multilingual", "translate"], default="multilingual")
+    parser.add_argument("--langs", nargs="+", choices=SUPPORTED_LANGS, default=SUPPORTED_LANGS)
+    parser.add_argument("--max-chars", type=int, default=0,
+                        help="translate only the first N chars of each chunk (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    records = load_records()
+    if args.mode == "multilingual":
+        build_multilingual(records)
+    else:
+        build_translated(records, args.langs, args.max_chars, args.batch_size)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,98 @@
+# 03c_build_knn_graph.py
+"""
+Precompute the chunk kNN graph of an existing index for "related
+articles" (see utils/knn_graph.py).
+
+Every index vector is searched against the whole index in batches (faiss
+uses all cores; --threads caps it), each chunk keeps its --k nearest
+chunks, and the chunk edges are rolled up to documents (`source`): a
+document's related documents are the ones its chunks point at, scored by
+the best chunk-chunk similarity. The graph is written as knn_graph.npz
+into the CURRENT version dir, where app/04_qa_faiss.py picks it up.
+
+Incremental: if an older version of the same index has a graph in the
+same vector space, chunks whose id and text did not change keep their
+neighbour lists and are only compared with the new or changed chunks.
+03_build_faiss_index.py --knn K does the same as part of a build.
+
+Input:
+    rag/vectorstore/medlineplus_faiss[@model]/versions/<CURRENT>/
+Output:
+    rag/vectorstore/medlineplus_faiss[@model]/versions/<CURRENT>/knn_graph.npz
+
+Run from project root (rag/):
+    (venv) python embeddings/03c_build_knn_graph.py
+    (venv) python embeddings/03c_build_knn_graph.py --k 20 --related 10 --threads 4
+    (venv) python embeddings/03c_build_knn_graph.py --full      # ignore older graphs
+    (venv) python embeddings/03c_build_knn_graph.py --model minilm-l3
+"""
+
+import os
+import sys
+import argparse
+
+# ----- paths -----
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.embedding_models import MODELS, index_root, selected_model  # noqa: E402
+from utils.index_versions import current_version, versions_dir  # noqa: E402
+from utils.knn_graph import DEFAULT_K, DEFAULT_RELATED, build_for_version  # noqa: E402
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
+from utils.scripts import load_script  # noqa: E402
+
+INDEX_BASE_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
+
+
+def build_knn_graph(index_dir: str, k: int = DEFAULT_K, related: int = DEFAULT_RELATED,
+                    incremental: bool = True):
+    qa = load_script("app/04_qa_faiss.py")     # load_index / load_metadata
+    version = current_version(index_dir)
+    if version is None:
+        raise SystemExit(f"[ERROR] No published index version in {index_dir} "
+                         f"(run embeddings/03_build_faiss_index.py first)")
+    version_dir = os.path.join(versions_dir(index_dir), version)
+
+    index = qa.load_index(os.path.join(version_dir, "index.faiss"))
+    metadata = qa.load_metadata(version_dir)
+    try:
+        with span("knn_load"):
+            vectors = index.reconstruct_n(0, index.ntotal)
+        print(f"[INFO] Version {version}: {index.ntotal} vectors, dim {index.d}")
+        with span("build_knn"):
+            build_for_version(index_dir, version, version_dir, vectors, metadata.ids(),
+                              [metadata.text(i) for i in range(len(metadata))],
+                              [metadata.source(i) for i in range(len(metadata))],
+                              k, related, incremental)
+        count("build_knn", index.ntotal)
+    finally:
+        if hasattr(index, "close"):     # ShardedIndex worker connections
+            index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the chunk kNN graph of the current index")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="neighbours kept per chunk")
+    parser.add_argument("--related", type=int, default=DEFAULT_RELATED,
+                        help="related documents kept per document")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="faiss search threads (default: all cores)")
+    parser.add_argument("--full", action="store_true",
+                        help="search every chunk, do not reuse an older version's graph")
+    parser.add_argument("--model", choices=sorted(MODELS), default=selected_model().key,
+                        help="embedding model whose index namespace to use")
+    parser.add_argument("--index-dir", default=None,
+                        help="index root (default: the --model namespace of medlineplus_faiss)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        import faiss
+        faiss.omp_set_num_threads(args.threads)
+    index_dir = args.index_dir or index_root(INDEX_BASE_DIR, MODELS[args.model])
+    build_knn_graph(index_dir, args.k, args.related, incremental=not args.full)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,232 @@
+# evaluate.py
+"""
+Retrieval quality + latency evaluation for FAISS index configurations.
+
+Query set: eval/queries.jsonl, MedlinePlus drug / condition questions
+with the chunk ids that contain the answer:
+    {"qid": ..., "question": ..., "type": ..., "source": ..., "gold": [chunk ids]}
+
+For every config it reports recall@k, MRR@k and nDCG@k (binary relevance)
+next to p50/p95/p99 single-query search latency, then prints a Pareto
+table (configs not beaten on both recall and p95 latency are marked *).
+
+Configs are FAISS index_factory strings built from the vectors of the
+saved flat index, so ANN / quantization settings can be compared without
+re-embedding the corpus. Every config is also run on vectors reduced to
+each of --dims dimensions with a --reduce projection learned on the same
+vectors (utils/projection.py), to show what a smaller index costs in
+recall (names like "pca128 Flat").
+
+Run from project root (rag/):
+    (venv) python eval/evaluate.py
+    (venv) python eval/evaluate.py --factory Flat HNSW32 IVF1024,Flat IVF1024,PQ48 \\
+        --nprobe 8 32 --efsearch 64 128 --k 10 --json eval/results.json
+    (venv) python eval/evaluate.py --reduce opq --dims 128 64
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+import numpy as np
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAG_DIR)
+
+from utils.index_versions import current_dir  # noqa: E402
+from utils.projection import KINDS as PROJECTION_KINDS, Projection  # noqa: E402
+from utils.scripts import load_script  # noqa: E402
+
+QUERIES_PATH = os.path.join(RAG_DIR, "eval", "queries.jsonl")
+
+
+# ----- data -----
+def load_queries(path: str = QUERIES_PATH) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_aliases(index_dir: str) -> dict:
+    path = os.path.join(index_dir, "aliases.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def gold_sets(queries: list[dict], aliases: dict) -> list[set]:
+    # A gold chunk removed by dedup is found through its canonical copy
+    return [{aliases.get(g, g) for g in q["gold"]} for q in queries]
+
+
+# ----- metrics -----
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def score_run(ranked_ids: list[list[str]], golds: list[set], k: int) -> dict:
+    recall = mrr = ndcg = 0.0
+    for ranked, gold in zip(ranked_ids, golds):
+        ranked = ranked[:k]
+        hits = [cid in gold for cid in ranked]
+        recall += sum(hits) / len(gold)
+        first = next((i for i, h in enumerate(hits) if h), None)
+        if first is not None:
+            mrr += 1.0 / (first + 1)
+        dcg = sum(1.0 / math.log2(i + 2) for i, h in enumerate(hits) if h)
+        idcg = sum(1.0 / math.log2(i + 2) for i in range(min(len(gold), k)))
+        ndcg += dcg / idcg
+    n = max(len(golds), 1)
+    return {f"recall@{k}": recall / n, f"mrr@{k}": mrr / n, f"ndcg@{k}": ndcg / n}
+
+
+def evaluate_index(name: str, index, qvecs: np.ndarray, ids: list[str],
+                   golds: list[set], k: int) -> dict:
+    """Single-query searches (like the QA path) so latency is per request."""
+    ranked_ids = []
+    latencies = []
+    for i in range(len(qvecs)):
+        t0 = time.perf_counter()
+        _, idx = index.search(qvecs[i:i + 1], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ranked_ids.append([ids[j] for j in idx[0] if j >= 0])
+
+    row = {"config": name}
+    row.update(score_run(ranked_ids, golds, k))
+    row.update({
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    })
+    return row
+
+
+def pareto_front(rows: list[dict], recall_key: str) -> set:
+    front = set()
+    for r in rows:
+        dominated = any(
+            o is not r
+            and o[recall_key] >= r[recall_key] and o["p95_ms"] <= r["p95_ms"]
+            and (o[recall_key] > r[recall_key] or o["p95_ms"] < r["p95_ms"])
+            for o in rows
+        )
+        if not dominated:
+            front.add(r["config"])
+    return front
+
+
+def print_table(rows: list[dict], k: int):
+    recall_key = f"recall@{k}"
+    front = pareto_front(rows, recall_key)
+    rows = sorted(rows, key=lambda r: r["p95_ms"])
+    print(f"\n  {'config':<34}{recall_key:>10}{f'mrr@{k}':>9}{f'ndcg@{k}':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for r in rows:
+        mark = "*" if r["config"] in front else " "
+        print(f"{mark} {r['config']:<34}{r[recall_key]:>10.3f}{r[f'mrr@{k}']:>9.3f}"
+              f"{r[f'ndcg@{k}']:>9.3f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+    print("\n  * = Pareto-optimal (no config has both higher recall and lower p95)")
+
+
+# ----- index configs -----
+def build_configs(vectors: np.ndarray, factories: list[str], nprobes: list[int],
+                  efsearches: list[int], base_index=None):
+    """
+    Yield (name, index) for every factory string x search parameter.
+    base_index, if given, is used as the "Flat" config instead of a copy.
+    """
+    import faiss
+
+    dim = vectors.shape[1]
+
+    for factory in factories:
+        if factory == "Flat":
+            if base_index is None:
+                base_index = faiss.IndexFlatIP(dim)
+                base_index.add(vectors)
+            yield "Flat", base_index
+            continue
+
+        index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+
+        if factory.startswith("IVF"):
+            for nprobe in nprobes:
+                faiss.extract_index_ivf(index).nprobe = nprobe
+                yield f"{factory} nprobe={nprobe}", index
+        elif factory.startswith("HNSW"):
+            for ef in efsearches:
+                index.hnsw.efSearch = ef
+                yield f"{factory} ef={ef}", index
+        else:
+            yield factory, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality + latency evaluation")
+    parser.add_argument("--queries", default=QUERIES_PATH)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--factory", nargs="+", default=["Flat"],
+                        help="faiss index_factory strings, e.g. Flat HNSW32 IVF1024,PQ48")
+    parser.add_argument("--nprobe", nargs="+", type=int, default=[8, 32])
+    parser.add_argument("--efsearch", nargs="+", type=int, default=[64])
+    parser.add_argument("--reduce", choices=PROJECTION_KINDS, default="pca",
+                        help="projection used for the --dims runs")
+    parser.add_argument("--dims", nargs="*", type=int, default=[256, 128, 64],
+                        help="also evaluate every config at these dims (none = skip)")
+    parser.add_argument("--json", default="", help="also write rows to this JSON file")
+    args = parser.parse_args()
+
+    qa = load_script("app/04_qa_faiss.py")
+    queries = load_queries(args.queries)
+    golds = gold_sets(queries, load_aliases(current_dir(qa.INDEX_DIR)))
+
+    current = qa.store.get()
+    base_index = current.index
+    ids = current.metadata.ids()
+
+    current.check_encoder(qa.model.get())
+    t0 = time.perf_counter()
+    qvecs = np.vstack([qa.embed_query(q["question"], projection=current.projection)
+                       for q in queries])
+    embed_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    vectors = base_index.reconstruct_n(0, base_index.ntotal)
+    print(f"[EVAL] {len(queries)} queries, {len(ids)} vectors x {vectors.shape[1]} dims, "
+          f"embed_query avg {embed_ms:.2f} ms")
+
+    runs = [("", vectors, qvecs, base_index)]
+    for dim in args.dims:
+        if dim >= vectors.shape[1]:
+            print(f"[EVAL] Skipping {dim} dims: index is already {vectors.shape[1]}-dim")
+            continue
+        projection = Projection.fit(args.reduce, vectors, dim)
+        runs.append((f"{args.reduce}{dim} ", projection.apply(vectors),
+                     projection.apply(qvecs), None))
+
+    rows = []
+    for prefix, run_vectors, run_qvecs, run_base in runs:
+        for name, index in build_configs(run_vectors, args.factory, args.nprobe,
+                                         args.efsearch, run_base):
+            rows.append(evaluate_index(prefix + name, index, run_qvecs, ids, golds, args.k))
+            rows[-1]["dim"] = run_vectors.shape[1]
+            print(f"[EVAL] {prefix}{name}: recall@{args.k}={rows[-1][f'recall@{args.k}']:.3f}")
+
+    print_table(rows, args.k)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "embed_ms": embed_ms, "rows": rows}, f, indent=2)
+        print(f"[EVAL] Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,26 +6,50 @@ We do NOT read embeddings from FAISS.
 Instead, we:
   - load metadata.jsonl (id, source, chunk_index)
   - load chunk texts from data_chunks/**/*.jsonl
-  - recompute embeddings with SBERT
-  - write backend/data/medlineplus_embeddings.jsonl
+  - recompute embeddings with the model the index was built with
+    (its model.json, see utils/embedding_models.py)
+  - write backend/data/medlineplus_embeddings.jsonl, and
+    medlineplus_embeddings.model.json with that model's id, the ONNX
+    export the backend must embed queries with, dim and fingerprint
+  - build an IVF index over the same vectors and write
+    backend/data/medlineplus_ivf.bin (row r = line r of the JSONL), so
+    the backend can search a few lists instead of every vector.
+    Binary layout and a reference reader: utils/ann_file.py
+
+--verify reads the .bin back and checks, on sample chunk vectors used as
+queries, that it returns the same neighbours as the faiss IVF index it
+was built from, and reports its recall against exact search.
 
 Run:
     (venv) python export_node_embeddings.py
+    (venv) RAG_EMBED_MODEL=minilm-l3 python export_node_embeddings.py
+    (venv) python export_node_embeddings.py --nprobe 32 --verify
+    (venv) python export_node_embeddings.py --no-ann
 """
 
 import os
 import json
+import argparse
 from pathlib import Path
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from tqdm import tqdm
 
+from utils.ann_file import build_ivf, default_nlist, parity_check, write_ivf
+
+from utils.embedding_models import (
+    MODELS, encode, index_root, read_manifest, selected_model, write_manifest,
+)
+from utils.index_versions import current_dir
+from utils.metrics import count, span, start_metrics_server
+from utils.profiling import add_profile_args, run_main
+from utils.resources import load_sentence_transformer
+
 # ---------- paths ----------
 
 BASE_DIR = Path(__file__).resolve().parent
 CHUNKS_DIR = BASE_DIR / "data_chunks"
-INDEX_DIR = BASE_DIR / "vectorstore" / "medlineplus_faiss"
-META_PATH = INDEX_DIR / "metadata.jsonl"
+INDEX_DIR = Path(index_root(str(BASE_DIR / "vectorstore" / "medlineplus_faiss"), selected_model()))
 
 # Root project structure:
 #   Healthcare-Chatbot/
@@ -35,22 +59,27 @@ PROJECT_ROOT = BASE_DIR.parent
 BACKEND_DIR = PROJECT_ROOT / "backend"
 OUT_DIR = BACKEND_DIR / "data"
 OUT_PATH = OUT_DIR / "medlineplus_embeddings.jsonl"
-
-# ---------- SBERT model ----------
-
-# Use the SAME model you used to build FAISS originally.
-# If you followed my earlier suggestion, it was:
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-
-print(f"[EXPORT] Loading SBERT model: {MODEL_NAME}")
-model = SentenceTransformer(MODEL_NAME)
-
+MODEL_PATH = OUT_DIR / "medlineplus_embeddings.model.json"
+ANN_PATH = OUT_DIR / "medlineplus_ivf.bin"
+DEFAULT_NPROBE = 32
+VERIFY_QUERIES = 200
 
 # ---------- helpers ----------
+def index_model():
+    """Registry entry of the model the published index was built with."""
+    manifest = read_manifest(current_dir(str(INDEX_DIR)))
+    if manifest is None:
+        spec = selected_model()
+        print(f"[EXPORT] {INDEX_DIR} has no model manifest, assuming {spec.model_id}")
+        return spec
+    return MODELS[manifest["key"]]
+
 
 def load_metadata():
+    # metadata.jsonl of the published index version
+    meta_path = Path(current_dir(str(INDEX_DIR))) / "metadata.jsonl"
     metas = []
-    with META_PATH.open("r", encoding="utf-8") as f:
+    with meta_path.open("r", encoding="utf-8") as f:
         for line in f:
             if not line.strip():
                 continue
@@ -82,6 +111,24 @@ def load_chunk_text_map():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Export chunk embeddings for the Node backend")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="expose Prometheus metrics on this port while exporting")
+    parser.add_argument("--no-ann", action="store_true", help="skip the IVF index file")
+    parser.add_argument("--nlist", type=int, default=0,
+                        help="IVF lists (default ~4*sqrt(N))")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE,
+                        help="lists the backend scans per query by default")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the written IVF file against faiss and exact search")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
+
+    spec = index_model()
+    print(f"[EXPORT] Loading SBERT model: {spec.model_id}")
+    model = load_sentence_transformer(spec.model_id)
+
     print("[EXPORT] Loading metadata + chunk texts...")
     metas = load_metadata()
     id_to_text = load_chunk_text_map()
@@ -111,11 +158,9 @@ def main():
 
     for i in tqdm(range(0, len(texts), batch_size), desc="[EXPORT] Embedding"):
         batch = texts[i:i+batch_size]
-        embs = model.encode(
-            batch,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )
+        with span("export_embed"):
+            embs = encode(model, spec, batch)
+        count("export_embed", len(batch))
         all_embeddings.extend(embs.tolist())
 
     # Write out to backend
@@ -134,6 +179,30 @@ def main():
 
     print(f"[EXPORT] Wrote {len(records)} embeddings → {OUT_PATH}")
 
+    write_manifest(str(OUT_DIR), spec, model, spec.dim, MODEL_PATH.name)
+
+    if not args.no_ann and records:
+        export_ann(np.asarray(all_embeddings, dtype="float32"), args.nlist, args.nprobe,
+                   args.verify)
+
+
+def export_ann(vectors: np.ndarray, nlist: int, nprobe: int, verify: bool):
+    nlist = nlist or default_nlist(len(vectors))
+    with span("export_ann"):
+        index, centroids, offsets, row_ids, grouped = build_ivf(vectors, nlist)
+        write_ivf(str(ANN_PATH), centroids, offsets, row_ids, grouped, nprobe)
+    print(f"[EXPORT] Wrote IVF index ({nlist} lists, nprobe={nprobe}, "
+          f"{ANN_PATH.stat().st_size / 1e6:.1f} MB) → {ANN_PATH}")
+
+    if verify:
+        rng = np.random.RandomState(0)
+        queries = vectors[rng.choice(len(vectors), min(VERIFY_QUERIES, len(vectors)),
+                                     replace=False)]
+        report = parity_check(str(ANN_PATH), index, vectors, queries, k=10, nprobe=nprobe)
+        print(f"[VERIFY] {report}")
+        if report["faiss_parity"] < 1.0:
+            raise SystemExit("[VERIFY] IVF file does not match the faiss index it was built from")
+
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,13 +1,46 @@
 # 02_extract_text.py
+"""
+Extract plain text from the raw HTML / PDF downloads.
+
+Input:
+    rag/data_raw/**/*.html|*.htm|*.pdf
+Output:
+    rag/data_text/**/*.txt  (same relative path)
+
+PDFs are extracted in a child process, page by page, straight to the
+output file (memory does not grow with page count). Each document has:
+    --pdf-timeout     wall-clock limit; the child is killed after it
+    --max-pages       pages extracted before the rest is skipped
+    --max-memory-mb   address-space cap of the child (POSIX)
+so one pathological PDF fails on its own instead of stalling or OOM-ing
+the run. Output is written to a temp file and renamed on success.
+
+--pdf-backend pdfplumber   (default) layout-aware text, as before
+--pdf-backend pdfium       pypdfium2 text layer only, several times
+                           faster; installed with pdfplumber
+
+Run from project root (rag/):
+    (venv) python extracting/02_extract_text.py
+    (venv) python extracting/02_extract_text.py --pdf-backend pdfium --pdf-timeout 60
+"""
+
 import os
+import sys
+import argparse
+import multiprocessing as mp
+import queue
+import time
 from pathlib import Path
 
-import pdfplumber
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
 # This file is in rag/extracting/, so go up one level to rag/
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import add_profile_args, run_main  # noqa: E402
 
 RAW_DIR = os.path.join(BASE_DIR, "data_raw")
 TEXT_DIR = os.path.join(BASE_DIR, "data_text")
@@ -36,23 +69,128 @@ def extract_html_to_txt(in_path: Path, out_path: Path):
         f.write(text)
 
 
-def extract_pdf_to_txt(in_path: Path, out_path: Path):
+# ----- PDF extraction (runs in a child process) -----
+PDF_BACKENDS = ("pdfplumber", "pdfium")
+PDF_TIMEOUT_S = 120
+MAX_PDF_PAGES = 500
+MAX_PDF_MEMORY_MB = 2048
+
+
+def iter_pdfplumber_pages(in_path: Path, max_pages: int):
+    import pdfplumber
+
+    with pdfplumber.open(in_path) as pdf:
+        yield len(pdf.pages)
+        for page in pdf.pages[:max_pages]:
+            yield page.extract_text() or ""
+            page.close()    # drop the page's parsed layout objects
+
+
+def iter_pdfium_pages(in_path: Path, max_pages: int):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(str(in_path))
+    try:
+        yield len(pdf)
+        for i in range(min(len(pdf), max_pages)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            yield textpage.get_text_range()
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+def stream_pdf_pages(in_path: Path, out_path: Path, backend: str, max_pages: int) -> dict:
+    """
+    Write non-empty stripped lines of each page to out_path as they are
+    extracted. Same output as joining all pages first.
+    """
+    pages = iter_pdfium_pages if backend == "pdfium" else iter_pdfplumber_pages
+    it = pages(in_path, max_pages)
+    total = next(it)
+    written = 0
+    first = True
+    with open(out_path, "w", encoding="utf-8") as f:
+        for page_text in it:
+            for line in page_text.splitlines():
+                line = line.strip()
+                if line:
+                    f.write(line if first else "\n" + line)
+                    first = False
+            written += 1
+    return {"pages": written, "total_pages": total}
+
+
+def _pdf_worker(in_path: Path, tmp_path: Path, backend: str, max_pages: int,
+                max_memory_mb: int, results):
+    if max_memory_mb:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass    # not POSIX / not allowed: timeout still applies
     try:
-        with pdfplumber.open(in_path) as pdf:
-            pages = [p.extract_text() or "" for p in pdf.pages]
+        results.put(("ok", stream_pdf_pages(in_path, tmp_path, backend, max_pages)))
+    except MemoryError:
+        results.put(("error", f"exceeded {max_memory_mb} MB"))
     except Exception as e:
-        print(f"[PDF ERROR] {in_path}: {e}")
-        return
+        results.put(("error", f"{type(e).__name__}: {e}"))
 
-    text = "\n".join(pages)
-    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
 
+def extract_pdf_to_txt(in_path: Path, out_path: Path, backend: str = "pdfplumber",
+                       timeout: float = PDF_TIMEOUT_S, max_pages: int = MAX_PDF_PAGES,
+                       max_memory_mb: int = MAX_PDF_MEMORY_MB) -> bool:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(text)
+    tmp_path = out_path.with_name(out_path.name + ".part")
+
+    results = mp.Queue()
+    proc = mp.Process(target=_pdf_worker, daemon=True,
+                      args=(in_path, tmp_path, backend, max_pages, max_memory_mb, results))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, info = results.get(timeout=0.5)
+            break
+        except queue.Empty:
+            if not proc.is_alive():     # killed (e.g. by the OOM killer) or crashed
+                status, info = "error", f"extractor exited with code {proc.exitcode}"
+                break
+            if time.monotonic() > deadline:
+                status, info = "timeout", f"no result after {timeout:g}s"
+                break
+    proc.join(0 if status == "timeout" else 5)
+    if proc.is_alive():
+        proc.kill()
+        proc.join()
+
+    if status != "ok":
+        tag = "PDF TIMEOUT" if status == "timeout" else "PDF ERROR"
+        print(f"[{tag}] {in_path}: {info}")
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+    os.replace(tmp_path, out_path)
+    if info["pages"] < info["total_pages"]:
+        print(f"[PDF TRUNCATED] {in_path}: first {info['pages']} of {info['total_pages']} pages")
+    return True
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract text from data_raw/ HTML and PDF files")
+    parser.add_argument("--pdf-backend", choices=PDF_BACKENDS, default="pdfplumber")
+    parser.add_argument("--pdf-timeout", type=float, default=PDF_TIMEOUT_S,
+                        help="seconds per PDF before it is abandoned")
+    parser.add_argument("--max-pages", type=int, default=MAX_PDF_PAGES,
+                        help="pages extracted per PDF")
+    parser.add_argument("--max-memory-mb", type=int, default=MAX_PDF_MEMORY_MB,
+                        help="memory cap of the PDF extraction process (0 = none)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
     ensure_dir(TEXT_DIR)
 
     for root, _, files in os.walk(RAW_DIR):
@@ -70,13 +208,18 @@ def main():
             lower = fname.lower()
 
             if lower.endswith(".html") or lower.endswith(".htm"):
-                extract_html_to_txt(in_path, out_path)
+                with span("extract_html"):
+                    extract_html_to_txt(in_path, out_path)
+                count("extract_html")
 
             elif lower.endswith(".pdf"):
-                extract_pdf_to_txt(in_path, out_path)
+                with span("extract_pdf"):
+                    extract_pdf_to_txt(in_path, out_path, args.pdf_backend, args.pdf_timeout,
+                                       args.max_pages, args.max_memory_mb)
+                count("extract_pdf")
 
             # Everything else is ignored
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,5 +1,6 @@
 # 01_download_scrape.py
 import os
+import sys
 import time
 import urllib.parse as up
 from typing import List, Set
@@ -8,6 +9,12 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+# rag/, for utils/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import run_main  # noqa: E402
+
 SESSION = requests.Session()
 SESSION.headers.update({
     "User-Agent": "health-rag-bot/0.1 (research; contact: you@example.com)"
@@ -30,8 +37,10 @@ def safe_filename(url: str) -> str:
     return name
 
 def fetch(url: str, binary: bool = False, sleep: float = 0.5):
+    count("fetch")
     try:
-        resp = SESSION.get(url, timeout=20)
+        with span("fetch"):
+            resp = SESSION.get(url, timeout=20)
         time.sleep(sleep)
         resp.raise_for_status()
         return resp.content if binary else resp.text
@@ -223,4 +232,4 @@ def main():
     crawl_pdfs_from_page("https://www.unicef.org/reports", "unicef")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
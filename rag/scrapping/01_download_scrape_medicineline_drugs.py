@@ -8,6 +8,7 @@ Run with:
 """
 
 import os
+import sys
 import time
 import string
 import requests
@@ -15,6 +16,12 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from tqdm import tqdm
 
+# rag/, for utils/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import count, span  # noqa: E402
+from utils.profiling import run_main  # noqa: E402
+
 # ---------- basic setup ----------
 
 SESSION = requests.Session()
@@ -40,8 +47,10 @@ def safe_filename(url: str) -> str:
 
 def fetch(url: str) -> str | None:
     """Return HTML text or None on error."""
+    count("fetch")
     try:
-        resp = SESSION.get(url, timeout=20)
+        with span("fetch"):
+            resp = SESSION.get(url, timeout=20)
         resp.raise_for_status()
         return resp.text
     except Exception as e:
@@ -151,4 +160,4 @@ def crawl_medlineplus_drugs():
 
 
 if __name__ == "__main__":
-    crawl_medlineplus_drugs()
+    run_main(crawl_medlineplus_drugs)
@@ -0,0 +1,66 @@
+# test_ann_file.py
+"""
+Run from project root (rag/):
+    (venv) python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+pytest.importorskip("faiss")
+
+from utils.ann_file import (  # noqa: E402
+    ALIGN, HEADER_SIZE, IVFReader, build_ivf, parity_check, write_ivf,
+)
+
+N, DIM, NLIST, NPROBE = 3000, 32, 16, 4
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype("float32")
+
+
+@pytest.fixture(scope="module")
+def ivf(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    # Clustered like real embeddings, so a few probed lists find most neighbours
+    centers = rng.standard_normal((NLIST, DIM))
+    vectors = _unit(centers[rng.integers(0, NLIST, N)] + 0.3 * rng.standard_normal((N, DIM)))
+    queries = _unit(vectors[rng.choice(N, 50, replace=False)] + 0.1 * rng.standard_normal((50, DIM)))
+    index, centroids, offsets, row_ids, grouped = build_ivf(vectors, NLIST)
+    path = str(tmp_path_factory.mktemp("ivf") / "embeddings.ivf")
+    write_ivf(path, centroids, offsets, row_ids, grouped, NPROBE)
+    return path, index, vectors, queries
+
+
+def test_layout(ivf):
+    path, _, vectors, _ = ivf
+    reader = IVFReader(path)
+    assert (reader.dim, reader.nlist, reader.ntotal, reader.nprobe) == (DIM, NLIST, N, NPROBE)
+    assert reader.offsets[0] == 0 and reader.offsets[-1] == N
+    assert np.all(np.diff(reader.offsets.astype(np.int64)) >= 0)
+    assert sorted(reader.row_ids.tolist()) == list(range(N))
+    np.testing.assert_array_equal(reader.vectors, vectors[reader.row_ids])
+    expected = HEADER_SIZE
+    for nbytes in (NLIST * DIM * 4, (NLIST + 1) * 4, N * 4, N * DIM * 4):
+        expected = (expected + ALIGN - 1) // ALIGN * ALIGN + nbytes
+    assert os.path.getsize(path) == expected
+
+
+def test_parity_with_faiss(ivf):
+    path, index, vectors, queries = ivf
+    report = parity_check(path, index, vectors, queries, k=10, nprobe=NPROBE)
+    assert report["faiss_parity"] == 1.0
+    assert report["recall@10"] >= 0.9
+
+
+def test_all_lists_is_exact(ivf):
+    path, index, vectors, queries = ivf
+    report = parity_check(path, index, vectors, queries, k=10, nprobe=NLIST)
+    assert report["faiss_parity"] == 1.0
+    assert report["recall@10"] == pytest.approx(1.0)
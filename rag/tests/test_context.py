@@ -0,0 +1,41 @@
+# test_context.py
+"""
+Run from project root (rag/):
+    (venv) python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.context import assemble_context  # noqa: E402
+
+SENTENCES = ("Ibuprofen is used to relieve pain from headaches and arthritis. "
+             "Take it with food or milk to prevent stomach upset. ")
+
+
+def _chunks(n: int = 5) -> list[dict]:
+    return [{"score": 1.0 - 0.1 * i, "id": f"c{i}", "source": f"doc{i}", "chunk_index": 0,
+             "text": SENTENCES * 30} for i in range(n)]
+
+
+def test_no_overlapping_terms_keeps_top_passages():
+    for question in ("आइबुप्रोफेन किस लिए है?", "What is it for?"):
+        passages, stats = assemble_context(question, _chunks(), 1200)
+        assert passages, question
+        assert passages[0]["source"] == "doc0"
+        assert 0 < stats["tokens_after"] <= 1200
+
+
+def test_overlapping_terms_within_budget():
+    passages, stats = assemble_context("What is ibuprofen used for?", _chunks(), 200)
+    assert stats["tokens_after"] <= 200
+    assert "Ibuprofen is used to relieve pain" in passages[0]["text"]
+
+
+def test_sentence_longer_than_budget_is_cut():
+    chunk = {"score": 1.0, "id": "c0", "source": "doc0", "chunk_index": 0, "text": "x" * 10_000}
+    passages, stats = assemble_context("anything", [chunk], 100)
+    assert len(passages) == 1
+    assert stats["tokens_after"] == 100
@@ -0,0 +1,75 @@
+# test_entities.py
+"""
+Run from project root (rag/):
+    (venv) python -m pytest tests
+"""
+
+import os
+import sys
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAG_DIR)
+
+import pytest  # noqa: E402
+
+from utils.entities import ENTITY_FILE, EntityIndex, extract_entity, keep_alias  # noqa: E402
+
+ENTITY_PATH = os.path.join(RAG_DIR, "data_chunks", ENTITY_FILE)
+GENERIC_QUERIES = ("care", "What is care?", "elixir", "effervescent tablets", "10", "ef",
+                   "xr", "kit", "lotion", "07 20 2024", "06 15 2025", "06/15/2025")
+
+BRAND_SECTION = """Tegretol: MedlinePlus Drug Information
+Brand names
+Tegretol
+®
+Tegretol
+®
+-XR
+K
++
+Care
+®
+¶
+Kaon
+®
+Elixir
+Kaochlor
+®
+10%
+Klor-Con
+®
+/EF
+Last Revised -
+"""
+
+
+def test_brand_fragments_are_joined():
+    title, aliases = extract_entity(BRAND_SECTION)
+    assert title == "Tegretol"
+    assert aliases == ["Tegretol", "Tegretol-XR", "K+ Care", "Kaon Elixir",
+                       "Kaochlor 10%", "Klor-Con/EF"]
+
+
+def test_generic_aliases_are_dropped():
+    for name in ("10%", "XR", "/EF", "Elixir", "Effervescent Tablets", "06/15/2025", "07 20 2024"):
+        assert not keep_alias(name), name
+    assert keep_alias("Advil")
+
+
+@pytest.fixture(scope="module")
+def entities():
+    if not os.path.exists(ENTITY_PATH):
+        pytest.skip(f"{ENTITY_PATH} not built (run chunking/02_chunk_texts.py)")
+    return EntityIndex.load(ENTITY_PATH)
+
+
+def test_generic_queries_do_not_resolve(entities):
+    for query in GENERIC_QUERIES:
+        assert entities.resolve(query) is None, query
+
+
+def test_names_resolve(entities):
+    for query, title in (("ibuprofen", "Ibuprofen"), ("What is Advil?", "Ibuprofen"),
+                         ("tegretol-xr", "Carbamazepine")):
+        doc = entities.resolve(query)
+        assert doc is not None and entities.docs[doc]["title"] == title, query
@@ -0,0 +1 @@
+# Shared helpers for the rag/ pipeline scripts.
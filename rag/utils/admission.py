@@ -0,0 +1,134 @@
+# admission.py
+"""
+Admission control for the QA request path: per-stage concurrency limits
+with bounded wait queues, and request deadlines.
+
+    EMBED = Stage("embed", concurrency=2, queue=32)
+
+    with deadline(20.0):                # the whole request, nests (only shrinks)
+        with EMBED.slot():              # waits for one of 2 slots ...
+            encode(...)
+        check_deadline("index_search")  # ... or fails fast between stages
+
+A Stage lets `concurrency` callers in at once (0 = unlimited). Up to
+`queue` more wait for a slot; the next one is refused at once with
+Overloaded instead of joining an ever longer queue. A waiter whose
+deadline passes gives up with DeadlineExceeded. Time spent waiting is
+recorded as a "<stage>_queue" span, refusals as rag_items_total
+{job="shed_<stage>"} / {job="expired_<stage>"}.
+
+The deadline is held in a context variable, so every stage of a request
+(and remaining(), for HTTP timeouts) sees it without passing it along.
+Threads started inside the block do not inherit it.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import count, span
+
+_deadline = contextvars.ContextVar("rag_deadline", default=None)
+
+
+class Overloaded(RuntimeError):
+    """A stage's wait queue is full; the request was refused without waiting."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"{stage}: overloaded, request shed")
+        self.stage = stage
+
+
+class DeadlineExceeded(TimeoutError):
+    def __init__(self, stage: str):
+        super().__init__(f"{stage}: request deadline exceeded")
+        self.stage = stage
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """Requests in the block must finish within `seconds` (None / 0 = no limit)."""
+    if not seconds:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check_deadline(stage: str):
+    left = remaining()
+    if left is not None and left <= 0:
+        count(f"expired_{stage}")
+        raise DeadlineExceeded(stage)
+
+
+class Stage:
+    def __init__(self, name: str, concurrency: int = 0, queue: int = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self._cond = threading.Condition()
+        self.active = self.waiting = 0
+        self.admitted = self.shed = self.expired = self.peak_waiting = 0
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name}: {self.concurrency or 'unlimited'} at once, queue {self.queue})"
+
+    def _acquire(self):
+        check_deadline(self.name)
+        with self._cond:
+            if not self.concurrency or self.active < self.concurrency:
+                self.active += 1
+                self.admitted += 1
+                return
+            if self.waiting >= self.queue:
+                self.shed += 1
+                count(f"shed_{self.name}")
+                raise Overloaded(self.name)
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            with span(f"{self.name}_queue"), self._cond:
+                while self.active >= self.concurrency:
+                    left = remaining()
+                    if left is not None and left <= 0:
+                        self.expired += 1
+                        count(f"expired_{self.name}")
+                        raise DeadlineExceeded(self.name)
+                    self._cond.wait(left)
+                self.active += 1
+                self.admitted += 1
+        finally:
+            with self._cond:
+                self.waiting -= 1
+
+    def _release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the stage's slots for the block (see module docstring)."""
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        return {"concurrency": self.concurrency, "queue": self.queue, "active": self.active,
+                "waiting": self.waiting, "peak_waiting": self.peak_waiting,
+                "admitted": self.admitted, "shed": self.shed, "expired": self.expired}
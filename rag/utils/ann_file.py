@@ -0,0 +1,164 @@
+# ann_file.py
+"""
+IVF search structure for the Node backend, in a flat binary file it can
+read with one Buffer and typed-array views (no FAISS in Node).
+
+Built by export_node_embeddings.py next to medlineplus_embeddings.jsonl.
+Row r of the file is line r of the JSONL export.
+
+Layout (little-endian, every section starts on a 64-byte boundary):
+
+    header, 64 bytes
+        magic           8 bytes   b"RAGIVF01"
+        version         uint32    1
+        dim             uint32    vector dimension d
+        nlist           uint32    number of inverted lists
+        ntotal          uint32    number of vectors n
+        metric          uint32    0 = inner product on unit vectors (cosine)
+        default_nprobe  uint32    lists to scan per query by default
+        (zero padding to 64 bytes)
+    centroids       float32[nlist * d]      list centroids, row-major
+    list_offsets    uint32[nlist + 1]       list i = rows [off[i], off[i+1])
+                                            of the two arrays below
+    row_ids         uint32[n]               JSONL row of each stored vector
+    vectors         float32[n * d]          vectors grouped by list
+
+Search (what the reader below does, and what a Node loader should do):
+    1. score the query against all centroids, keep the nprobe best lists
+    2. score the query against every vector in those lists
+    3. return the k best (score, row_ids[j])
+Cost is O(nlist * d + n * nprobe / nlist * d) instead of O(n * d).
+"""
+
+import struct
+
+import numpy as np
+
+MAGIC = b"RAGIVF01"
+FORMAT_VERSION = 1
+METRIC_INNER_PRODUCT = 0
+HEADER = struct.Struct("<8s6I")
+HEADER_SIZE = 64
+ALIGN = 64
+
+
+def _pad(f, pos: int) -> int:
+    aligned = (pos + ALIGN - 1) // ALIGN * ALIGN
+    f.write(b"\0" * (aligned - pos))
+    return aligned
+
+
+def default_nlist(n: int) -> int:
+    return max(1, min(int(4 * np.sqrt(n)), n // 39 or 1))    # >= 39 points per centroid
+
+
+def build_ivf(vectors: np.ndarray, nlist: int, seed: int = 0):
+    """
+    Train an IVF-Flat index with faiss. Returns (faiss index, centroids,
+    list_offsets, row_ids, grouped vectors).
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    dim = vectors.shape[1]
+    quantizer = faiss.IndexFlatIP(dim)
+    index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    index.cp.seed = seed
+    index.train(vectors)
+    index.add(vectors)
+
+    centroids = quantizer.reconstruct_n(0, nlist)
+    invlists = index.invlists
+    sizes = np.array([invlists.list_size(i) for i in range(nlist)], dtype=np.int64)
+    offsets = np.zeros(nlist + 1, dtype=np.uint32)
+    np.cumsum(sizes, out=offsets[1:])
+    row_ids = np.empty(index.ntotal, dtype=np.uint32)
+    for i in range(nlist):
+        if sizes[i]:
+            ids = faiss.rev_swig_ptr(invlists.get_ids(i), int(sizes[i]))
+            row_ids[offsets[i]:offsets[i + 1]] = ids
+    return index, centroids, offsets, row_ids, vectors[row_ids]
+
+
+def write_ivf(path: str, centroids: np.ndarray, offsets: np.ndarray, row_ids: np.ndarray,
+              vectors: np.ndarray, nprobe: int):
+    nlist, dim = centroids.shape
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, dim, nlist, len(row_ids),
+                            METRIC_INNER_PRODUCT, nprobe).ljust(HEADER_SIZE, b"\0"))
+        pos = HEADER_SIZE
+        for arr in (centroids.astype("<f4"), offsets.astype("<u4"),
+                    row_ids.astype("<u4"), vectors.astype("<f4")):
+            pos = _pad(f, pos)
+            data = np.ascontiguousarray(arr).tobytes()
+            f.write(data)
+            pos += len(data)
+
+
+class IVFReader:
+    """Reference reader: memory-maps a file written by write_ivf."""
+
+    def __init__(self, path: str):
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, dim, nlist, ntotal, metric, nprobe = HEADER.unpack(bytes(mm[:HEADER.size]))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a v{FORMAT_VERSION} IVF file")
+        if metric != METRIC_INNER_PRODUCT:
+            raise ValueError(f"{path}: unsupported metric {metric}")
+        self.dim, self.nlist, self.ntotal, self.nprobe = dim, nlist, ntotal, nprobe
+
+        pos = HEADER_SIZE
+
+        def take(dtype, count):
+            nonlocal pos
+            pos = (pos + ALIGN - 1) // ALIGN * ALIGN
+            arr = mm[pos:pos + count * np.dtype(dtype).itemsize].view(dtype)
+            pos += arr.nbytes
+            return arr
+
+        self.centroids = take("<f4", nlist * dim).reshape(nlist, dim)
+        self.offsets = take("<u4", nlist + 1)
+        self.row_ids = take("<u4", ntotal)
+        self.vectors = take("<f4", ntotal * dim).reshape(ntotal, dim)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int | None = None):
+        """(scores, row ids) of the k best vectors for one query vector."""
+        query = np.asarray(query, dtype="float32").reshape(-1)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        lists = np.argsort(-(self.centroids @ query), kind="stable")[:nprobe]
+
+        rows = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+        if not len(rows):
+            return np.empty(0, dtype="float32"), np.empty(0, dtype=np.int64)
+        scores = self.vectors[rows] @ query
+        best = np.argsort(-scores, kind="stable")[:k]
+        return scores[best], self.row_ids[rows[best]].astype(np.int64)
+
+
+def parity_check(path: str, index, vectors: np.ndarray, queries: np.ndarray,
+                 k: int = 10, nprobe: int | None = None) -> dict:
+    """
+    Compare the file (read back with IVFReader) against the in-memory faiss
+    IVF index it was written from, and both against exact search.
+    """
+    import faiss
+
+    reader = IVFReader(path)
+    nprobe = nprobe or reader.nprobe
+    index.nprobe = nprobe
+    faiss_scores, faiss_ids = index.search(queries, k)
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, exact_ids = exact.search(queries, k)
+
+    same = recall = 0.0
+    for q in range(len(queries)):
+        scores, ids = reader.search(queries[q], k, nprobe)
+        expected = faiss_scores[q][faiss_ids[q] >= 0]
+        # Compare scores, not ids: equal-scoring duplicates may swap places
+        same += len(scores) == len(expected) and np.allclose(scores, expected, atol=1e-5)
+        recall += len(set(ids.tolist()) & set(exact_ids[q].tolist())) / k
+    n = max(len(queries), 1)
+    return {"queries": len(queries), "k": k, "nprobe": nprobe,
+            "faiss_parity": same / n, f"recall@{k}": recall / n}
@@ -0,0 +1,173 @@
+# embedding_models.py
+"""
+Registry of the sentence embedding models the indexes can be built with,
+and the model.json manifest that ties an index version to its model.
+
+    RAG_EMBED_MODEL=minilm-l3 python embeddings/03_build_faiss_index.py
+    RAG_EMBED_MODEL=minilm-l3 python app/04_qa_faiss.py
+
+Each model has its own index namespace, so indexes for several models
+live side by side and can be A/B tested:
+
+    vectorstore/medlineplus_faiss/              default model (minilm)
+    vectorstore/medlineplus_faiss@minilm-l3/    any other registry key
+
+Builders write model.json into every version dir:
+    {"key", "model_id", "node_model", "dim", "normalize", "index_dim",
+     "query_prefix", "fingerprint": {"texts": [...], "vectors": [[...], ...]}}
+dim is the model's output size, index_dim the stored vector size (smaller
+after 03 --reduce; projection.npz maps one to the other). The fingerprint
+is the model's embedding of a few fixed probe texts.
+
+The QA side refuses an index whose manifest names another model, dim or
+normalization (check_manifest, at load), and an encoder whose probe
+embeddings differ from the fingerprint (check_fingerprint, before the
+first dense search): same name, different weights or a different
+pooling config would otherwise return silently wrong neighbours.
+Indexes built before manifests existed load with a warning.
+"""
+
+import json
+import os
+
+import numpy as np
+
+MANIFEST_NAME = "model.json"
+DEFAULT_MODEL = "minilm"
+MULTI_MODEL = "multilingual-minilm"
+PROBE_TEXTS = (
+    "What are the side effects of ibuprofen?",
+    "Malaria is spread by the bite of an infected mosquito.",
+    "Take this medicine with a full glass of water.",
+    "Symptoms of a broken bone include pain and swelling.",
+)
+FINGERPRINT_MIN_COSINE = 0.99    # same model on other hardware / BLAS stays > 0.999
+
+
+class ModelMismatchError(ValueError):
+    pass
+
+
+class EmbeddingModel:
+    def __init__(self, key: str, model_id: str, dim: int, normalize: bool = True,
+                 query_prefix: str = "", node_model: str | None = None):
+        self.key = key
+        self.model_id = model_id        # sentence-transformers name
+        self.dim = dim
+        self.normalize = normalize      # inner product == cosine
+        self.query_prefix = query_prefix
+        self.node_model = node_model    # ONNX export the Node backend loads
+
+    def __repr__(self) -> str:
+        return f"EmbeddingModel({self.key}: {self.model_id}, dim={self.dim})"
+
+
+MODELS = {m.key: m for m in (
+    EmbeddingModel("minilm", "sentence-transformers/all-MiniLM-L6-v2", 384,
+                   node_model="Xenova/all-MiniLM-L6-v2"),
+    # ~2x faster to encode than minilm (3 layers instead of 6)
+    EmbeddingModel("minilm-l3", "sentence-transformers/paraphrase-MiniLM-L3-v2", 384,
+                   node_model="Xenova/paraphrase-MiniLM-L3-v2"),
+    EmbeddingModel("bge-small", "BAAI/bge-small-en-v1.5", 384,
+                   query_prefix="Represent this sentence for searching relevant passages: ",
+                   node_model="Xenova/bge-small-en-v1.5"),
+    EmbeddingModel("multilingual-minilm",
+                   "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", 384,
+                   node_model="Xenova/paraphrase-multilingual-MiniLM-L12-v2"),
+)}
+
+
+def get_model(key: str) -> EmbeddingModel:
+    if key not in MODELS:
+        raise ValueError(f"unknown embedding model {key!r}, expected one of {sorted(MODELS)}")
+    return MODELS[key]
+
+
+def selected_model(default: str = DEFAULT_MODEL) -> EmbeddingModel:
+    """The model picked with RAG_EMBED_MODEL (a registry key)."""
+    return get_model(os.environ.get("RAG_EMBED_MODEL", default))
+
+
+def index_root(base: str, spec: EmbeddingModel, default: str = DEFAULT_MODEL) -> str:
+    """Index namespace of a model: `base` for the default model, else base@key."""
+    return base if spec.key == default else f"{base}@{spec.key}"
+
+
+def encode(encoder, spec: EmbeddingModel, texts: list[str], **kwargs) -> np.ndarray:
+    return encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=spec.normalize,
+                          **kwargs).astype("float32")
+
+
+def write_manifest(version_dir: str, spec: EmbeddingModel, encoder, index_dim: int,
+                   file_name: str = MANIFEST_NAME):
+    probe = encode(encoder, spec, list(PROBE_TEXTS))
+    manifest = {
+        "key": spec.key,
+        "model_id": spec.model_id,
+        "node_model": spec.node_model,
+        "dim": int(probe.shape[1]),
+        "normalize": spec.normalize,
+        "index_dim": int(index_dim),
+        "query_prefix": spec.query_prefix,
+        "fingerprint": {"texts": list(PROBE_TEXTS),
+                        "vectors": np.round(probe, 6).tolist()},
+    }
+    path = os.path.join(version_dir, file_name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    print(f"[MODEL] {spec.key} ({spec.model_id}, dim {manifest['dim']} → index "
+          f"{index_dim}) → {path}")
+
+
+def read_manifest(version_dir: str) -> dict | None:
+    path = os.path.join(version_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_manifest(manifest: dict | None, spec: EmbeddingModel, index_dim: int, where: str,
+                   projected_from: int | None = None):
+    """
+    Raise ModelMismatchError unless the index at `where` was built for `spec`.
+    projected_from: input dim of the version's projection.npz (03 --reduce),
+    the model dim to expect when there is no manifest.
+    """
+    if manifest is None:
+        model_dim = index_dim if projected_from is None else projected_from
+        if model_dim != spec.dim:
+            what = "index" if projected_from is None else "projection input"
+            raise ModelMismatchError(f"{where}: {what} dim {model_dim} but {spec.model_id} "
+                                     f"outputs {spec.dim} (and no {MANIFEST_NAME})")
+        print(f"[MODEL] {where}: no {MANIFEST_NAME} (built before manifests), "
+              f"assuming {spec.model_id}")
+        return
+    problems = []
+    if manifest["model_id"] != spec.model_id:
+        problems.append(f"built with {manifest['model_id']}, querying with {spec.model_id}")
+    if manifest["dim"] != spec.dim:
+        problems.append(f"model dim {manifest['dim']} != {spec.dim}")
+    if manifest["normalize"] != spec.normalize:
+        problems.append(f"normalize={manifest['normalize']} != {spec.normalize}")
+    if manifest["index_dim"] != index_dim:
+        problems.append(f"manifest index dim {manifest['index_dim']} != index dim {index_dim}")
+    if problems:
+        raise ModelMismatchError(f"{where}: " + "; ".join(problems))
+
+
+def check_fingerprint(manifest: dict | None, spec: EmbeddingModel, encoder):
+    """Raise ModelMismatchError if `encoder` does not reproduce the index's probe vectors."""
+    if manifest is None:
+        return
+    fp = manifest["fingerprint"]
+    expected = np.asarray(fp["vectors"], dtype="float32")
+    got = encode(encoder, spec, fp["texts"])
+    if got.shape != expected.shape:
+        raise ModelMismatchError(f"encoder outputs {got.shape[1]} dims, "
+                                 f"index fingerprint has {expected.shape[1]}")
+    cos = np.sum(got * expected, axis=1) / np.maximum(
+        np.linalg.norm(got, axis=1) * np.linalg.norm(expected, axis=1), 1e-12)
+    if cos.min() < FINGERPRINT_MIN_COSINE:
+        raise ModelMismatchError(f"encoder {spec.model_id} does not match the index "
+                                 f"fingerprint (min probe cosine {cos.min():.4f})")
@@ -0,0 +1,211 @@
+# entities.py
+"""
+Exact name lookup for MedlinePlus drug and encyclopedia pages.
+
+Every such page covers one named entity. When chunking, we collect
+names from the page:
+    - the title             "Ibuprofen: MedlinePlus Drug Information"
+    - drug brand names      lines under the last "Brand names" heading
+    - drug other names      lines under the last "Other names" heading
+    - alternative names     "Alternative Names" line of encyclopedia pages
+                            ("Bone - broken; Fracture; Stress fracture")
+The cleaned pages put every ®, ™ and ¶ mark on its own line, which splits
+brand names ("K-Lyte/CL", "®", "50 Effervescent Tablets"); fragments are
+joined back (_join_fragments) and aliases that would match ordinary
+queries on their own (dosage forms, numbers, dates, names with fewer
+than MIN_ALIAS_LETTERS letters) are dropped (keep_alias).
+The result is written to data_chunks/entities.json as a hash map:
+normalized name -> [[doc, is_title], ...], and for each doc its source,
+title, chunk id prefix and chunk count.
+
+A query that normalizes to exactly one known entity ("ibuprofen",
+"What is Advil?") resolves to that page's chunks with two dict lookups,
+so no embedding or vector scan is needed. A name shared by several
+pages is resolved only if exactly one page has it as its title, or if
+no page has it as a title and it is an alias of one page only.
+Ambiguous and free-text queries ("ibuprofen side effects") return None,
+and the caller uses dense search.
+"""
+
+import json
+import re
+
+ENTITY_FILE = "entities.json"
+
+TITLE_RE = re.compile(r"^(.+?): MedlinePlus (?:Drug Information|Medical Encyclopedia)$")
+SECTION_END = frozenset((
+    "Brand names of combination products", "Other names", "Last Revised -",
+    "Brand names", "IMPORTANT WARNING:",
+))
+MARKS = frozenset(("®", "¶", "™"))
+ITEM_END = "¶"          # footnote mark after a whole brand name
+MIN_NAME_CHARS = 3
+MAX_NAME_CHARS = 60
+MIN_ALIAS_LETTERS = 3
+CONTINUATION_START = tuple("+/-%0123456789")
+# Generic words that follow a brand name ("Kaon® Elixir"); never an alias alone
+DOSAGE_FORMS = frozenset((
+    "capsule", "capsules", "chewable", "concentrate", "cream", "drops", "effervescent",
+    "elixir", "emulsion", "filmtab", "foam", "gel", "granules", "inhaler", "injection",
+    "kit", "liquid", "lotion", "lozenge", "ointment", "pack", "patch", "powder",
+    "shampoo", "solution", "spray", "suppositories", "suspension", "syrup", "tablet",
+    "tablets", "wash",
+))
+DATE_RE = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}")
+
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+FILLER_RE = re.compile(
+    r"^(?:what (?:is|are)|tell me about|info(?:rmation)? (?:on|about)|about|define)\s+(?:an?\s+|the\s+)?"
+)
+
+
+def normalize(name: str) -> str:
+    """Lowercase, punctuation -> single spaces: "Bone - broken" -> "bone broken"."""
+    return NON_WORD_RE.sub(" ", name.lower()).strip()
+
+
+def normalize_query(query: str) -> str:
+    return normalize(FILLER_RE.sub("", query.lower().strip()))
+
+
+def keep_alias(name: str) -> bool:
+    """False for aliases too generic to resolve a query on their own."""
+    if DATE_RE.search(name):
+        return False
+    key = normalize(name)
+    words = key.split()
+    if sum(c.isalpha() for c in key) < MIN_ALIAS_LETTERS:
+        return False        # "10%", "XR", "/EF", "5-FU"
+    return not all(w.isdigit() or w in DOSAGE_FORMS for w in words)
+
+
+def _is_continuation(name: str, line: str, after_mark: bool) -> bool:
+    """Does `line` continue the brand name `name` ("K" "+" "Care", "Tegretol" "®" "-XR")?"""
+    if name.endswith("+") or line.startswith(CONTINUATION_START):
+        return True
+    # "Kaon® Elixir", "K-Lyte® DS Effervescent Tablets"; a plain word after a
+    # mark is the next brand ("Carbatrol®", "Epitol®")
+    return after_mark and any(w in DOSAGE_FORMS for w in normalize(line).split())
+
+
+def _join_fragments(lines: list[str]) -> list[str]:
+    names = []
+    current = None
+    after_mark = False
+    for line in lines:
+        if line in MARKS:
+            after_mark = line != ITEM_END and current is not None
+            if line == ITEM_END and current is not None:
+                names.append(current)
+                current = None
+            continue
+        if current is not None and _is_continuation(current, line, after_mark):
+            glue = "" if line.startswith(("+", "/", "-")) or current.endswith(("/", "-")) else " "
+            current += glue + line
+        else:
+            if current is not None:
+                names.append(current)
+            current = line
+        after_mark = False
+    if current is not None:
+        names.append(current)
+    return names
+
+
+def _section_lines(lines: list[str], heading: str) -> list[str]:
+    """Names after the LAST `heading` line (the first is the table of contents)."""
+    starts = [i for i, line in enumerate(lines) if line == heading]
+    if not starts:
+        return []
+    section = []
+    for line in lines[starts[-1] + 1:]:
+        if line in SECTION_END or len(line) > MAX_NAME_CHARS:
+            break
+        section.append(line)
+    return [n for n in _join_fragments(section) if len(n) >= MIN_NAME_CHARS]
+
+
+def extract_entity(text: str) -> tuple[str, list[str]] | None:
+    """(title, aliases) of a MedlinePlus drug / encyclopedia page, else None."""
+    lines = text.splitlines()
+    match = TITLE_RE.match(lines[0].strip()) if lines else None
+    if not match:
+        return None
+
+    aliases = _section_lines(lines, "Brand names") + _section_lines(lines, "Other names")
+    for i, line in enumerate(lines[:-1]):
+        if line == "Alternative Names":
+            aliases.extend(a.strip() for a in lines[i + 1].split(";") if a.strip())
+            break
+    return match.group(1).strip(), [a for a in aliases if keep_alias(a)]
+
+
+class EntityIndex:
+    def __init__(self, docs: list[dict], names: dict[str, list[list[int]]]):
+        self.docs = docs        # [{"source", "title", "id_prefix", "n_chunks"}]
+        self.names = names      # normalized name -> [[doc, is_title], ...]
+        self._rows = None
+
+    @classmethod
+    def build(cls, entries: list[dict]) -> "EntityIndex":
+        """entries: [{"source", "title", "aliases", "id_prefix", "n_chunks"}]"""
+        docs = []
+        names: dict[str, list[list[int]]] = {}
+        for entry in entries:
+            doc = len(docs)
+            docs.append({k: entry[k] for k in ("source", "title", "id_prefix", "n_chunks")})
+            seen = set()
+            for name, is_title in [(entry["title"], 1)] + [(a, 0) for a in entry["aliases"]]:
+                key = normalize(name)
+                if key and key not in seen:
+                    seen.add(key)
+                    names.setdefault(key, []).append([doc, is_title])
+        return cls(docs, names)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"docs": self.docs, "names": self.names}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "EntityIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["docs"], data["names"])
+
+    def resolve(self, query: str) -> int | None:
+        """Doc number the query names unambiguously, else None."""
+        hits = self.names.get(normalize_query(query))
+        if not hits:
+            return None
+        titles = {doc for doc, is_title in hits if is_title}
+        if len(titles) == 1:
+            return titles.pop()
+        docs = {doc for doc, _ in hits}
+        return docs.pop() if len(docs) == 1 and not titles else None
+
+    def chunk_ids(self, doc: int) -> list[str]:
+        d = self.docs[doc]
+        return [f"{d['id_prefix']}-{i}" for i in range(d["n_chunks"])]
+
+    def bind(self, row_of: dict) -> "EntityIndex":
+        """
+        Precompute each doc's index rows. row_of: chunk id -> row; ids that
+        dedup removed must already map to their canonical copy's row.
+        """
+        rows = []
+        for doc in range(len(self.docs)):
+            doc_rows = []
+            for cid in self.chunk_ids(doc):
+                row = row_of.get(cid)
+                if row is not None and row not in doc_rows:
+                    doc_rows.append(row)
+            rows.append(doc_rows)
+        self._rows = rows
+        return self
+
+    def lookup(self, query: str) -> list[int] | None:
+        """Index rows of the named entity's chunks (in page order), or None."""
+        doc = self.resolve(query)
+        if doc is None or self._rows is None or not self._rows[doc]:
+            return None
+        return self._rows[doc]
@@ -0,0 +1,150 @@
+# index_versions.py
+"""
+Versioned index directories with an atomic "current" pointer.
+
+    vectorstore/medlineplus_faiss/
+        CURRENT                   name of the live version (one line)
+        versions/<version>/       index.faiss (or shards.json + shards/),
+                                  metadata.jsonl, metadata.store, aliases.json
+
+Builders write a complete new version dir, then publish() it by
+os.replace()-ing CURRENT, so a reader sees either the old or the new
+pair, never a torn one. Readers resolve current_dir() once per load.
+An index root without CURRENT (built before versioning) is its own
+version dir.
+
+IndexWatcher polls CURRENT from a QA process, loads a newly published
+version in the background and swaps it into a LazyResource in one
+assignment; requests take one get() per search, so each is served
+entirely by the old or the new version.
+"""
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+CURRENT_NAME = "CURRENT"
+VERSIONS_NAME = "versions"
+LEGACY_VERSION = "(unversioned)"
+
+
+def versions_dir(root: str) -> str:
+    return os.path.join(root, VERSIONS_NAME)
+
+
+def new_version(root: str) -> tuple[str, str]:
+    """(name, dir) of a fresh, empty version dir; names sort by build time."""
+    name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(versions_dir(root), name)
+    os.makedirs(path)
+    return name, path
+
+
+def current_version(root: str) -> str | None:
+    try:
+        with open(os.path.join(root, CURRENT_NAME), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_dir(root: str) -> str:
+    name = current_version(root)
+    return os.path.join(versions_dir(root), name) if name else root
+
+
+def has_index(index_dir: str) -> bool:
+    """True if index_dir (a root or a version dir) holds a flat or sharded index."""
+    path = current_dir(index_dir)
+    return (os.path.exists(os.path.join(path, "index.faiss"))
+            or os.path.exists(os.path.join(path, "shards.json")))
+
+
+def publish(root: str, name: str):
+    """Atomically point CURRENT at versions/<name>."""
+    tmp = os.path.join(root, f".{CURRENT_NAME}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_NAME))
+    print(f"[VERSION] Published {name} → {os.path.join(root, CURRENT_NAME)}")
+
+
+def gc_versions(root: str, keep: int = 2) -> list[str]:
+    """
+    Delete all but the `keep` newest versions up to and including CURRENT.
+    Versions newer than CURRENT (a build in progress) are never touched.
+    Processes still serving a deleted version keep working: the index is
+    in memory and the memory-mapped store stays valid until unmapped.
+    """
+    current = current_version(root)
+    if current is None:
+        return []
+    names = sorted(os.listdir(versions_dir(root)))
+    older = [n for n in names if n <= current]
+    removed = older[:max(len(older) - max(keep, 1), 0)]
+    for name in removed:
+        shutil.rmtree(os.path.join(versions_dir(root), name), ignore_errors=True)
+    if removed:
+        print(f"[VERSION] Removed {len(removed)} old version(s): {', '.join(removed)}")
+    return removed
+
+
+class IndexWatcher:
+    """
+    Poll root/CURRENT every `interval` seconds; when it moves, build the new
+    value with loader(root) off the request path and swap it into `resource`.
+    loader must return an object with a `.version` attribute.
+    The replaced value's close() (if any) runs after `grace` seconds, once
+    requests that already hold it are done.
+    """
+
+    def __init__(self, root: str, resource, loader, interval: float = 10.0,
+                 grace: float = 60.0):
+        self.root = root
+        self.resource = resource
+        self.loader = loader
+        self.interval = interval
+        self.grace = grace
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "IndexWatcher":
+        self._thread = threading.Thread(target=self._run, name=f"watch-{self.resource.name}",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self) -> bool:
+        """Swap in the published version if it is new. Returns True on swap."""
+        published = current_version(self.root)
+        if published is None or not self.resource.loaded:
+            return False
+        live = self.resource.get().version
+        if published == live:
+            return False
+
+        t0 = time.perf_counter()
+        fresh = self.loader(self.root)
+        old = self.resource.swap(fresh)
+        print(f"[SWAP] {self.resource.name}: {live} → {fresh.version} "
+              f"(loaded in {time.perf_counter() - t0:.2f}s)")
+        if hasattr(old, "close"):
+            closer = threading.Timer(self.grace, old.close)
+            closer.daemon = True
+            closer.start()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Half-written or deleted version: keep serving the old one
+                print(f"[SWAP ERROR] {self.resource.name}: {e}")
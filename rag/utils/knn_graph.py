@@ -0,0 +1,282 @@
+# knn_graph.py
+"""
+Precomputed k-nearest-neighbour graph of the index's chunks, rolled up to
+documents, for "related articles" without extra searches at serve time.
+
+Built offline (embeddings/03c_build_knn_graph.py, or 03 --knn K) by a
+batched self-search of every index vector, and stored next to the index
+as knn_graph.npz, in CSR form:
+
+    chunk level   offsets int64[n+1], neighbors int32[nnz], scores float32[nnz]
+                  neighbours of row r: neighbors[offsets[r]:offsets[r+1]]
+    doc level     sources str[m], chunk_doc int32[n],
+                  doc_offsets int64[m+1], doc_neighbors int32, doc_scores float32
+                  (doc-doc score = best chunk-chunk similarity between them)
+    rebuild keys  chunk_ids str[n], text_crc uint32[n], k, space
+
+related(source) is two dict / array reads.
+
+Incremental build: a previous graph in the same vector space is reused.
+Rows whose chunk id and text are unchanged keep their neighbour lists,
+merged with a search against only the new or changed chunks. Rows that
+are new, changed, or lost a neighbour to a removed chunk are searched
+against the whole index. With a flat (exact) index the result equals a
+full rebuild.
+"""
+
+import os
+import time
+import zlib
+
+import numpy as np
+
+from utils.embedding_models import read_manifest
+from utils.index_versions import versions_dir
+from utils.projection import FILE_NAME as PROJECTION_NAME
+
+GRAPH_NAME = "knn_graph.npz"
+DEFAULT_K = 10
+DEFAULT_RELATED = 10
+SEARCH_BATCH = 4096
+
+
+def text_crc(texts: list[str]) -> np.ndarray:
+    return np.array([zlib.crc32(t.encode("utf-8")) for t in texts], dtype=np.uint32)
+
+
+def _csr(lists_ids: np.ndarray, lists_scores: np.ndarray):
+    """(n, k) id / score arrays with -1 padding -> CSR offsets, ids, scores."""
+    valid = lists_ids >= 0
+    offsets = np.zeros(len(lists_ids) + 1, dtype=np.int64)
+    np.cumsum(valid.sum(axis=1), out=offsets[1:])
+    return offsets, lists_ids[valid].astype(np.int32), lists_scores[valid].astype(np.float32)
+
+
+def search_rows(vectors: np.ndarray, rows: np.ndarray, k: int, base_rows: np.ndarray | None = None):
+    """
+    Exact top-k (excluding the row itself) of vectors[rows] among
+    vectors[base_rows] (default: all rows). Returns (ids, scores), each
+    (len(rows), k), ids are global rows, -1 padded. faiss runs each batch
+    multi-threaded (OpenMP).
+    """
+    import faiss
+
+    base = np.arange(len(vectors)) if base_rows is None else base_rows
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(np.ascontiguousarray(vectors[base]))
+    kk = min(k + 1, len(base))
+
+    out_ids = np.full((len(rows), k), -1, dtype=np.int64)
+    out_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    for start in range(0, len(rows), SEARCH_BATCH):
+        batch = rows[start:start + SEARCH_BATCH]
+        scores, local = index.search(np.ascontiguousarray(vectors[batch]), kk)
+        ids = np.where(local >= 0, base[np.maximum(local, 0)], -1)
+        for j, row in enumerate(batch):
+            keep = (ids[j] != row) & (ids[j] >= 0)
+            n = min(int(keep.sum()), k)
+            out_ids[start + j, :n] = ids[j][keep][:n]
+            out_scores[start + j, :n] = scores[j][keep][:n]
+    return out_ids, out_scores
+
+
+def _merge(a_ids, a_scores, b_ids, b_scores, k: int):
+    ids = np.hstack([a_ids, b_ids])
+    scores = np.where(ids < 0, -np.inf, np.hstack([a_scores, b_scores]))
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def rollup(offsets, neighbors, scores, chunk_doc: np.ndarray, n_docs: int, per_doc: int):
+    """Doc-level CSR: for every doc, the best-scoring other docs its chunks point at."""
+    src = np.repeat(chunk_doc, np.diff(offsets))
+    dst = chunk_doc[neighbors]
+    keep = src != dst
+    src, dst, sc = src[keep].astype(np.int64), dst[keep].astype(np.int64), scores[keep]
+
+    # best score per (src, dst) pair, then per src the per_doc best dsts
+    order = np.lexsort((-sc, dst, src))
+    src, dst, sc = src[order], dst[order], sc[order]
+    first = np.ones(len(src), dtype=bool)
+    first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst, sc = src[first], dst[first], sc[first]
+
+    order = np.lexsort((-sc, src))
+    src, dst, sc = src[order], dst[order], sc[order]
+    starts = np.searchsorted(src, np.arange(n_docs))
+    rank = np.arange(len(src)) - starts[src]
+    keep = rank < per_doc
+    src, dst, sc = src[keep], dst[keep], sc[keep]
+
+    doc_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_docs), out=doc_offsets[1:])
+    return doc_offsets, dst.astype(np.int32), sc.astype(np.float32)
+
+
+class KnnGraph:
+    def __init__(self, arrays: dict):
+        self.k = int(arrays["k"])
+        self.space = str(arrays["space"])
+        self.chunk_ids = arrays["chunk_ids"]
+        self.text_crc = arrays["text_crc"]
+        self.offsets = arrays["offsets"]
+        self.neighbors = arrays["neighbors"]
+        self.scores = arrays["scores"]
+        self.sources = arrays["sources"]
+        self.chunk_doc = arrays["chunk_doc"]
+        self.doc_offsets = arrays["doc_offsets"]
+        self.doc_neighbors = arrays["doc_neighbors"]
+        self.doc_scores = arrays["doc_scores"]
+        self._doc_of = {str(s): i for i, s in enumerate(self.sources)}
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def chunk_neighbors(self, row: int):
+        """(rows, scores) of a chunk's nearest chunks, best first."""
+        lo, hi = self.offsets[row], self.offsets[row + 1]
+        return self.neighbors[lo:hi], self.scores[lo:hi]
+
+    def related(self, source: str, n: int = 5) -> list[tuple[str, float]]:
+        """[(source, score)] of the documents most similar to `source`."""
+        doc = self._doc_of.get(source)
+        if doc is None:
+            return []
+        lo = self.doc_offsets[doc]
+        hi = min(self.doc_offsets[doc + 1], lo + n)
+        return [(str(self.sources[d]), float(s))
+                for d, s in zip(self.doc_neighbors[lo:hi], self.doc_scores[lo:hi])]
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, k=np.array(self.k), space=np.array(self.space),
+                 chunk_ids=self.chunk_ids, text_crc=self.text_crc,
+                 offsets=self.offsets, neighbors=self.neighbors, scores=self.scores,
+                 sources=self.sources, chunk_doc=self.chunk_doc, doc_offsets=self.doc_offsets,
+                 doc_neighbors=self.doc_neighbors, doc_scores=self.doc_scores)
+        os.replace(tmp, path)      # readers never see a half-written graph
+
+    @classmethod
+    def load(cls, path: str) -> "KnnGraph":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def padded(self) -> tuple[np.ndarray, np.ndarray]:
+        """Chunk lists as (n, k) ids / scores, -1 / -inf padded."""
+        ids = np.full((len(self), self.k), -1, dtype=np.int64)
+        scores = np.full((len(self), self.k), -np.inf, dtype=np.float32)
+        lengths = np.diff(self.offsets)
+        rows = np.repeat(np.arange(len(self)), lengths)
+        cols = np.arange(len(self.neighbors)) - np.repeat(self.offsets[:-1], lengths)
+        ids[rows, cols] = self.neighbors
+        scores[rows, cols] = self.scores
+        return ids, scores
+
+
+def build_graph(vectors: np.ndarray, chunk_ids: list[str], texts: list[str],
+                sources: list[str], space: str, k: int = DEFAULT_K,
+                per_doc: int = DEFAULT_RELATED, previous: KnnGraph | None = None):
+    """
+    Graph for index rows 0..n-1 (vectors[r] is row r). Reuses `previous`
+    when it was built with the same k in the same vector space.
+    Returns (KnnGraph, {"full": rows searched fully, "merged": rows merged}).
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n = len(vectors)
+    crc = text_crc(texts)
+    ids = np.full((n, k), -1, dtype=np.int64)
+    scores = np.full((n, k), -np.inf, dtype=np.float32)
+
+    reuse = previous is not None and previous.k == k and previous.space == space
+    if reuse:
+        old_row = {str(cid): r for r, cid in enumerate(previous.chunk_ids)}
+        old_of_new = np.full(n, -1, dtype=np.int64)
+        for r, cid in enumerate(chunk_ids):
+            o = old_row.get(cid)
+            if o is not None and previous.text_crc[o] == crc[r]:
+                old_of_new[r] = o
+        new_of_old = np.full(len(previous), -1, dtype=np.int64)
+        kept = old_of_new >= 0
+        new_of_old[old_of_new[kept]] = np.nonzero(kept)[0]
+
+        old_ids, old_scores = previous.padded()
+        remapped = np.where(old_ids >= 0, new_of_old[np.maximum(old_ids, 0)], -1)
+        # A neighbour that was removed or changed leaves a hole only a full search can fill
+        broken = ((old_ids >= 0) & (remapped < 0)).any(axis=1)
+        merge_rows = np.nonzero(kept)[0][~broken[old_of_new[kept]]]
+        full_rows = np.setdiff1d(np.arange(n), merge_rows)
+    else:
+        merge_rows = np.empty(0, dtype=np.int64)
+        full_rows = np.arange(n)
+
+    if len(full_rows):
+        ids[full_rows], scores[full_rows] = search_rows(vectors, full_rows, k)
+    if len(merge_rows):
+        ids[merge_rows] = remapped[old_of_new[merge_rows]]
+        scores[merge_rows] = old_scores[old_of_new[merge_rows]]
+        dirty = np.nonzero(old_of_new < 0)[0]       # new or changed chunks
+        if len(dirty):
+            d_ids, d_scores = search_rows(vectors, merge_rows, k, base_rows=dirty)
+            ids[merge_rows], scores[merge_rows] = _merge(ids[merge_rows], scores[merge_rows],
+                                                         d_ids, d_scores, k)
+
+    offsets, neighbors, flat_scores = _csr(ids, scores)
+    doc_names = sorted(set(sources))
+    doc_index = {s: i for i, s in enumerate(doc_names)}
+    chunk_doc = np.array([doc_index[s] for s in sources], dtype=np.int32)
+    doc_offsets, doc_neighbors, doc_scores = rollup(offsets, neighbors, flat_scores,
+                                                    chunk_doc, len(doc_names), per_doc)
+    graph = KnnGraph({
+        "k": k, "space": space,
+        "chunk_ids": np.array(chunk_ids), "text_crc": crc,
+        "offsets": offsets, "neighbors": neighbors, "scores": flat_scores,
+        "sources": np.array(doc_names), "chunk_doc": chunk_doc,
+        "doc_offsets": doc_offsets, "doc_neighbors": doc_neighbors, "doc_scores": doc_scores,
+    })
+    return graph, {"full": int(len(full_rows)), "merged": int(len(merge_rows))}
+
+
+# ----- version dirs -----
+def space_of(version_dir: str, dim: int) -> str:
+    """Identifies the vector space of an index: model, stored dim, projection."""
+    manifest = read_manifest(version_dir)
+    model = manifest["model_id"] if manifest else "unknown-model"
+    projection = os.path.join(version_dir, PROJECTION_NAME)
+    proj = "none"
+    if os.path.exists(projection):
+        with open(projection, "rb") as f:
+            proj = f"{zlib.crc32(f.read()):08x}"
+    return f"{model}|dim={dim}|projection={proj}"
+
+
+def previous_graph(root: str, exclude: str | None) -> tuple[str, KnnGraph] | tuple[None, None]:
+    """(version, graph) of the newest other version of `root` that has a graph."""
+    vdir = versions_dir(root)
+    if not os.path.isdir(vdir):
+        return None, None
+    for name in sorted(os.listdir(vdir), reverse=True):
+        path = os.path.join(vdir, name, GRAPH_NAME)
+        if name != exclude and os.path.exists(path):
+            try:
+                return name, KnnGraph.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[KNN] Ignoring unreadable graph {path}: {e}")
+    return None, None
+
+
+def build_for_version(root: str, version: str | None, version_dir: str, vectors: np.ndarray,
+                      chunk_ids: list[str], texts: list[str], sources: list[str],
+                      k: int = DEFAULT_K, per_doc: int = DEFAULT_RELATED,
+                      incremental: bool = True) -> KnnGraph:
+    """Build (incrementally if possible) and save version_dir/knn_graph.npz."""
+    base_version, previous = previous_graph(root, version) if incremental else (None, None)
+    t0 = time.perf_counter()
+    graph, stats = build_graph(vectors, chunk_ids, texts, sources,
+                               space_of(version_dir, vectors.shape[1]), k, per_doc, previous)
+    path = os.path.join(version_dir, GRAPH_NAME)
+    graph.save(path)
+    reused = f", reused {base_version}" if stats["merged"] else ""
+    print(f"[KNN] {len(graph)} chunks x k={k}, {len(graph.sources)} docs in "
+          f"{time.perf_counter() - t0:.1f}s ({stats['full']} searched, "
+          f"{stats['merged']} merged{reused}) → {path}")
+    return graph
@@ -0,0 +1,156 @@
+# metadata_store.py
+"""
+Columnar chunk metadata: one file, memory-mapped, no per-row Python objects.
+
+Replaces the list-of-dicts metadata + {id: text} map in the QA process.
+Per row we keep:
+    chunk_index   int32
+    source        int32 code into a deduplicated source table
+    id, text      UTF-8 bytes addressed by int64 offset arrays
+
+File layout (metadata.store):
+    b"RAGMETA1" | uint64 header length | JSON header | arrays
+The header maps every array name to {dtype, shape, offset}; arrays start
+on 64-byte boundaries so they can be viewed straight out of the mmap.
+
+    store = MetadataStore.load(path)     # O(1), pages loaded on access
+    store[i]        -> {"id", "source", "chunk_index"}
+    store.text(i)   -> chunk text
+"""
+
+import json
+
+import numpy as np
+
+MAGIC = b"RAGMETA1"
+ALIGN = 64
+
+
+def _pack_strings(strings: list[str]):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+class MetadataStore:
+    def __init__(self, arrays: dict):
+        self._a = arrays
+        self._chunk_index = arrays["chunk_index"]
+        self._source_code = arrays["source_code"]
+        self._id_offsets = arrays["id_offsets"]
+        self._id_bytes = arrays["id_bytes"]
+        self._text_offsets = arrays.get("text_offsets")
+        self._text_bytes = arrays.get("text_bytes")
+        # The source table is tiny (one entry per document), decode it once
+        offsets, data = arrays["source_offsets"], arrays["source_bytes"]
+        self._sources = [
+            bytes(data[offsets[i]:offsets[i + 1]]).decode("utf-8")
+            for i in range(len(offsets) - 1)
+        ]
+        self._positions = None
+
+    # ----- build / save / load -----
+    @classmethod
+    def from_records(cls, records: list[dict], texts: list[str] | None = None):
+        """records: [{"id", "source", "chunk_index"}], texts: same order (optional)"""
+        source_codes: dict[str, int] = {}
+        codes = np.fromiter(
+            (source_codes.setdefault(r["source"], len(source_codes)) for r in records),
+            dtype=np.int32, count=len(records),
+        )
+        arrays = {
+            "chunk_index": np.fromiter((r["chunk_index"] for r in records),
+                                       dtype=np.int32, count=len(records)),
+            "source_code": codes,
+        }
+        arrays["source_offsets"], arrays["source_bytes"] = _pack_strings(list(source_codes))
+        arrays["id_offsets"], arrays["id_bytes"] = _pack_strings([r["id"] for r in records])
+        if texts is not None:
+            arrays["text_offsets"], arrays["text_bytes"] = _pack_strings(texts)
+        return cls(arrays)
+
+    def save(self, path: str):
+        header = {}
+        offset = 0
+        for name, arr in self._a.items():
+            offset = (offset + ALIGN - 1) // ALIGN * ALIGN
+            header[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += arr.nbytes
+        header_bytes = json.dumps(header).encode("utf-8")
+        base = len(MAGIC) + 8 + len(header_bytes)
+        base = (base + ALIGN - 1) // ALIGN * ALIGN
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header_bytes)).tobytes())
+            f.write(header_bytes)
+            for name, arr in self._a.items():
+                f.seek(base + header[name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+
+    @classmethod
+    def load(cls, path: str):
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a metadata store")
+        pos = len(MAGIC)
+        header_len = int(mm[pos:pos + 8].view(np.uint64)[0])
+        pos += 8
+        header = json.loads(bytes(mm[pos:pos + header_len]).decode("utf-8"))
+        base = (pos + header_len + ALIGN - 1) // ALIGN * ALIGN
+
+        arrays = {}
+        for name, spec in header.items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            start = base + spec["offset"]
+            arrays[name] = mm[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+        return cls(arrays)
+
+    # ----- accessors -----
+    def __len__(self) -> int:
+        return len(self._chunk_index)
+
+    def __getitem__(self, i: int) -> dict:
+        return {"id": self.id(i), "source": self.source(i), "chunk_index": self.chunk_index(i)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def has_texts(self) -> bool:
+        return self._text_offsets is not None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._a.values())
+
+    def id(self, i: int) -> str:
+        o = self._id_offsets
+        return bytes(self._id_bytes[o[i]:o[i + 1]]).decode("utf-8")
+
+    def source(self, i: int) -> str:
+        return self._sources[self._source_code[i]]
+
+    def chunk_index(self, i: int) -> int:
+        return int(self._chunk_index[i])
+
+    def text(self, i: int) -> str:
+        o = self._text_offsets
+        return bytes(self._text_bytes[o[i]:o[i + 1]]).decode("utf-8")
+
+    def ids(self) -> list[str]:
+        return [self.id(i) for i in range(len(self))]
+
+    def positions(self) -> dict:
+        """chunk id -> row number (built on first call)."""
+        if self._positions is None:
+            self._positions = {cid: i for i, cid in enumerate(self.ids())}
+        return self._positions
+
+    def position(self, cid: str) -> int:
+        return self.positions()[cid]
@@ -0,0 +1,165 @@
+# metrics.py
+"""
+Per-stage latency spans and throughput counters for the RAG scripts.
+
+    with request_trace() as spans:          # optional, per request
+        with span("embed_query"):
+            ...
+    print(format_trace(spans))
+
+Every span is recorded in:
+  - the Prometheus histogram rag_stage_seconds{stage=...}
+    (if prometheus_client is installed; start_metrics_server() exposes
+    /metrics on a port)
+  - an OpenTelemetry span (if RAG_OTEL=1 and opentelemetry is installed)
+  - the current request_trace(), used for the CLI timing breakdown
+
+count(job, n) feeds rag_items_total{job=...} for the batch scripts
+(index build, export), so they report to the same surface.
+
+Inside stage_totals() (used by --profile, see profiling.py) spans and
+counts are also summed per process: calls, wall and CPU seconds per
+stage, items per job.
+
+Without the optional packages everything still works; only the export
+side is skipped.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_trace = contextvars.ContextVar("rag_current_trace", default=None)
+_prom = None
+_tracer = None
+_totals = None      # {"stages": {stage: [calls, wall, cpu]}, "items": {job: n}}
+_totals_lock = threading.Lock()
+_init_lock = threading.Lock()   # first span() / count() often comes from worker threads
+
+
+def _prometheus():
+    """Lazily create the metric objects; None if prometheus_client is missing."""
+    global _prom
+    if _prom is None:
+        with _init_lock:
+            # prometheus_client refuses a second registration of the same name
+            if _prom is None:
+                try:
+                    from prometheus_client import Counter, Histogram
+                except ImportError:
+                    _prom = False
+                else:
+                    _prom = {
+                        "stage_seconds": Histogram(
+                            "rag_stage_seconds", "Latency of one RAG pipeline stage",
+                            ["stage"], buckets=LATENCY_BUCKETS,
+                        ),
+                        "items": Counter(
+                            "rag_items_total", "Items processed by RAG batch jobs", ["job"],
+                        ),
+                    }
+    return _prom or None
+
+
+def _otel_tracer():
+    global _tracer
+    if _tracer is None:
+        with _init_lock:
+            if _tracer is None:
+                tracer = False
+                if os.environ.get("RAG_OTEL") == "1":
+                    try:
+                        from opentelemetry import trace
+                    except ImportError:
+                        pass
+                    else:
+                        tracer = trace.get_tracer("rag")
+                _tracer = tracer
+    return _tracer or None
+
+
+@contextmanager
+def request_trace():
+    """Collect (stage, seconds) for every span run inside this block."""
+    spans: list[tuple[str, float]] = []
+    token = _current_trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def stage_totals():
+    """
+    Sum every span and count() in the process while this block runs.
+    CPU seconds are process-wide (time.process_time), so a stage that
+    runs multi-threaded code shows CPU > wall.
+    """
+    global _totals
+    totals = {"stages": {}, "items": {}}
+    _totals = totals
+    try:
+        yield totals
+    finally:
+        _totals = None
+
+
+@contextmanager
+def span(stage: str):
+    tracer = _otel_tracer()
+    otel = tracer.start_as_current_span(stage) if tracer else nullcontext()
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    try:
+        with otel:
+            yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        totals = _totals
+        if totals is not None:
+            cpu = time.process_time() - c0
+            with _totals_lock:
+                entry = totals["stages"].setdefault(stage, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += cpu
+        prom = _prometheus()
+        if prom:
+            prom["stage_seconds"].labels(stage=stage).observe(elapsed)
+        spans = _current_trace.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def count(job: str, n: int = 1):
+    prom = _prometheus()
+    if prom:
+        prom["items"].labels(job=job).inc(n)
+    totals = _totals
+    if totals is not None:
+        with _totals_lock:
+            totals["items"][job] = totals["items"].get(job, 0) + n
+
+
+def format_trace(spans: list[tuple[str, float]]) -> str:
+    total = sum(sec for _, sec in spans) or 1e-9
+    lines = [f"  {stage:<16}{sec * 1000:>10.1f} ms {100 * sec / total:>6.1f}%"
+             for stage, sec in spans]
+    lines.append(f"  {'total':<16}{total * 1000:>10.1f} ms")
+    return "\n".join(lines)
+
+
+def start_metrics_server(port: int) -> bool:
+    """Expose /metrics on `port`. Returns False if prometheus_client is missing."""
+    if not port or _prometheus() is None:
+        return False
+    from prometheus_client import start_http_server
+    start_http_server(port)
+    print(f"[METRICS] Serving Prometheus metrics on :{port}/metrics")
+    return True
@@ -0,0 +1,247 @@
+# profiling.py
+"""
+--profile for every pipeline entry point.
+
+    (venv) python embeddings/03_build_faiss_index.py --profile
+    (venv) python app/04_qa_faiss.py --profile cprofile --profile-dir /tmp/prof
+
+Each script ends with `run_main(main)` instead of `main()`; run_main takes
+the --profile options off sys.argv before the script parses its own, so
+scripts with and without argparse get the same flags. Scripts with a
+parser also call add_profile_args(parser) so --help lists them.
+
+    --profile [sample]   (default) statistical: a thread snapshots every
+                         thread's Python stack every --profile-interval ms.
+                         Low overhead, includes time spent in C code that
+                         released the GIL (faiss, numpy, torch, I/O).
+    --profile cprofile   deterministic: cProfile on the main thread.
+                         Exact call counts, higher overhead.
+
+Written to --profile-dir (default rag/profiles/), named <script>-<time>:
+    .folded        sample: collapsed stacks, one "a;b;c count" line per
+                   stack; input for flamegraph.pl, speedscope, inferno
+    .pstats        cprofile: pstats dump for snakeviz / gprof2dot / flameprof
+    .summary.txt   the report printed at the end of the run:
+                   wall / CPU time and peak RSS of the run, per-stage
+                   wall / CPU time (metrics span()s), item counts
+                   (metrics count()s) and the top functions
+
+Child processes (PDF extraction, shard workers) are not profiled; their
+CPU time and peak RSS appear in the run totals.
+"""
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    import resource
+except ImportError:     # not POSIX: no peak RSS in the report
+    resource = None
+
+from utils.metrics import stage_totals
+from utils.scripts import RAG_DIR
+
+MODES = ("sample", "cprofile")
+DEFAULT_DIR = os.path.join(RAG_DIR, "profiles")
+DEFAULT_INTERVAL_MS = 5.0
+TOP_N = 25
+# Leaf frames of threads parked on a lock / queue / socket (tqdm monitor,
+# idle pool workers). Kept in the .folded file, left out of the top list.
+IDLE_FRAMES = ("wait (threading.py", "get (queue.py", "select (selectors.py",
+               "_recv (connection.py", "accept (connection.py")
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    """List the profiling flags in a script's --help (run_main parses them)."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", nargs="?", const="sample", choices=MODES, default=None,
+                       help="profile this run (default profiler: sample)")
+    group.add_argument("--profile-dir", default=DEFAULT_DIR,
+                       help="where profiles and summaries are written")
+    group.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL_MS,
+                       help="sampling interval in ms (sample profiler)")
+    group.add_argument("--profile-top", type=int, default=TOP_N,
+                       help="functions listed in the summary")
+
+
+def _take_profile_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_profile_args(parser)
+    options, rest = parser.parse_known_args(sys.argv[1:])
+    sys.argv[1:] = rest
+    return options
+
+
+def run_main(main, name: str | None = None):
+    """Call main(), under the profiler if --profile is on the command line."""
+    options = _take_profile_args()
+    if not options.profile:
+        return main()
+    name = name or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    with profile(name, options.profile, options.profile_dir,
+                 options.profile_interval, options.profile_top):
+        return main()
+
+
+# ----- profilers -----
+class Sampler:
+    """Snapshot all threads' stacks every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:"
+                                 f"{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+    def top(self, n: int) -> str:
+        """Self / inclusive share of busy samples (threads blocked in a wait are left out)."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, hits in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or frames[-1].startswith(IDLE_FRAMES):
+                continue
+            own[frames[-1]] += hits
+            for frame in set(frames):
+                total[frame] += hits
+        all_hits = sum(own.values()) or 1
+        lines = [f"  {'self%':>6} {'total%':>7}  function   ({self.samples} samples, "
+                 f"{self.interval * 1000:g} ms, {all_hits} busy thread stacks)"]
+        for frame, hits in own.most_common(n):
+            lines.append(f"  {100 * hits / all_hits:>6.1f} {100 * total[frame] / all_hits:>7.1f}  {frame}")
+        return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def _short_path(path: str) -> str:
+    return os.path.relpath(path, RAG_DIR) if path.startswith(RAG_DIR) else os.path.basename(path)
+
+
+def _cprofile_top(prof: cProfile.Profile, n: int) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(prof, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(n)
+    return "\n".join("  " + line for line in out.getvalue().strip().splitlines())
+
+
+# ----- report -----
+def peak_rss(children: bool = False) -> str:
+    if resource is None:
+        return "n/a"
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    kb = resource.getrusage(who).ru_maxrss
+    return f"{kb / 1024 / (1024 if sys.platform == 'darwin' else 1):.0f} MB"   # bytes on macOS
+
+
+def format_totals(totals: dict, wall: float) -> str:
+    lines = []
+    if totals["stages"]:
+        lines.append(f"  {'stage':<20}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'% wall':>8}")
+        for stage, (calls, sec, cpu) in sorted(totals["stages"].items(), key=lambda kv: -kv[1][1]):
+            lines.append(f"  {stage:<20}{calls:>8}{sec:>10.2f}{cpu:>10.2f}{100 * sec / wall:>8.1f}")
+    else:
+        lines.append("  (no span() stages recorded)")
+    if totals["items"]:
+        lines.append("")
+        lines.append(f"  {'items':<20}{'count':>8}{'per s':>10}")
+        for job, n in sorted(totals["items"].items()):
+            lines.append(f"  {job:<20}{n:>8}{n / wall:>10.1f}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profile(name: str, mode: str = "sample", out_dir: str = DEFAULT_DIR,
+            interval_ms: float = DEFAULT_INTERVAL_MS, top: int = TOP_N):
+    """Profile the block; the report is written even if it raises or is interrupted."""
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    sampler = prof = None
+    if mode == "sample":
+        sampler = Sampler(interval_ms / 1000)
+    else:
+        prof = cProfile.Profile()
+    print(f"[PROFILE] {name}: {mode} profiler on")
+
+    t0, c0, children0 = time.perf_counter(), time.process_time(), os.times()
+    with stage_totals() as totals:
+        if sampler:
+            sampler.start()
+        else:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if sampler:
+                sampler.stop()
+            else:
+                prof.disable()
+            wall = time.perf_counter() - t0
+            cpu = time.process_time() - c0
+            children = os.times()
+            child_cpu = (children.children_user - children0.children_user
+                         + children.children_system - children0.children_system)
+
+            if sampler:
+                sampler.write(base + ".folded")
+                out_path, top_text = base + ".folded", sampler.top(top)
+            else:
+                prof.dump_stats(base + ".pstats")
+                out_path, top_text = base + ".pstats", _cprofile_top(prof, top)
+
+            report = "\n".join([
+                f"{name} ({mode})",
+                f"  wall {wall:.2f}s  cpu {cpu:.2f}s  child cpu {child_cpu:.2f}s  "
+                f"peak rss {peak_rss()}  child peak rss {peak_rss(children=True)}",
+                "",
+                format_totals(totals, max(wall, 1e-9)),
+                "",
+                "Top functions:",
+                top_text,
+            ])
+            with open(base + ".summary.txt", "w", encoding="utf-8") as f:
+                f.write(report + "\n")
+            print(f"\n[PROFILE] {report}")
+            print(f"[PROFILE] Wrote {out_path} and {base}.summary.txt")
@@ -0,0 +1,99 @@
+# projection.py
+"""
+Dimensionality reduction for the embedding index.
+
+Search cost and index memory are linear in the vector dimension, so the
+builder can store vectors in fewer dimensions and the QA side projects
+each query the same way:
+
+    pca        centred PCA learned on the corpus embeddings
+    opq        faiss OPQ rotation (learned for product quantization,
+               also a good plain projection); needs faiss, dim % 8 == 0
+    truncate   keep the first `dim` components (Matryoshka-trained
+               models only; for other models use pca)
+
+Every projection re-normalizes its output, so inner product stays cosine
+similarity. Stored next to the index as projection.npz:
+    kind, mean (d_in,), matrix (d_in, d_out)
+
+    proj = Projection.fit("pca", corpus_vectors, 128)
+    proj.apply(vectors)     # (n, 384) -> (n, 128), unit length
+"""
+
+import numpy as np
+
+KINDS = ("pca", "opq", "truncate")
+FILE_NAME = "projection.npz"
+MAX_TRAIN = 100_000     # vectors used to learn pca / opq
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _train_sample(vectors: np.ndarray, seed: int = 0) -> np.ndarray:
+    if len(vectors) <= MAX_TRAIN:
+        return vectors
+    rows = np.random.RandomState(seed).choice(len(vectors), MAX_TRAIN, replace=False)
+    return vectors[rows]
+
+
+class Projection:
+    def __init__(self, kind: str, mean: np.ndarray, matrix: np.ndarray):
+        self.kind = kind
+        self.mean = mean.astype("float32")
+        self.matrix = matrix.astype("float32")
+
+    @property
+    def dim_in(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @classmethod
+    def fit(cls, kind: str, vectors: np.ndarray, dim: int) -> "Projection":
+        d_in = vectors.shape[1]
+        if not 0 < dim < d_in:
+            raise ValueError(f"projection dim must be in 1..{d_in - 1}, got {dim}")
+        vectors = np.asarray(vectors, dtype="float32")
+
+        if kind == "truncate":
+            return cls(kind, np.zeros(d_in), np.eye(d_in, dim))
+
+        sample = _train_sample(vectors)
+        if kind == "pca":
+            mean = sample.mean(axis=0)
+            cov = np.cov(sample - mean, rowvar=False)
+            eigvals, eigvecs = np.linalg.eigh(cov)              # ascending
+            return cls(kind, mean, eigvecs[:, ::-1][:, :dim])
+
+        if kind == "opq":
+            import faiss
+            if dim % 8:
+                raise ValueError(f"opq needs a dim divisible by 8, got {dim}")
+            opq = faiss.OPQMatrix(d_in, dim // 8, dim)
+            opq.train(np.ascontiguousarray(sample))
+            rotation = faiss.vector_to_array(opq.A).reshape(dim, d_in)
+            return cls(kind, np.zeros(d_in), rotation.T)
+
+        raise ValueError(f"unknown projection {kind!r}, expected one of {KINDS}")
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        x = np.asarray(vectors, dtype="float32")
+        if self.kind == "pca":
+            x = x - self.mean
+        return np.ascontiguousarray(_normalize(x @ self.matrix), dtype="float32")
+
+    def save(self, path: str):
+        np.savez(path, kind=np.array(self.kind), mean=self.mean, matrix=self.matrix)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            return cls(str(data["kind"]), data["mean"], data["matrix"])
+
+    def __repr__(self) -> str:
+        return f"Projection({self.kind}, {self.dim_in} -> {self.dim})"
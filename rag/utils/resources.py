@@ -0,0 +1,79 @@
+# resources.py
+"""
+Lazy, thread-safe loading of heavy shared resources (SBERT model,
+FAISS index, metadata, chunk texts).
+
+Nothing heavy is imported at module level: torch, sentence-transformers
+and faiss are only imported the first time a resource is used, so
+`--help`, tests and non-model code paths start in well under a second.
+
+    model = LazyResource("sbert", lambda: load_sentence_transformer(NAME))
+    model.warm()          # optional: start loading in the background
+    ...
+    model.get().encode(...)   # blocks only if still loading
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+
+class LazyResource:
+    def __init__(self, name: str, loader):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                t0 = time.perf_counter()
+                self._value = self._loader()
+                self._loaded = True
+                print(f"[LOAD] {self.name} ready in {time.perf_counter() - t0:.2f}s")
+        return self._value
+
+    def warm(self) -> threading.Thread:
+        """Load in a daemon thread; errors are reported and retried on get()."""
+        def _run():
+            try:
+                self.get()
+            except Exception as e:
+                print(f"[LOAD ERROR] {self.name}: {e}")
+
+        thread = threading.Thread(target=_run, name=f"warm-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def swap(self, value):
+        """Replace the value in one step (e.g. a reloaded index). Returns the old one."""
+        with self._lock:
+            old = self._value
+            self._value = value
+            self._loaded = True
+        return old
+
+    def reset(self):
+        """Drop the loaded value; the next get() loads it again."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+
+def warm(*resources: LazyResource) -> list[threading.Thread]:
+    return [r.warm() for r in resources]
+
+
+@lru_cache(maxsize=None)
+def load_sentence_transformer(model_name: str):
+    # Shared per process, so scripts asking for the same model get one copy
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
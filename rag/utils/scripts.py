@@ -0,0 +1,28 @@
+# scripts.py
+"""
+Import the numbered pipeline scripts (e.g. app/04_qa_faiss.py) as modules.
+
+Their file names start with a digit, so a plain `import` does not work.
+Modules are cached by path, so loading the same script twice returns the
+same module (and the same lazily-loaded resources).
+"""
+
+import importlib.util
+import os
+import sys
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(rel_path: str):
+    """load_script("app/04_qa_faiss.py") -> module"""
+    path = os.path.join(RAG_DIR, rel_path)
+    name = "rag_script_" + os.path.splitext(rel_path)[0].replace("/", "_").replace(os.sep, "_")
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,252 @@
+# shards.py
+"""
+Sharded FAISS index with parallel scatter-gather search.
+
+embeddings/03_build_faiss_index.py --shards N writes
+    vectorstore/medlineplus_faiss/versions/<version>/
+        shards.json                 manifest (see below)
+        shards/<nn>-<name>/index.faiss
+        metadata.store, metadata.jsonl  (global, rows in shard order)
+
+    shards.json: {"dim": 384, "by": "hash" | "collection",
+                  "shards": [{"name", "path", "offset", "ntotal"}, ...]}
+
+Shard s holds global rows [offset, offset + ntotal), so a shard-local
+hit i is global row offset + i and the metadata store is shared.
+
+ShardedIndex.search(qvecs, k) has the faiss signature: every shard
+returns its exact top-k, the k best of the union are the exact global
+top-k (ties keep shard order). Shards are searched:
+
+    threads     (default) one thread per shard in this process;
+                faiss releases the GIL while searching
+    processes   one local worker process per shard, over a socket
+                (multi-process mode for testing the remote path)
+    addresses   host:port of workers started with app/04c_shard_worker.py,
+                one per shard in manifest order (capacity across machines)
+
+Workers speak multiprocessing.connection: HMAC auth with
+RAG_SHARD_AUTHKEY, then pickled tuples. Unpickling runs code, so anyone
+holding the key can run code on a worker. Without RAG_SHARD_AUTHKEY a
+built-in key is used and workers only bind loopback addresses; a worker
+on any other address refuses to start until RAG_SHARD_AUTHKEY is set to
+a secret shared with the QA processes (e.g. `openssl rand -hex 32`).
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MANIFEST_NAME = "shards.json"
+DEFAULT_AUTHKEY = b"rag-shards"
+
+
+def authkey() -> bytes:
+    return os.environ.get("RAG_SHARD_AUTHKEY", "").encode("utf-8") or DEFAULT_AUTHKEY
+
+
+def is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):    # unresolvable, "" (all interfaces)
+        return False
+
+
+def check_bind_address(host: str):
+    """Refuse to serve on a non-loopback address with the public default key."""
+    if not os.environ.get("RAG_SHARD_AUTHKEY") and not is_loopback(host):
+        raise ValueError(f"shard worker on {host!r} needs RAG_SHARD_AUTHKEY: the default key "
+                         f"is public and workers unpickle what they receive")
+
+
+# ----- build side -----
+def collection_of(rec: dict) -> str:
+    """Top-level folder of a chunk's source: cdc, who, medlineplus_drugs, ..."""
+    return rec["source"].replace("\\", "/").split("/", 1)[0]
+
+
+def assign_shards(records: list[dict], n_shards: int, by: str) -> list[tuple[str, list[int]]]:
+    """[(shard name, record positions)], non-empty shards only."""
+    if by == "collection":
+        groups: dict[str, list[int]] = {}
+        for i, rec in enumerate(records):
+            groups.setdefault(collection_of(rec), []).append(i)
+        return sorted(groups.items())
+
+    groups = [[] for _ in range(n_shards)]
+    for i, rec in enumerate(records):
+        groups[zlib.crc32(rec["id"].encode("utf-8")) % n_shards].append(i)
+    return [(f"hash{s}", rows) for s, rows in enumerate(groups) if rows]
+
+
+def write_manifest(index_dir: str, dim: int, by: str, shards: list[dict]):
+    with open(os.path.join(index_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"dim": dim, "by": by, "shards": shards}, f, indent=2)
+
+
+def read_manifest(index_dir: str) -> dict | None:
+    path = os.path.join(index_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----- search side -----
+def merge_topk(parts: list[tuple[np.ndarray, np.ndarray]], k: int):
+    """Exact k-best of per-shard (scores, global ids); empty slots have id -1."""
+    scores = np.hstack([p[0] for p in parts])
+    ids = np.hstack([p[1] for p in parts])
+    scores = np.where(ids < 0, -np.inf, scores)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class LocalShard:
+    def __init__(self, path: str):
+        import faiss
+        self.index = faiss.read_index(path)
+
+    def search(self, qvecs: np.ndarray, k: int):
+        return self.index.search(qvecs, k)
+
+    def close(self):
+        pass
+
+
+class RemoteShard:
+    """Client for one shard worker; one request in flight per connection."""
+
+    def __init__(self, address: tuple[str, int], process=None):
+        from multiprocessing.connection import Client
+        self.conn = Client(address, authkey=authkey())
+        self.process = process
+        self._lock = threading.Lock()
+
+    def search(self, qvecs: np.ndarray, k: int):
+        with self._lock:
+            self.conn.send(("search", qvecs, k))
+            status, payload = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"shard worker error: {payload}")
+        return payload
+
+    def close(self):
+        with self._lock:
+            try:
+                self.conn.send(("close",))
+            except OSError:
+                pass
+            self.conn.close()
+        if self.process is not None:
+            self.process.terminate()
+
+
+def serve_shard(index_path: str, address: tuple[str, int], ready=None):
+    """
+    Blocking shard worker: load one index, answer search requests.
+    `ready` (a multiprocessing queue) receives the bound address.
+    """
+    from multiprocessing.connection import Listener
+
+    check_bind_address(address[0])
+    shard = LocalShard(index_path)
+    with Listener(address, authkey=authkey()) as listener:
+        if ready is not None:
+            ready.put(listener.address)
+        print(f"[SHARD] {index_path} ({shard.index.ntotal} vectors) on "
+              f"{listener.address[0]}:{listener.address[1]}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(shard, conn), daemon=True).start()
+
+
+def _handle(shard: LocalShard, conn):
+    with conn:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                return
+            if msg[0] == "close":
+                return
+            try:
+                conn.send(("ok", shard.search(msg[1], msg[2])))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def _spawn_local_workers(index_paths: list[str]) -> list[RemoteShard]:
+    import multiprocessing as mp
+
+    ctx = mp.get_context("spawn")
+    started = []
+    for path in index_paths:    # start all, then wait: shards load in parallel
+        ready = ctx.Queue()
+        proc = ctx.Process(target=serve_shard, args=(path, ("127.0.0.1", 0), ready),
+                           daemon=True)
+        proc.start()
+        started.append((proc, ready))
+    return [RemoteShard(ready.get(timeout=120), process=proc) for proc, ready in started]
+
+
+def parse_address(addr: str) -> tuple[str, int]:
+    host, port = addr.rsplit(":", 1)
+    return host, int(port)
+
+
+class ShardedIndex:
+    """faiss-like search() over all shards of a manifest."""
+
+    def __init__(self, index_dir: str, manifest: dict, mode: str = "threads"):
+        self.manifest = manifest
+        self.offsets = [s["offset"] for s in manifest["shards"]]
+        self.ntotal = sum(s["ntotal"] for s in manifest["shards"])
+        self.d = manifest["dim"]
+        paths = [os.path.join(index_dir, s["path"]) for s in manifest["shards"]]
+
+        if mode == "threads":
+            self.shards = [LocalShard(p) for p in paths]
+        elif mode == "processes":
+            self.shards = _spawn_local_workers(paths)
+        else:
+            addresses = [parse_address(a) for a in mode.split(",") if a.strip()]
+            if len(addresses) != len(paths):
+                raise ValueError(f"{len(paths)} shards but {len(addresses)} worker addresses")
+            self.shards = [RemoteShard(a) for a in addresses]
+        self._pool = ThreadPoolExecutor(max_workers=len(self.shards),
+                                        thread_name_prefix="shard")
+
+    def search(self, qvecs: np.ndarray, k: int):
+        def one(s):
+            scores, local = self.shards[s].search(qvecs, k)
+            return scores, np.where(local < 0, -1, local + self.offsets[s])
+
+        parts = list(self._pool.map(one, range(len(self.shards))))
+        return merge_topk(parts, k)
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        """All vectors in global row order (threads mode only, used by eval)."""
+        vectors = np.vstack([s.index.reconstruct_n(0, s.index.ntotal) for s in self.shards])
+        return vectors[start:start + n]
+
+    def close(self):
+        for s in self.shards:
+            s.close()
+        self._pool.shutdown(wait=False)
+
+
+def load_sharded(index_dir: str, mode: str | None = None) -> ShardedIndex | None:
+    """ShardedIndex for index_dir if it was built sharded, else None."""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return None
+    mode = mode or os.environ.get("RAG_SHARD_MODE", "threads")
+    print(f"[SHARDS] {len(manifest['shards'])} shards (by {manifest['by']}), mode={mode}")
+    return ShardedIndex(index_dir, manifest, mode)
@@ -0,0 +1,114 @@
+import threading
+
+
+class TorchBackend:
+    """
+    M2M100 on PyTorch (CPU or GPU).
+
+    quantize=True applies dynamic int8 quantization to every nn.Linear,
+    which roughly halves CPU latency for M2M100 with a small quality cost.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0):
+        import torch
+        from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+
+        self.tokenizer = M2M100Tokenizer.from_pretrained(model_name)
+        model = M2M100ForConditionalGeneration.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            self.name = "torch-int8"
+        self.model = model
+        # src_lang is shared tokenizer state, so set it and encode together
+        self._tokenize_lock = threading.Lock()
+
+    def translate(self, texts: list[str], src: str, tgt: str,
+                  num_beams: int = 5, max_new_tokens: int = 256) -> list[str]:
+        import torch
+
+        with self._tokenize_lock:
+            self.tokenizer.src_lang = src
+            encoded = self.tokenizer(texts, return_tensors="pt", padding=True)
+            forced_bos = self.tokenizer.get_lang_id(tgt)
+
+        with torch.inference_mode():
+            generated = self.model.generate(
+                **encoded,
+                forced_bos_token_id=forced_bos,
+                num_beams=num_beams,
+                max_new_tokens=max_new_tokens,
+            )
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+
+class CTranslate2Backend:
+    """
+    M2M100 exported to CTranslate2 (int8 by default).
+
+    Convert once with:
+        ct2-transformers-converter --model facebook/m2m100_418M \\
+            --output_dir m2m100_418M_ct2 --quantization int8
+    """
+
+    name = "ctranslate2"
+
+    def __init__(self, model_name: str, ct2_dir: str, threads: int = 0,
+                 compute_type: str = "int8"):
+        import ctranslate2
+        from transformers import M2M100Tokenizer
+
+        self.tokenizer = M2M100Tokenizer.from_pretrained(model_name)
+        self.translator = ctranslate2.Translator(
+            ct2_dir,
+            device="cpu",
+            compute_type=compute_type,
+            intra_threads=threads,
+        )
+        self._tokenize_lock = threading.Lock()
+
+    def translate(self, texts: list[str], src: str, tgt: str,
+                  num_beams: int = 5, max_new_tokens: int = 256) -> list[str]:
+        with self._tokenize_lock:
+            self.tokenizer.src_lang = src
+            source = [
+                self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(t))
+                for t in texts
+            ]
+            tgt_token = self.tokenizer.lang_code_to_token[tgt]
+
+        results = self.translator.translate_batch(
+            source,
+            target_prefix=[[tgt_token]] * len(texts),
+            beam_size=num_beams,
+            max_decoding_length=max_new_tokens,
+        )
+
+        out = []
+        for res in results:
+            tokens = res.hypotheses[0][1:]  # drop the forced language token
+            ids = self.tokenizer.convert_tokens_to_ids(tokens)
+            out.append(self.tokenizer.decode(ids, skip_special_tokens=True))
+        return out
+
+
+BACKENDS = ("torch", "torch-int8", "ctranslate2")
+
+
+def load_backend(name: str, model_name: str, threads: int = 0, ct2_dir: str = ""):
+    if name == "torch":
+        return TorchBackend(model_name, threads=threads)
+    if name == "torch-int8":
+        return TorchBackend(model_name, quantize=True, threads=threads)
+    if name == "ctranslate2":
+        if not ct2_dir:
+            raise ValueError("ctranslate2 backend needs TRANSLATION_CT2_DIR")
+        return CTranslate2Backend(model_name, ct2_dir, threads=threads)
+    raise ValueError(f"Unknown translation backend {name!r}, expected one of {BACKENDS}")
@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TranslationBatcher:
+    """
+    Coalesces concurrent translation requests into padded batches.
+
+    Texts are queued per (source_lang, target_lang). A queue is flushed when
+    it reaches max_batch_size or max_wait_ms after its first text arrived,
+    whichever comes first. Each flush runs translate_fn(texts, src, tgt) in a
+    worker thread, so the event loop never blocks on model.generate.
+
+    All queue bookkeeping happens on the event loop thread, so no locks are
+    needed here; translate_fn itself must be thread-safe if workers > 1.
+    """
+
+    def __init__(self, translate_fn, max_batch_size: int = 16,
+                 max_wait_ms: float = 10.0, workers: int = 1):
+        self.translate_fn = translate_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="translate")
+        self._pending = {}          # (src, tgt) -> [(text, future), ...]
+        self._timers = {}           # (src, tgt) -> asyncio.TimerHandle
+        self.batches = 0
+        self.texts = 0
+
+    async def submit(self, texts: list[str], src: str, tgt: str) -> list[str]:
+        loop = asyncio.get_running_loop()
+        key = (src, tgt)
+        futures = []
+
+        for text in texts:
+            fut = loop.create_future()
+            self._pending.setdefault(key, []).append((text, fut))
+            futures.append(fut)
+            if len(self._pending[key]) >= self.max_batch_size:
+                self._flush(key)
+
+        if self._pending.get(key) and key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._pending.pop(key, [])
+        if not items:
+            return
+
+        self.batches += 1
+        self.texts += len(items)
+
+        texts = [text for text, _ in items]
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self.executor, self.translate_fn, texts, *key)
+        job.add_done_callback(lambda done: self._resolve(items, done))
+
+    @staticmethod
+    def _resolve(items, done):
+        exc = done.exception()
+        results = None if exc else done.result()
+        for i, (_, fut) in enumerate(items):
+            if fut.done():
+                continue
+            if exc:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(results[i])
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
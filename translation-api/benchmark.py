@@ -0,0 +1,116 @@
+"""
+Benchmark translation backends on a fixed local test set.
+
+For each backend it reports sentences/sec and p50/p95 latency per batch,
+and BLEU of its output against the fp32 "torch" baseline output, so the
+quality drift of int8 / CTranslate2 is visible next to the speedup.
+
+    python benchmark.py --backends torch torch-int8 --tgt hi --batch-size 8
+    python benchmark.py --backends torch ctranslate2 --ct2-dir m2m100_418M_ct2 \\
+        --threads 4 --num-beams 2
+"""
+
+import argparse
+import math
+import time
+from collections import Counter
+from pathlib import Path
+
+from backends import BACKENDS, load_backend
+
+DEFAULT_SENTENCES = Path(__file__).resolve().parent / "bench" / "sentences.en.txt"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def corpus_bleu(hypotheses: list[str], references: list[str], max_n: int = 4) -> float:
+    """Plain corpus BLEU (whitespace tokens, brevity penalty), 0-100."""
+    matches = [0] * max_n
+    totals = [0] * max_n
+    hyp_len = ref_len = 0
+
+    for hyp, ref in zip(hypotheses, references):
+        h, r = hyp.split(), ref.split()
+        hyp_len += len(h)
+        ref_len += len(r)
+        for n in range(1, max_n + 1):
+            h_grams = Counter(tuple(h[i:i + n]) for i in range(len(h) - n + 1))
+            r_grams = Counter(tuple(r[i:i + n]) for i in range(len(r) - n + 1))
+            matches[n - 1] += sum((h_grams & r_grams).values())
+            totals[n - 1] += max(len(h) - n + 1, 0)
+
+    if hyp_len == 0 or min(matches) == 0:
+        return 0.0
+    log_precision = sum(math.log(m / t) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100.0 * brevity * math.exp(log_precision)
+
+
+def run_backend(backend, sentences, args):
+    # One warm-up batch so lazy init is not measured
+    backend.translate(sentences[:1], args.src, args.tgt,
+                      num_beams=args.num_beams, max_new_tokens=args.max_new_tokens)
+
+    outputs: list[str] = []
+    latencies: list[float] = []
+    t_start = time.perf_counter()
+    for i in range(0, len(sentences), args.batch_size):
+        batch = sentences[i:i + args.batch_size]
+        t0 = time.perf_counter()
+        outputs.extend(backend.translate(batch, args.src, args.tgt,
+                                         num_beams=args.num_beams,
+                                         max_new_tokens=args.max_new_tokens))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+
+    return outputs, {
+        "sent_per_s": len(sentences) / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark M2M100 translation backends")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=["torch", "torch-int8"])
+    parser.add_argument("--model", default="facebook/m2m100_418M")
+    parser.add_argument("--ct2-dir", default="")
+    parser.add_argument("--sentences", default=str(DEFAULT_SENTENCES))
+    parser.add_argument("--src", default="en")
+    parser.add_argument("--tgt", default="hi")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    with open(args.sentences, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    print(f"[BENCH] {len(sentences)} sentences {args.src}->{args.tgt}, "
+          f"batch={args.batch_size} beams={args.num_beams} threads={args.threads or 'default'}")
+
+    # The fp32 torch output is the BLEU reference, so always run it first
+    names = ["torch"] + [b for b in args.backends if b != "torch"]
+
+    reference = None
+    print(f"{'backend':<14}{'sent/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'BLEU vs fp32':>14}")
+    for name in names:
+        backend = load_backend(name, args.model, threads=args.threads, ct2_dir=args.ct2_dir)
+        outputs, stats = run_backend(backend, sentences, args)
+        if reference is None:
+            reference = outputs
+        bleu = corpus_bleu(outputs, reference)
+        print(f"{name:<14}{stats['sent_per_s']:>10.2f}{stats['p50_ms']:>10.0f}"
+              f"{stats['p95_ms']:>10.0f}{bleu:>14.1f}")
+        del backend
+
+
+if __name__ == "__main__":
+    main()
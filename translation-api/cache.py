@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Split after . ! ? followed by whitespace, or on line breaks.
+# The capture group keeps the separators so text can be reassembled as-is.
+SENTENCE_SPLIT_RE = re.compile(r"((?<=[.!?])\s+|\n+)")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Alternating [sentence, separator, sentence, ...] pieces of text."""
+    return SENTENCE_SPLIT_RE.split(text)
+
+
+def sentence_key(src: str, tgt: str, sentence: str) -> tuple[str, str, str]:
+    normalized = WHITESPACE_RE.sub(" ", sentence).strip()
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return (src, tgt, digest)
+
+
+class TranslationCache:
+    """
+    Bounded LRU translation memory keyed by (src, tgt, sha1(normalized sentence)).
+
+    Optionally persisted as JSONL at `path`: loaded on startup, written on
+    save() (called on shutdown), so repeated medical phrases survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: str = ""):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                self.put((rec["src"], rec["tgt"], rec["key"]), rec["translation"])
+        print(f"[CACHE] Loaded {len(self._entries)} translations from {self.path}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            items = list(self._entries.items())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for (src, tgt, key), translation in items:
+                rec = {"src": src, "tgt": tgt, "key": key, "translation": translation}
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        print(f"[CACHE] Saved {len(items)} translations to {self.path}")
+
+
+async def translate_cached(cache: TranslationCache, submit, texts: list[str],
+                           src: str, tgt: str) -> list[str]:
+    """
+    Translate texts sentence by sentence: cached sentences are reused and
+    only the misses (deduplicated) go to `submit(sentences, src, tgt)`.
+    """
+    pieces_per_text = [split_sentences(text) for text in texts]
+
+    resolved: dict = {}             # key -> translation
+    missing: dict = {}              # key -> sentence
+    for pieces in pieces_per_text:
+        for sentence in pieces[0::2]:
+            if not sentence.strip():
+                continue
+            key = sentence_key(src, tgt, sentence)
+            if key in resolved or key in missing:
+                continue
+            value = cache.get(key)
+            if value is None:
+                missing[key] = sentence.strip()
+            else:
+                resolved[key] = value
+
+    if missing:
+        translated = await submit(list(missing.values()), src, tgt)
+        for key, value in zip(missing.keys(), translated):
+            cache.put(key, value)
+            resolved[key] = value
+
+    out = []
+    for pieces in pieces_per_text:
+        parts = []
+        for i, piece in enumerate(pieces):
+            if i % 2 == 1 or not piece.strip():
+                parts.append(piece)     # separator / blank, kept as-is
+                continue
+            parts.append(resolved[sentence_key(src, tgt, piece)])
+        out.append("".join(parts))
+    return out
@@ -1,17 +1,105 @@
+import os
+import threading
+
 from fastapi import FastAPI, Body
-from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+
+from backends import load_backend
+from batching import TranslationBatcher
+from cache import TranslationCache, translate_cached
+
+MODEL_NAME = os.environ.get("TRANSLATION_MODEL", "facebook/m2m100_418M")
+# torch (fp32, default) | torch-int8 | ctranslate2, see backends.py
+BACKEND = os.environ.get("TRANSLATION_BACKEND", "torch")
+CT2_DIR = os.environ.get("TRANSLATION_CT2_DIR", "")
+THREADS = int(os.environ.get("TRANSLATION_THREADS", "0"))   # 0 = library default
+NUM_BEAMS = int(os.environ.get("TRANSLATION_NUM_BEAMS", "5"))
+MAX_NEW_TOKENS = int(os.environ.get("TRANSLATION_MAX_NEW_TOKENS", "256"))
+# Start loading the model in the background as soon as the app starts,
+# instead of at import time (set to 0 to load on the first request).
+WARM_ON_STARTUP = os.environ.get("TRANSLATION_WARM_ON_STARTUP", "1") == "1"
+
+# Batching: concurrent requests for the same language pair are merged
+# into one padded generate() call, run off the event loop.
+MAX_BATCH_SIZE = int(os.environ.get("TRANSLATION_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.environ.get("TRANSLATION_MAX_WAIT_MS", "10"))
+WORKERS = int(os.environ.get("TRANSLATION_WORKERS", "1"))
+
+# Translation memory: per-sentence LRU cache (0 disables), optionally
+# persisted to a JSONL file across restarts.
+CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "10000"))
+CACHE_PATH = os.environ.get("TRANSLATION_CACHE_PATH", "")
 
 app = FastAPI()
-tokenizer = M2M100Tokenizer.from_pretrained("facebook/m2m100_418M")
-model = M2M100ForConditionalGeneration.from_pretrained("facebook/m2m100_418M")
+
+_load_lock = threading.Lock()
+_backend = None
+
+
+def get_backend():
+    """Load the translation backend once, on first use (thread-safe)."""
+    global _backend
+    if _backend is None:
+        with _load_lock:
+            if _backend is None:
+                _backend = load_backend(BACKEND, MODEL_NAME,
+                                        threads=THREADS, ct2_dir=CT2_DIR)
+    return _backend
+
+
+def translate_texts(texts: list[str], src: str, tgt: str) -> list[str]:
+    """Translate a batch of texts for one language pair (runs in a worker thread)."""
+    return get_backend().translate(texts, src, tgt,
+                                   num_beams=NUM_BEAMS,
+                                   max_new_tokens=MAX_NEW_TOKENS)
+
+
+batcher = TranslationBatcher(
+    translate_texts,
+    max_batch_size=MAX_BATCH_SIZE,
+    max_wait_ms=MAX_WAIT_MS,
+    workers=WORKERS,
+)
+
+cache = TranslationCache(max_entries=CACHE_SIZE, path=CACHE_PATH)
+
+
+@app.on_event("startup")
+def warm_model():
+    cache.load()
+    if WARM_ON_STARTUP:
+        threading.Thread(target=get_backend, name="warm-translation", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_batcher():
+    batcher.shutdown()
+    cache.save()
+
+
+@app.get("/health")
+async def health():
+    return {
+        "model": MODEL_NAME,
+        "backend": BACKEND,
+        "loaded": _backend is not None,
+        "batching": batcher.stats(),
+        "cache": cache.stats(),
+    }
+
 
 @app.post("/translate")
 async def translate(payload: dict = Body(...)):
     text = payload["text"]
     src = payload["source_lang"]
     tgt = payload["target_lang"]
-    tokenizer.src_lang = src
-    encoded = tokenizer(text, return_tensors="pt")
-    generated = model.generate(**encoded, forced_bos_token_id=tokenizer.get_lang_id(tgt))
-    translated = tokenizer.batch_decode(generated, skip_special_tokens=True)[0]
+    translated = (await translate_cached(cache, batcher.submit, [text], src, tgt))[0]
     return {"translation": translated}
+
+
+@app.post("/translate_batch")
+async def translate_batch(payload: dict = Body(...)):
+    texts = payload["texts"]
+    src = payload["source_lang"]
+    tgt = payload["target_lang"]
+    translations = await translate_cached(cache, batcher.submit, list(texts), src, tgt)
+    return {"translations": translations}